@@ -0,0 +1,70 @@
+""" Benchmark of the polygon filtering stage of the datamatrix ContourLocator.
+
+Compares the batched (numpy) filter used by the locator against the original per-polygon reference
+implementation (ContourLocator._reference_polygons_to_finder_patterns), on the polygons found in the test
+images with each of the deep locate parameter sets.
+Run from the root of the repository:
+
+    python benchmarks/contour_filter.py [--repeat N]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dls_barcode.datamatrix.locate.locate_contour import ContourLocator as CL
+from dls_barcode.datamatrix.locate.threshold_cache import ThresholdCache
+from dls_util.image import Image
+
+IMAGES = os.path.join("tests", "test-resources", "*.png")
+BLOCK_SIZE = 35
+PARAMETER_SETS = [(c, ms) for ms in [3, 2] for c in [16, 8, 0, 4, 20]]
+
+
+def load_polygon_sets(files):
+    polygon_sets = []
+    for file in files:
+        cache = ThresholdCache(Image.from_file(file).to_grayscale())
+        for c, morph_size in PARAMETER_SETS:
+            closed = cache.closed_image(BLOCK_SIZE, c, morph_size)
+            polygon_sets.append(CL._contours_to_polygons(CL._get_contours(closed)))
+    return polygon_sets
+
+
+def time_filter(function, polygon_sets, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [function(polygons) for polygons in polygon_sets]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def positions(results):
+    return [[(fp.c1.tuple(), fp.c2.tuple(), fp.c3.tuple()) for fp in fps] for fps in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed runs (the best is reported)")
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(IMAGES))
+    polygon_sets = load_polygon_sets(files)
+    num_polygons = sum(len(p) for p in polygon_sets)
+
+    reference_time, reference_results = time_filter(CL._reference_polygons_to_finder_patterns, polygon_sets, args.repeat)
+    batched_time, batched_results = time_filter(CL._polygons_to_finder_patterns, polygon_sets, args.repeat)
+
+    print("{} images, {} polygon sets, {} polygons".format(len(files), len(polygon_sets), num_polygons))
+    print("reference: {:8.3f} s".format(reference_time))
+    print("batched:   {:8.3f} s  ({:.1f}x)".format(batched_time, reference_time / batched_time))
+    print("identical: {}".format(positions(reference_results) == positions(batched_results)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+""" Benchmark suite for the barcode scanning pipeline.
+
+Replays the images in tests/test-resources through each stage of the pipeline and reports, per stage, the
+latency percentiles of a single call, the throughput (calls per second) and the peak memory allocated while
+the stage runs. Run from the root of the repository:
+
+    python benchmarks/run_benchmarks.py [--stage NAME ...] [--repeat N] [--output results.json]
+                                        [--compare baseline.json]
+
+The results can be written out as JSON; passing a previous results file to --compare prints the change in
+median latency and throughput of each stage, so that the numbers for two commits can be compared.
+
+Latencies are measured with the memory tracer off. The peak memory is measured in a separate pass with
+tracemalloc, so it counts the memory allocated through Python (including numpy arrays) but not buffers
+allocated inside OpenCV.
+"""
+from __future__ import division, print_function
+
+import argparse
+import datetime
+import gc
+import glob
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dls_barcode.datamatrix import DataMatrix, Locator
+from dls_barcode.geometry import Geometry
+from dls_barcode.geometry.unipuck_locator import UnipuckLocator
+from dls_barcode.scan import GeometryScanner, OpenScanner
+from dls_barcode.scan.scan_result import ScanResult
+from dls_util.cv.frame import Frame
+from dls_util.image import Image
+
+RESOURCES = os.path.join("tests", "test-resources")
+PUCK_IMAGES = os.path.join(RESOURCES, "puck1_*.png")
+BLUE_STAND_IMAGES = os.path.join(RESOURCES, "blue_stand", "*.png")
+TRAY_IMAGES = os.path.join(RESOURCES, "Tray", "*.png")
+SIDE_IMAGES = os.path.join(RESOURCES, "new_side", "*.png")
+
+PERCENTILES = [50, 90, 95, 99]
+
+
+class _ImageLibrary:
+    """ Loads each test image once, so that reading files from disk isn't counted in the timings. """
+    def __init__(self):
+        self._images = {}
+
+    def files(self, *patterns):
+        files = []
+        for pattern in patterns:
+            files.extend(sorted(glob.glob(pattern)))
+        return files
+
+    def image(self, file):
+        if file not in self._images:
+            self._images[file] = Image.from_file(file)
+        return self._images[file]
+
+    def gray(self, file):
+        return self.image(file).to_grayscale()
+
+    def frame(self, file):
+        return Frame(self.image(file).img)
+
+
+##########################################
+# Stages
+# Each stage takes the image library and returns a list of (label, call) pairs. Each call is timed
+# separately and they are run in order, so a stage may keep state between calls (e.g. a scanner that
+# is fed a sequence of frames). Stages are rebuilt for each repeat.
+##########################################
+def _stage_locate_deep(library):
+    files = library.files(PUCK_IMAGES, BLUE_STAND_IMAGES, TRAY_IMAGES, SIDE_IMAGES)
+    grays = [(f, library.gray(f)) for f in files]
+    return [(f, lambda g=g: Locator().locate_deep(g, filter_overlap=True)) for f, g in grays]
+
+
+def _stage_locate_shallow(library):
+    files = library.files(PUCK_IMAGES, BLUE_STAND_IMAGES, TRAY_IMAGES, SIDE_IMAGES)
+    grays = [(f, library.gray(f)) for f in files]
+    return [(f, lambda g=g: Locator().locate_shallow(g)) for f, g in grays]
+
+
+def _stage_unipuck_locator(library):
+    files = library.files(PUCK_IMAGES, BLUE_STAND_IMAGES)
+    grays = [(f, library.gray(f)) for f in files]
+    return [(f, lambda g=g: UnipuckLocator(g).find_location()) for f, g in grays]
+
+
+def _stage_datamatrix_read(library):
+    """ Decode of each located barcode in the puck images. The decode cache is cleared before each read
+    so that every call reaches libdmtx. """
+    calls = []
+    for file in library.files(PUCK_IMAGES):
+        gray = library.gray(file)
+        for n, barcode in enumerate(DataMatrix.locate_all_barcodes_in_image(gray)):
+            calls.append(("{}[{}]".format(file, n), lambda b=barcode, g=gray: _read_uncached(b, g)))
+    return calls
+
+
+def _read_uncached(barcode, gray):
+    DataMatrix.decode_cache().clear()
+    barcode.perform_read(gray, force_read=True)
+
+
+def _stage_geometry_scanner(library):
+    """ The puck1 images are fed to one scanner as a continuous sequence of frames (as from the camera);
+    the blue stand images are each scanned as a single image. """
+    stream_scanner = GeometryScanner(Geometry.UNIPUCK, [DataMatrix.DEFAULT_SIZE])
+    calls = [(f, lambda fr=library.frame(f): stream_scanner.scan_next_frame(fr))
+             for f in library.files(PUCK_IMAGES)]
+
+    for file in library.files(BLUE_STAND_IMAGES):
+        frame = library.frame(file)
+        scanner = GeometryScanner(Geometry.UNIPUCK, [DataMatrix.DEFAULT_SIZE])
+        calls.append((file, lambda s=scanner, fr=frame: s.scan_next_frame(fr, is_single_image=True)))
+    return calls
+
+
+def _stage_open_scanner(library):
+    calls = []
+    for file in library.files(SIDE_IMAGES, TRAY_IMAGES):
+        frame = library.frame(file)
+        scanner = OpenScanner(DataMatrix.DEFAULT_SIDE_SIZES)
+        calls.append((file, lambda s=scanner, fr=frame: s.scan_next_frame(fr, is_single_image=True)))
+    return calls
+
+
+STAGES = [
+    ("locate_deep", _stage_locate_deep),
+    ("locate_shallow", _stage_locate_shallow),
+    ("unipuck_locator", _stage_unipuck_locator),
+    ("datamatrix_read", _stage_datamatrix_read),
+    ("geometry_scanner", _stage_geometry_scanner),
+    ("open_scanner", _stage_open_scanner),
+]
+
+
+##########################################
+# Measurement
+##########################################
+def measure_latencies(build_stage, library, repeat):
+    """ Time each call of the stage. For the scanners, the time spent in each stage of the scan (as
+    recorded by the ScanResult) is also added up. """
+    latencies = []
+    scan_stage_times = {}
+    for _ in range(repeat):
+        calls = build_stage(library)
+        gc.collect()
+        for _, call in calls:
+            start = time.perf_counter()
+            result = call()
+            latencies.append(time.perf_counter() - start)
+
+            if isinstance(result, ScanResult):
+                for name, seconds in result.stage_times().items():
+                    scan_stage_times[name] = scan_stage_times.get(name, 0) + seconds
+    return latencies, scan_stage_times
+
+
+def measure_peak_memory(build_stage, library):
+    calls = build_stage(library)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for _, call in calls:
+            call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def summarize(latencies, scan_stage_times, peak_memory):
+    latencies_ms = np.array(latencies) * 1000
+    total = float(np.sum(latencies))
+    summary = {
+        "calls": len(latencies),
+        "total_s": total,
+        "per_second": len(latencies) / total if total > 0 else None,
+        "mean_ms": float(np.mean(latencies_ms)),
+        "min_ms": float(np.min(latencies_ms)),
+        "max_ms": float(np.max(latencies_ms)),
+        "peak_memory_mb": peak_memory / (1024 * 1024),
+    }
+    for p in PERCENTILES:
+        summary["p{}_ms".format(p)] = float(np.percentile(latencies_ms, p))
+    if scan_stage_times:
+        summary["scan_stages_mean_ms"] = {name: 1000 * t / len(latencies) for name, t in scan_stage_times.items()}
+    return summary
+
+
+def environment():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                         stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+##########################################
+# Output
+##########################################
+def print_table(stages):
+    header = "{:<18}{:>7}{:>10}{:>10}{:>10}{:>10}{:>10}{:>11}".format(
+        "stage", "calls", "p50 ms", "p90 ms", "p99 ms", "max ms", "per sec", "peak MB")
+    print(header)
+    print("-" * len(header))
+    for name, s in stages.items():
+        print("{:<18}{:>7}{:>10.1f}{:>10.1f}{:>10.1f}{:>10.1f}{:>10.2f}{:>11.1f}".format(
+            name, s["calls"], s["p50_ms"], s["p90_ms"], s["p99_ms"], s["max_ms"], s["per_second"] or 0,
+            s["peak_memory_mb"]))
+
+    for name, s in stages.items():
+        if "scan_stages_mean_ms" in s:
+            breakdown = ", ".join("{} {:.1f}".format(stage, t) for stage, t in s["scan_stages_mean_ms"].items())
+            print("{} mean ms per scan: {}".format(name, breakdown))
+
+
+def print_comparison(stages, baseline_file):
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+
+    print()
+    print("Compared with {} (commit {}):".format(baseline_file, baseline["environment"].get("commit")))
+    for name, s in stages.items():
+        old = baseline["stages"].get(name)
+        if old is None:
+            print("{:<18} (not in baseline)".format(name))
+            continue
+        print("{:<18} p50 {:>9.1f} -> {:>9.1f} ms ({:+6.1f}%)   per sec {:>8.2f} -> {:>8.2f}".format(
+            name, old["p50_ms"], s["p50_ms"], _percent_change(old["p50_ms"], s["p50_ms"]),
+            old["per_second"] or 0, s["per_second"] or 0))
+
+
+def _percent_change(old, new):
+    return 100 * (new - old) / old if old else 0
+
+
+def main():
+    stage_names = [name for name, _ in STAGES]
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stage", action="append", choices=stage_names,
+                        help="stage to run (may be repeated; default: all stages)")
+    parser.add_argument("--repeat", type=int, default=1, help="number of timed passes over the images")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory pass")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results file from a previous run to compare against")
+    args = parser.parse_args()
+
+    # The scanners log an error for every frame in which they fail to find a puck
+    logging.basicConfig(level=logging.CRITICAL)
+
+    library = _ImageLibrary()
+    selected = [(name, build) for name, build in STAGES if not args.stage or name in args.stage]
+
+    stages = {}
+    for name, build_stage in selected:
+        print("Running {}...".format(name), file=sys.stderr)
+        latencies, scan_stage_times = measure_latencies(build_stage, library, max(1, args.repeat))
+        peak_memory = 0 if args.no_memory else measure_peak_memory(build_stage, library)
+        stages[name] = summarize(latencies, scan_stage_times, peak_memory)
+
+    print_table(stages)
+
+    if args.compare:
+        print_comparison(stages, args.compare)
+
+    if args.output:
+        results = {"environment": environment(), "repeat": args.repeat, "stages": stages}
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -41,8 +41,13 @@ class StreamManager:
     def process_frame(self,frame):
         if frame is None:
             return ScanResult(0)
-            
-        return self._scanner.scan_next_frame(frame)
+
+        result = self._scanner.scan_next_frame(frame)
+        if self._log.isEnabledFor(logging.DEBUG):
+            # The summary is only built when it will be logged
+            self._log.debug("Frame {} scanned in {:.3f} secs ({})".format(
+                result.frame_number(), result.scan_time(), result.stage_times_summary()))
+        return result
             
     def get_frame(self):
         self.stream.read_frame()
@@ -50,4 +55,15 @@ class StreamManager:
             frame = self.stream.get_frame()
             return frame
         return None
+
+    def grab_frame(self):
+        """ Capture the next frame without decoding it; returns False if the capture failed. """
+        return self.stream.grab_frame()
+
+    def retrieve_frame(self):
+        """ Decode and return the frame captured by grab_frame(), or None if it couldn't be captured. """
+        self.stream.retrieve_frame()
+        if self.stream.is_read_ok():
+            return self.stream.get_frame()
+        return None
       
\ No newline at end of file
@@ -0,0 +1,111 @@
+import threading
+import time
+
+from dls_util.latest_queue import LatestQueue
+
+
+class SynchronizedCapture:
+    """ Captures frames from several camera streams at (nearly) the same moment.
+
+    Each stream has its own capture thread. On every cycle the threads wait for each other and then grab
+    a frame at the same time; each then decodes (retrieves) its own frame, so the decoding is done in
+    parallel rather than one camera after the other. The latest frame from each camera is kept, with its
+    capture time, in a single-slot buffer and next_frames() pairs up the frames by their timestamps.
+    """
+    # Frames whose capture times differ by more than this (in seconds) are not paired together
+    MAX_SKEW = 0.05
+
+    def __init__(self, streams):
+        self._streams = streams
+        self._buffers = [LatestQueue(1) for _ in streams]
+        self._barrier = threading.Barrier(len(streams))
+        self._available = threading.Condition()
+        self._threads = []
+        self._running = False
+        self._failed = set()
+
+    def start(self):
+        self._running = True
+        self._failed = set()
+        self._barrier.reset()
+        self._threads = [threading.Thread(target=self._capture, args=(i,), daemon=True)
+                         for i in range(len(self._streams))]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """ Stop capturing and wait for the capture threads to finish. """
+        self._running = False
+        self._barrier.abort()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def next_frames(self, timeout=None):
+        """ Wait for a set of frames, one from each camera, that were captured together; the frames are
+        returned in the same order as the streams. A frame is None if its camera failed to capture it.
+        Returns None if no set of frames was ready within the timeout (in seconds). """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._available:
+            while True:
+                if self._failed:
+                    return self._frames_after_failure()
+
+                if all(buffer.depth() > 0 for buffer in self._buffers):
+                    frames = self._pair_frames()
+                    if frames is not None:
+                        return frames
+
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._available.wait(remaining)
+
+    def _pair_frames(self):
+        """ Take the latest frame from each buffer. If they weren't captured together, the frames that are
+        too old are discarded and the others are put back to wait for newer frames from the other cameras.
+        Must be called with the condition held. """
+        items = [buffer.get() for buffer in self._buffers]
+        frames = [frame for _, frame in items]
+
+        newest = max(timestamp for timestamp, _ in items)
+        if all(newest - timestamp <= self.MAX_SKEW for timestamp, _ in items):
+            return frames
+
+        for buffer, (timestamp, frame) in zip(self._buffers, items):
+            if newest - timestamp <= self.MAX_SKEW:
+                buffer.put((timestamp, frame))
+        return None
+
+    def _frames_after_failure(self):
+        """ The latest frame (if any) from each camera that is still working and None for those that have
+        failed. Must be called with the condition held. """
+        frames = []
+        for i, buffer in enumerate(self._buffers):
+            item = buffer.get()
+            frames.append(item[1] if item is not None and i not in self._failed else None)
+        return frames
+
+    def _capture(self, index):
+        stream = self._streams[index]
+        while self._running:
+            try:
+                self._barrier.wait()
+            except threading.BrokenBarrierError:
+                break
+
+            frame = stream.retrieve_frame() if stream.grab_frame() else None
+            timestamp = frame.timestamp() if frame is not None else None
+            if timestamp is None:
+                timestamp = time.perf_counter()
+
+            with self._available:
+                self._buffers[index].put((timestamp, frame))
+                if frame is None:
+                    self._failed.add(index)
+                self._available.notify_all()
+
+            if frame is None:
+                # The camera has failed; let the other threads stop waiting for this one
+                self._barrier.abort()
+                break
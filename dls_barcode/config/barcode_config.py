@@ -1,5 +1,6 @@
 import sys
 
+from dls_barcode.data_store.image_writer import ImageWriter
 from dls_barcode.geometry import Geometry
 from dls_barcode.datamatrix import DataMatrix
 from dls_barcode.datamatrix.read import DatamatrixSizeTable
@@ -50,6 +51,13 @@ class BarcodeConfig(Config):
         self.image_crop = add(BoolConfigItem, "Crop to Puck", default=True)
 
         self.store_directory = add(DirectoryConfigItem, "Store Directory", default=default_store)
+        self.store_database = add(BoolConfigItem, "Store in Database", default=False)
+        self.image_format = add(EnumConfigItem, "Record Image Format", default=ImageWriter.PNG,
+                                extra_arg=ImageWriter.FORMATS)
+        self.image_png_compression = add(IntConfigItem, "PNG Compression",
+                                         default=ImageWriter.DEFAULT_PNG_COMPRESSION, extra_arg="(0-9)")
+        self.image_quality = add(IntConfigItem, "JPEG/WebP Quality", default=ImageWriter.DEFAULT_QUALITY,
+                                 extra_arg="(0-100)")
         self.backup = add(BoolConfigItem, "Backup before Delete", default=True)
         self.backup_directory = add(DirectoryConfigItem, "Backup Directory", default=default_backup)
 
@@ -62,6 +70,12 @@ class BarcodeConfig(Config):
     def get_store_directory(self):
         return self.store_directory.value()
 
+    def is_store_database(self):
+        return self.store_database.value()
+
+    def get_image_writer(self):
+        return ImageWriter(self.image_format.value(), self.image_png_compression.value(), self.image_quality.value())
+
     def get_backup_directory(self):
         return self.backup_directory.value()
 
@@ -56,6 +56,10 @@ class BarcodeConfigDialog(ConfigDialog):
 
         self.start_group("Store")
         self._add_control(StoreDirectoryConfigControl(cfg.store_directory))
+        add(cfg.store_database)
+        add(cfg.image_format)
+        add(cfg.image_png_compression)
+        add(cfg.image_quality)
         add(cfg.backup)
         add(cfg.backup_directory)
 
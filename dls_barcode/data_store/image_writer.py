@@ -0,0 +1,142 @@
+import logging
+import queue
+import threading
+
+import cv2
+
+
+class ImageWriter:
+    """ Saves the images of the scan records to file on a background thread, so that the program doesn't
+    have to wait while the images are encoded and written.
+
+    The images wait to be saved in a bounded queue. If the images can't be saved as quickly as they are
+    scanned, write() blocks until there is room in the queue; each time this happens it is logged and
+    counted (see waits()). Until an image has been saved it can be got with pending_image().
+    """
+    PNG = "PNG"
+    JPEG = "JPEG"
+    WEBP = "WebP"
+    FORMATS = [PNG, JPEG, WEBP]
+
+    _EXTENSIONS = {PNG: ".png", JPEG: ".jpg", WEBP: ".webp"}
+
+    # Number of images that may wait to be saved before write() blocks
+    QUEUE_SIZE = 8
+
+    # Default PNG compression level (0-9, the same as OpenCV's default) and JPEG/WebP quality (0-100)
+    DEFAULT_PNG_COMPRESSION = 1
+    DEFAULT_QUALITY = 95
+
+    # Images that are waiting to be saved, by file path. Shared by all writers, since a path refers
+    # to the same file whichever writer saves it
+    _pending = {}
+    # Paths of the images that are being saved at the moment
+    _saving = set()
+    _pending_lock = threading.Condition()
+
+    def __init__(self, image_format=PNG, png_compression=DEFAULT_PNG_COMPRESSION, quality=DEFAULT_QUALITY,
+                 queue_size=QUEUE_SIZE):
+        if image_format not in self.FORMATS:
+            raise ValueError("Unknown image format: {}".format(image_format))
+
+        self._log = logging.getLogger(".".join([__name__]))
+        self._format = image_format
+        self._params = self._encoding_params(image_format, png_compression, quality)
+        self._queue = queue.Queue(queue_size)
+        self._thread = None
+        self._waits = 0
+
+    def extension(self):
+        """ File extension (including the '.') for the images saved in this writer's format. """
+        return self._EXTENSIONS[self._format]
+
+    def write(self, image, path):
+        """ Queue a copy of the image to be saved to the file path. Blocks if the queue is full. """
+        with self._pending_lock:
+            self._pending[path] = image.copy()
+
+        self._start()
+        try:
+            self._queue.put_nowait(path)
+        except queue.Full:
+            self._waits += 1
+            self._log.warning("Image writer is falling behind: waiting to queue {}".format(path))
+            self._queue.put(path)
+
+    def discard(self, path):
+        """ Don't save the image for the file path if it is still waiting to be saved. If the image is
+        being saved, waits for it to finish, so the file can then be removed. """
+        with self._pending_lock:
+            self._pending.pop(path, None)
+            while path in self._saving:
+                self._pending_lock.wait()
+
+    def flush(self):
+        """ Wait until all of the queued images have been saved. """
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """ Save all of the queued images and stop the background thread. """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def pending(self):
+        """ Number of images waiting to be saved. """
+        return self._queue.qsize()
+
+    def waits(self):
+        """ Number of times that write() had to wait because the queue was full. """
+        return self._waits
+
+    @classmethod
+    def pending_image(cls, path):
+        """ A copy of the image that is waiting to be saved to the file path, or None if there isn't one. """
+        with cls._pending_lock:
+            image = cls._pending.get(path)
+        return image.copy() if image is not None else None
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._save_images, daemon=True)
+            self._thread.start()
+
+    def _save_images(self):
+        while True:
+            path = self._queue.get()
+            try:
+                if path is None:
+                    return
+                self._save(path)
+            finally:
+                self._queue.task_done()
+
+    def _save(self, path):
+        with self._pending_lock:
+            image = self._pending.get(path)
+            if image is None:
+                return
+            self._saving.add(path)
+
+        try:
+            image.save_as(path, self._params)
+        except Exception:
+            self._log.exception("Failed to save image {}".format(path))
+
+        with self._pending_lock:
+            self._saving.discard(path)
+            if self._pending.get(path) is image:
+                del self._pending[path]
+            self._pending_lock.notify_all()
+
+    @staticmethod
+    def _encoding_params(image_format, png_compression, quality):
+        if image_format == ImageWriter.PNG:
+            return [cv2.IMWRITE_PNG_COMPRESSION, min(max(int(png_compression), 0), 9)]
+
+        quality = min(max(int(quality), 0), 100)
+        if image_format == ImageWriter.JPEG:
+            return [cv2.IMWRITE_JPEG_QUALITY, quality]
+        return [cv2.IMWRITE_WEBP_QUALITY, max(quality, 1)]
@@ -1,10 +1,12 @@
 import datetime
+import os
 import time
 import uuid
 
 from dls_barcode.plate import NOT_FOUND_SLOT_SYMBOL, EMPTY_SLOT_SYMBOL
 from dls_barcode.geometry import Geometry
-from dls_util.image import Image, Color
+from dls_util.image import Image, Color, ImageCache
+from .image_writer import ImageWriter
 
 
 class Record:
@@ -24,6 +26,10 @@ class Record:
     NUM_RECORD_ITEMS = 7
 
 
+    # Decoded record images (and marked images), shared by all of the records. Limited to this many bytes
+    IMAGE_CACHE_SIZE = 200 * 1024 * 1024
+    IMAGE_CACHE = ImageCache(IMAGE_CACHE_SIZE)
+
     # Constants
     ITEM_SEPARATOR = ";"
     BC_SEPARATOR = ","
@@ -140,15 +146,39 @@ class Record:
         return [self.holder_barcode] + self.barcodes
 
     def get_image(self):
-        image = Image.from_file(self.image_path)
-        return image
+        """ The image of the scan. The image may be shared with the image cache, so copy it before
+        changing it. """
+        return self._load_image(self.image_path)
     
     def get_holder_image(self):
-        image = Image.from_file(self.holder_image_path)
+        """ The image of the holder. The image may be shared with the image cache, so copy it before
+        changing it. """
+        return self._load_image(self.holder_image_path)
+
+    @staticmethod
+    def _load_image(path):
+        # The image may still be waiting to be saved to file
+        image = ImageWriter.pending_image(path)
+        if image is not None:
+            return image
+
+        image = Record.IMAGE_CACHE.get(path)
+        if image is None:
+            image = Image.from_file(path)
+            if os.path.isfile(path):
+                Record.IMAGE_CACHE.put(path, image)
         return image
     
     def get_marked_image(self, options):
-        image = self.get_image()
+        """ The image of the scan with the puck and slots highlighted, as set in the options. The marked
+        image is cached for as long as the options stay the same, so mustn't be changed. """
+        key = ("marked", self.id, options.image_puck.value(), options.image_pins.value(),
+               options.image_crop.value(), str(options.col_ok()), str(options.col_bad()), str(options.col_empty()))
+        image = Record.IMAGE_CACHE.get(key)
+        if image is not None:
+            return image
+
+        image = self.get_image().copy()
         geo = self.geometry
 
         if options.image_puck.value():
@@ -160,6 +190,8 @@ class Record:
         if options.image_crop.value():
             geo.crop_image(image)
 
+        if self.image_path is not None and os.path.isfile(self.image_path):
+            Record.IMAGE_CACHE.put(key, image)
         return image
 
 
@@ -0,0 +1,196 @@
+import sqlite3
+import time
+import uuid
+
+from dls_barcode.data_store.backup import Backup
+from dls_barcode.data_store.store_writer import StoreWriter
+from dls_barcode.geometry import Geometry
+from .record import Record
+
+
+class SqliteStore:
+
+    """ Alternative to Store which keeps the records of previous barcode scans in an SQLite database
+    rather than in memory. Has the same interface as Store.
+
+    The records are indexed on their timestamp and holder barcode, and the pin barcodes are kept in a
+    separate table indexed on the barcode, so the records for a particular puck or pin can be found
+    without reading the whole store (see find_holder_barcode and find_pin_barcode).
+
+    When it is used, the database is the only copy of the store: the text store files are not written
+    (see StoreMigrator, which copies them into the database once).
+    """
+    # Maximum number of record ids in each 'IN' query (SQLite limits the number of parameters)
+    MAX_QUERY_IDS = 500
+    # Schema version (PRAGMA user_version) of a database that the store files have been copied into
+    MIGRATED_VERSION = 1
+
+    _RECORD_COLUMNS = "id, timestamp, image_path, holder_image_path, plate_type, holder_barcode, geometry"
+
+    def __init__(self, store_writer, database_path):
+        """ Initializes a new instance of SqliteStore, creating the database if it doesn't exist.
+        """
+        self._store_writer = store_writer
+        self._connection = sqlite3.connect(database_path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA foreign_keys=ON")
+        self._create_tables()
+        self._size = self._connection.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    @property
+    def records(self):
+        """ All of the records, the most recent first.
+        """
+        rows = self._connection.execute(
+            "SELECT " + self._RECORD_COLUMNS + " FROM records ORDER BY timestamp DESC").fetchall()
+        pins = {}
+        for record_id, barcode in self._connection.execute(
+                "SELECT record_id, barcode FROM pin_barcodes ORDER BY record_id, slot"):
+            pins.setdefault(record_id, []).append(barcode)
+
+        return [self._record_from_row(row, pins.get(row[0], [])) for row in rows]
+
+    def size(self):
+        """ Returns the number of records in the store
+        """
+        return self._size
+
+    def get_record(self, index) -> Record:
+        """ Get record by index where the 0th record is the most recent
+        """
+        if self._size == 0:
+            return None
+        if not 0 <= index < self._size:
+            raise IndexError("Record index out of range")
+
+        rows = self._connection.execute(
+            "SELECT " + self._RECORD_COLUMNS + " FROM records ORDER BY timestamp DESC LIMIT 1 OFFSET ?",
+            (index,)).fetchall()
+        return self._build_records(rows)[0]
+
+    def find_holder_barcode(self, holder_barcode):
+        """ All of the records for the holder (puck) barcode, the most recent first.
+        """
+        rows = self._connection.execute(
+            "SELECT " + self._RECORD_COLUMNS + " FROM records WHERE holder_barcode = ? ORDER BY timestamp DESC",
+            (holder_barcode,)).fetchall()
+        return self._build_records(rows)
+
+    def find_pin_barcode(self, pin_barcode):
+        """ All of the records which have the pin barcode in one of their slots, the most recent first.
+        """
+        rows = self._connection.execute(
+            "SELECT " + self._RECORD_COLUMNS + " FROM records WHERE id IN "
+            "(SELECT record_id FROM pin_barcodes WHERE barcode = ?) ORDER BY timestamp DESC",
+            (pin_barcode,)).fetchall()
+        return self._build_records(rows)
+
+    def _add_record(self, holder_barcode, plate, holder_img, pins_img):
+        """ Add a new record to the store and save to the database.
+        """
+        guid = str(uuid.uuid4())
+        self._store_writer.to_image(pins_img, holder_img, guid)
+        img_path = self._store_writer.get_img_path()
+        holder_image_path = self._store_writer.get_holder_img_path()
+        record = Record.from_plate(holder_barcode, plate, img_path, holder_image_path)
+
+        self.add_records([record])
+
+    def add_records(self, records):
+        """ Add the records to the database in a single transaction. Records which are already in the
+        database (with the same id) are left as they are. Returns the number of records added.
+        """
+        with self._connection:
+            cursor = self._connection.executemany(
+                "INSERT OR IGNORE INTO records (" + self._RECORD_COLUMNS + ") VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(rec.id, rec.timestamp, rec.image_path, rec.holder_image_path, rec.plate_type,
+                  rec.holder_barcode, rec.geometry.serialize()) for rec in records])
+            added = cursor.rowcount
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO pin_barcodes (record_id, slot, barcode) VALUES (?, ?, ?)",
+                [(rec.id, slot, barcode) for rec in records for slot, barcode in enumerate(rec.barcodes, 1)])
+        self._size += added
+        return added
+
+    def is_migrated(self):
+        """ True if the records in the store files have been copied into the database. """
+        return self._connection.execute("PRAGMA user_version").fetchone()[0] >= self.MIGRATED_VERSION
+
+    def set_migrated(self):
+        with self._connection:
+            self._connection.execute("PRAGMA user_version = {}".format(self.MIGRATED_VERSION))
+
+    def merge_record(self, holder_barcode, plate, holder_img, pins_img):
+        """ Create new record or replace existing record if it has the same holder barcode as the most
+        recent record. Save to the database. """
+        if self.is_latest_holder_barcode(holder_barcode):
+            self.delete_records([self.get_record(0)])
+
+        self._add_record(holder_barcode, plate, holder_img, pins_img)
+
+    def backup_records(self, directory):
+        ts = time.localtime()
+        file_name = time.strftime("%Y-%m-%d_%H-%M-%S", ts)
+        backup_writer = StoreWriter(directory, file_name)
+        backup = Backup(backup_writer)
+        backup.backup_records(self.records)
+
+    def delete_records(self, records_to_delete):
+        """ Remove all of the records in the supplied list from the store and
+        from the database.
+        """
+        with self._connection:
+            cursor = self._connection.executemany(
+                "DELETE FROM records WHERE id = ?", [(record.id,) for record in records_to_delete])
+        self._size -= cursor.rowcount
+
+        for record in records_to_delete:
+            self._store_writer.remove_img_file(record)
+
+    def is_latest_holder_barcode(self, holder_barcode):
+        row = self._connection.execute(
+            "SELECT holder_barcode FROM records ORDER BY timestamp DESC LIMIT 1").fetchone()
+        return row is not None and holder_barcode == row[0]
+
+    def close(self):
+        """ Close the database and wait for the images to be saved; called when the program exits.
+        """
+        self._connection.close()
+        self._store_writer.close()
+
+    def _create_tables(self):
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS records (id TEXT PRIMARY KEY, timestamp REAL NOT NULL, "
+                "image_path TEXT, holder_image_path TEXT, plate_type TEXT, holder_barcode TEXT, geometry TEXT)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS pin_barcodes ("
+                "record_id TEXT NOT NULL REFERENCES records(id) ON DELETE CASCADE, "
+                "slot INTEGER NOT NULL, barcode TEXT NOT NULL, PRIMARY KEY (record_id, slot))")
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS records_timestamp ON records (timestamp)")
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS records_holder_barcode ON records (holder_barcode, timestamp)")
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS pin_barcodes_barcode ON pin_barcodes (barcode)")
+
+    def _build_records(self, rows):
+        """ Make records from rows of the records table, reading their pin barcodes from the database.
+        """
+        pins = {}
+        ids = [row[0] for row in rows]
+        for start in range(0, len(ids), self.MAX_QUERY_IDS):
+            chunk = ids[start:start + self.MAX_QUERY_IDS]
+            query = "SELECT record_id, barcode FROM pin_barcodes WHERE record_id IN ({}) ORDER BY record_id, slot"
+            for record_id, barcode in self._connection.execute(query.format(", ".join("?" * len(chunk))), chunk):
+                pins.setdefault(record_id, []).append(barcode)
+
+        return [self._record_from_row(row, pins.get(row[0], [])) for row in rows]
+
+    @staticmethod
+    def _record_from_row(row, pin_barcodes):
+        record_id, timestamp, image_path, holder_image_path, plate_type, holder_barcode, geometry = row
+        geo_class = Geometry.get_class(plate_type)
+        return Record(plate_type=plate_type, holder_barcode=holder_barcode, barcodes=pin_barcodes,
+                      image_path=image_path, holder_image_path=holder_image_path,
+                      geometry=geo_class.deserialize(geometry), timestamp=timestamp, id=record_id)
@@ -1,5 +1,8 @@
+import logging
+import threading
 import uuid
 import time
+from collections import deque
 
 from dls_barcode.data_store.backup import Backup
 from dls_barcode.data_store.store_writer import StoreWriter
@@ -10,13 +13,24 @@ class Store:
 
     """ Maintains a list of records of previous barcodes scans. Any changes (additions
     or deletions) are automatically written to the backing file.
+
+    Each change is appended to a journal, so adding a record takes the same time however many
+    records there are. The full store file is only rewritten when the store is compacted, which
+    is done on a background thread after every COMPACTION_INTERVAL changes. The csv file is
+    rewritten after each change, also on a background thread.
     """
+    # Number of changes written to the journal before the store is compacted
+    COMPACTION_INTERVAL = 100
 
     def __init__(self, store_writer, records):
         """ Initializes a new instance of Store.
         """
+        self._log = logging.getLogger(".".join([__name__]))
         self._store_writer = store_writer
-        self.records = records
+        # Kept in descending date order (most recent first); new records are added at the front
+        self.records = deque(sorted(records, reverse=True, key=lambda record: record.timestamp))
+        self._journal_changes = 0
+        self._compaction_thread = None
 
     def size(self):
         """ Returns the number of records in the store
@@ -26,7 +40,6 @@ class Store:
     def get_record(self, index) -> Record:
         """ Get record by index where the 0th record is the most recent
         """
-        self._sort_records()
         return self.records[index] if self.records else None
 
     def _add_record(self, holder_barcode, plate, holder_img, pins_img):
@@ -38,7 +51,9 @@ class Store:
         holder_image_path = self._store_writer.get_holder_img_path()
         record = Record.from_plate(holder_barcode, plate, img_path, holder_image_path)
 
-        self.records.append(record)
+        self.records.appendleft(record)
+        self._store_writer.add_to_journal(record)
+        self._store_writer.update_csv_file(list(self.records))
         self._process_change()
 
     def merge_record(self, holder_barcode, plate, holder_img, pins_img):
@@ -54,32 +69,75 @@ class Store:
         file_name = time.strftime("%Y-%m-%d_%H-%M-%S", ts)
         backup_writer = StoreWriter(directory, file_name)
         backup = Backup(backup_writer)
-        self._sort_records()
-        backup.backup_records(self.records)
+        backup.backup_records(list(self.records))
 
     def delete_records(self, records_to_delete):
         """ Remove all of the records in the supplied list from the store and
         save changes to the backing file.
         """
+        if len(records_to_delete) == 1:
+            # Usually the latest record, which is replaced by a new scan of the same holder
+            self.records.remove(records_to_delete[0])
+        else:
+            ids = {record.id for record in records_to_delete}
+            self.records = deque(record for record in self.records if record.id not in ids)
+
         for record in records_to_delete:
-            self.records.remove(record)
             self._store_writer.remove_img_file(record)
 
+        self._store_writer.delete_from_journal(records_to_delete)
+        self._store_writer.update_csv_file(list(self.records))
         self._process_change()
 
-    def _process_change(self):
-        """ Sort the records and save to file.
+    def compact(self, wait=False):
+        """ Write the whole store to the backing file (on a background thread unless wait is True), so
+        that the changes no longer need to be replayed from the journal when the store is next loaded.
         """
-        self._sort_records()
-        self._store_writer.to_file(self.records)
-        self._store_writer.to_csv_file(self.records)
+        self.wait_for_compaction()
+        self._store_writer.start_new_journal()
+        self._journal_changes = 0
+
+        records = list(self.records)
+        self._compaction_thread = threading.Thread(target=self._write_snapshot, args=(records,), daemon=True)
+        self._compaction_thread.start()
+        if wait:
+            self.wait_for_compaction()
+
+    def wait_for_compaction(self):
+        """ Block until any compaction in progress has finished.
+        """
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+            self._compaction_thread = None
 
-    def _sort_records(self):
-        """ Sort the records in descending date order (most recent first).
+    def close(self):
+        """ Compact the store if there are any changes in the journal and wait for the images to be
+        saved; called when the program exits.
         """
-        self.records.sort(reverse=True, key=lambda record: record.timestamp)
+        if self._journal_changes > 0:
+            self.compact(wait=True)
+        else:
+            self.wait_for_compaction()
+        self._store_writer.close()
+
+    def _process_change(self):
+        """ Compact the store if enough changes have been journaled and a compaction isn't
+        already running.
+        """
+        self._journal_changes += 1
+        if self._journal_changes >= self.COMPACTION_INTERVAL and not self._is_compacting():
+            self.compact()
+
+    def _is_compacting(self):
+        return self._compaction_thread is not None and self._compaction_thread.is_alive()
+
+    def _write_snapshot(self, records):
+        try:
+            self._store_writer.snapshot(records)
+        except Exception:
+            # The journal that was set aside is kept, so no changes are lost
+            self._log.exception("Failed to compact the record store")
 
     def is_latest_holder_barcode(self, holder_barcode):
-        self._sort_records()
         latest_record = self.get_record(0)
         return latest_record is not None and holder_barcode == latest_record.holder_barcode
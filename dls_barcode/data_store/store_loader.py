@@ -2,10 +2,14 @@ import logging
 import os
 
 from dls_barcode.data_store.record import Record
+from dls_barcode.data_store.store_writer import StoreWriter
 from dls_util.file import FileManager
 
 
 class StoreLoader:
+    """ Loads the records from the store file and then replays the changes recorded in the journals
+    (see StoreWriter) on top of them.
+    """
 
     def __init__(self, directory, file_name, file_manager=FileManager()):
         self._log = logging.getLogger(".".join([__name__]))
@@ -18,9 +22,16 @@ class StoreLoader:
     def load_records_from_file(self):
         """ Clear the current record store and load a new set of records from the specified file. """
         self._build_file_path()
-        if not self._check_if_file():
-            return self._records
-        self._build_records_from_lines(self._read_lines())
+        if self._check_if_file():
+            self._build_records_from_lines(self._read_lines())
+
+        # The journal set aside for a compaction that didn't finish is replayed before the current one.
+        # Replaying a journal whose changes are already in the store file doesn't change the records
+        journal = os.path.join(self._directory, self._file_name + '.journal')
+        for path in [journal + '.old', journal]:
+            if self._file_manager.is_file(path):
+                self._replay_journal(self._file_manager.read_lines(path))
+
         return self._records
 
     def _build_file_path(self):
@@ -39,3 +50,19 @@ class StoreLoader:
                 self._records.append(record)
             except Exception:
                 self._log.debug("Failed to parse store Record: {}".format(line))
+
+    def _replay_journal(self, lines):
+        records = {record.id: record for record in self._records}
+        for line in lines:
+            try:
+                if line.startswith(StoreWriter.JOURNAL_ADD):
+                    record = Record.from_string(line[len(StoreWriter.JOURNAL_ADD):])
+                    records[record.id] = record
+                elif line.startswith(StoreWriter.JOURNAL_DELETE):
+                    records.pop(line[len(StoreWriter.JOURNAL_DELETE):].strip(), None)
+                else:
+                    self._log.debug("Unknown store journal entry: {}".format(line))
+            except Exception:
+                self._log.debug("Failed to parse store journal entry: {}".format(line))
+
+        self._records = list(records.values())
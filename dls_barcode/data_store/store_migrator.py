@@ -0,0 +1,54 @@
+import logging
+
+from dls_barcode.data_store.sqlite_store import SqliteStore
+from dls_barcode.data_store.store_loader import StoreLoader
+from dls_barcode.data_store.store_writer import StoreWriter
+from dls_util.file import FileManager
+
+
+class StoreMigrator:
+    """ Copies the records from the text store files (see StoreLoader) into an SQLite database (see
+    SqliteStore). This is only done once: the database is marked as migrated, and from then on it is the
+    store and the text files are left as they are.
+    """
+
+    def __init__(self, directory, file_name, file_manager=FileManager()):
+        self._log = logging.getLogger(".".join([__name__]))
+        self._directory = directory
+        self._file_name = file_name
+        self._file_manager = file_manager
+
+    def migrate(self, database_path):
+        """ Copy the records from the text store files into the database, unless that has already been
+        done. A new database is built under a temporary name and then renamed, so a failed migration doesn't
+        leave a partial database. Returns the number of records copied. """
+        if self._file_manager.is_file(database_path):
+            store = self._open(database_path)
+            try:
+                return 0 if store.is_migrated() else self._copy_records(store, database_path)
+            finally:
+                store.close()
+
+        self._file_manager.make_dir_when_no_dir(self._directory)
+        temp_path = database_path + '.tmp'
+        if self._file_manager.is_file(temp_path):
+            self._file_manager.remove(temp_path)
+
+        store = self._open(temp_path)
+        try:
+            count = self._copy_records(store, database_path)
+        finally:
+            store.close()
+
+        self._file_manager.replace(temp_path, database_path)
+        return count
+
+    def _open(self, database_path):
+        return SqliteStore(StoreWriter(self._directory, self._file_name, self._file_manager), database_path)
+
+    def _copy_records(self, store, database_path):
+        records = StoreLoader(self._directory, self._file_name, self._file_manager).load_records_from_file()
+        count = store.add_records(records)
+        store.set_migrated()
+        self._log.info("Migrated {} records to {}".format(count, database_path))
+        return count
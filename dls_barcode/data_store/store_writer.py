@@ -1,19 +1,38 @@
+import logging
 import os
+import threading
 
 from dls_barcode.data_store.record import Record
+from dls_barcode.data_store.thumbnails import Thumbnails
 from dls_util.file import FileManager
 
 
 class StoreWriter:
     """ Maintains writing records to file and saving png images in a sub-folder
+
+    Changes to the store are appended to a journal file as they are made. Every so often the store is
+    compacted: the journal is set aside, the full list of records is written to the store file and then
+    the set aside journal is removed.
+
+    The csv file is rewritten (most recent first) on a background thread after each change, so the store
+    doesn't wait for it.
     """
+    # Prefixes of the journal entries for a record added to the store and for a deleted record
+    JOURNAL_ADD = "+"
+    JOURNAL_DELETE = "-"
 
-    def __init__(self, directory, file_name, file_manager=FileManager()):
+    def __init__(self, directory, file_name, file_manager=FileManager(), image_writer=None):
+        self._log = logging.getLogger(".".join([__name__]))
         self._file_manager = file_manager
+        # If there is an image writer the images are saved in the background, else they are saved at once
+        self._image_writer = image_writer
         self._directory = directory
         self._file_name = file_name
         self._image_path = None
         self._holder_image_path = None
+        self._csv_lock = threading.Lock()
+        self._csv_thread = None
+        self._pending_csv_records = None
 
     def to_file(self, records):
         """ Save the contents of the store to the backing file
@@ -31,12 +50,110 @@ class StoreWriter:
         record_lines = [rec.to_csv_string() + "\n" for rec in records]
         self._file_manager.write_lines(csv_file, record_lines)
 
+    def update_csv_file(self, records):
+        """ Rewrite the csv file with the records (most recent first) on a background thread. If the file
+        is changed again before the thread gets to it, only the latest list of records is written.
+        """
+        with self._csv_lock:
+            self._pending_csv_records = records
+            if self._csv_thread is None:
+                self._csv_thread = threading.Thread(target=self._write_pending_csv_files, daemon=True)
+                self._csv_thread.start()
+
+    def wait_for_csv_file(self):
+        """ Block until the csv file has been rewritten with the latest records.
+        """
+        with self._csv_lock:
+            thread = self._csv_thread
+        if thread is not None:
+            thread.join()
+
+    def _write_pending_csv_files(self):
+        while True:
+            with self._csv_lock:
+                records = self._pending_csv_records
+                self._pending_csv_records = None
+                if records is None:
+                    self._csv_thread = None
+                    return
+
+            try:
+                self._file_manager.make_dir_when_no_dir(self._directory)
+                record_lines = [rec.to_csv_string() + "\n" for rec in records]
+                self._file_manager.write_lines_atomically(self._csv_path(), record_lines)
+            except Exception:
+                self._log.exception("Failed to write the record store csv file")
+
+    def add_to_journal(self, record):
+        """ Append an entry for a new record to the journal
+        """
+        self._append_to_journal([self.JOURNAL_ADD + record.to_string() + "\n"])
+
+    def delete_from_journal(self, records):
+        """ Append entries for deleted records to the journal
+        """
+        self._append_to_journal([self.JOURNAL_DELETE + str(rec.id) + "\n" for rec in records])
+
+    def start_new_journal(self):
+        """ Set aside the current journal before the store is compacted; later changes go to a new journal.
+        If the last compaction failed, the set aside journal is still there, so the current journal is
+        added to the end of it.
+        """
+        journal = self.journal_path()
+        if not self._file_manager.is_file(journal):
+            return
+
+        old_journal = self.old_journal_path()
+        if self._file_manager.is_file(old_journal):
+            self._file_manager.append_lines(old_journal, self._file_manager.read_lines(journal))
+            self._file_manager.remove(journal)
+        else:
+            self._file_manager.replace(journal, old_journal)
+
+    def snapshot(self, records):
+        """ Replace the store file with the contents of the store and remove the set aside journal,
+        whose changes are now in the store file. The file is replaced in one step, so a failure part way
+        through leaves either the old or the new file. The csv file is already up to date.
+        """
+        self._file_manager.make_dir_when_no_dir(self._directory)
+        file = os.path.join(self._directory, self._file_name + '.txt')
+        self._file_manager.write_lines_atomically(file, [rec.to_string() + "\n" for rec in records])
+
+        old_journal = self.old_journal_path()
+        if self._file_manager.is_file(old_journal):
+            self._file_manager.remove(old_journal)
+
+    def journal_path(self):
+        return os.path.join(self._directory, self._file_name + '.journal')
+
+    def old_journal_path(self):
+        return self.journal_path() + '.old'
+
+    def _csv_path(self):
+        return os.path.join(self._directory, self._file_name + ".csv")
+
+    def _append_to_journal(self, lines):
+        self._file_manager.make_dir_when_no_dir(self._directory)
+        self._file_manager.append_lines(self.journal_path(), lines)
+
     def to_image(self, pin_image, holder_image, name):
         dr = self._make_img_dir()
-        self._image_path = os.path.abspath(os.path.join(dr, name + '.png'))
-        self._holder_image_path = os.path.abspath(os.path.join(dr, name + '_holder.png'))
-        pin_image.save_as(self._image_path)
-        holder_image.save_as(self._holder_image_path)
+        extension = self._image_writer.extension() if self._image_writer is not None else '.png'
+        self._image_path = os.path.abspath(os.path.join(dr, name + extension))
+        self._holder_image_path = os.path.abspath(os.path.join(dr, name + '_holder' + extension))
+        if self._image_writer is not None:
+            self._image_writer.write(pin_image, self._image_path)
+            self._image_writer.write(holder_image, self._holder_image_path)
+        else:
+            pin_image.save_as(self._image_path)
+            holder_image.save_as(self._holder_image_path)
+
+    def close(self):
+        """ Wait for the csv file and the images that are still being saved; called when the program exits.
+        """
+        self.wait_for_csv_file()
+        if self._image_writer is not None:
+            self._image_writer.close()
 
     def get_img_path(self):
         return self._image_path
@@ -51,7 +168,10 @@ class StoreWriter:
         return img_dir
 
     def remove_img_file(self, record):
-        if self._file_manager.is_file(record.image_path):
-            self._file_manager.remove(record.image_path)
-        if self._file_manager.is_file(record.holder_image_path):
-            self._file_manager.remove(record.holder_image_path)
\ No newline at end of file
+        if self._image_writer is not None:
+            self._image_writer.discard(record.image_path)
+            self._image_writer.discard(record.holder_image_path)
+        for path in [record.image_path, record.holder_image_path]:
+            for file in [path, Thumbnails.thumbnail_path(path)]:
+                if self._file_manager.is_file(file):
+                    self._file_manager.remove(file)
\ No newline at end of file
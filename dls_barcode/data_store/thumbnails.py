@@ -0,0 +1,108 @@
+import logging
+import os
+import queue
+import threading
+
+import cv2
+
+from dls_barcode.data_store.image_writer import ImageWriter
+from dls_util.image import Image
+
+
+class Thumbnails:
+    """ Small copies of the record images, which can be loaded and displayed much more quickly than the
+    full size images when browsing through the records.
+
+    A thumbnail is made on a background thread the first time that it is asked for and saved in the
+    thumbnail directory next to the image directory, so each one only has to be made once. The decoded
+    thumbnails are kept in the (shared) image cache.
+    """
+    # Length (in pixels) of the longest side of a thumbnail
+    THUMBNAIL_SIZE = 640
+
+    DIRECTORY = "thumb_dir"
+
+    def __init__(self, image_cache):
+        self._log = logging.getLogger(".".join([__name__]))
+        self._cache = image_cache
+        self._queue = queue.Queue()
+        self._scheduled = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @staticmethod
+    def thumbnail_path(image_path):
+        """ The path of the thumbnail for the image (in the thumbnail directory next to the image's). """
+        image_dir, name = os.path.split(image_path)
+        return os.path.join(os.path.dirname(image_dir), Thumbnails.DIRECTORY, name)
+
+    def get(self, image_path):
+        """ The thumbnail of the image, or None if it hasn't been made yet; in that case it is made in
+        the background. The thumbnail is shared with the cache, so mustn't be changed. """
+        if image_path is None:
+            return None
+
+        path = self.thumbnail_path(image_path)
+        thumbnail = self._cache.get(path)
+        if thumbnail is None and os.path.isfile(path):
+            thumbnail = Image.from_file(path)
+            self._cache.put(path, thumbnail)
+        elif thumbnail is None:
+            self._schedule(image_path)
+        return thumbnail
+
+    def wait(self):
+        """ Wait until the scheduled thumbnails have been made. """
+        if self._thread is not None:
+            self._queue.join()
+
+    def stop(self):
+        """ Stop the background thread once the scheduled thumbnails have been made. """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _schedule(self, image_path):
+        with self._lock:
+            if image_path in self._scheduled:
+                return
+            self._scheduled.add(image_path)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._make_thumbnails, daemon=True)
+                self._thread.start()
+        self._queue.put(image_path)
+
+    def _make_thumbnails(self):
+        while True:
+            image_path = self._queue.get()
+            try:
+                if image_path is None:
+                    return
+                self._make_thumbnail(image_path)
+            except Exception:
+                self._log.exception("Failed to make thumbnail of {}".format(image_path))
+            finally:
+                if image_path is not None:
+                    with self._lock:
+                        self._scheduled.discard(image_path)
+                self._queue.task_done()
+
+    def _make_thumbnail(self, image_path):
+        # The image may still be waiting to be saved
+        image = ImageWriter.pending_image(image_path)
+        if image is None:
+            if not os.path.isfile(image_path):
+                return
+            image = Image.from_file(image_path)
+
+        factor = self.THUMBNAIL_SIZE / max(image.width, image.height)
+        if factor < 1:
+            size = (max(int(image.width * factor), 1), max(int(image.height * factor), 1))
+            image = Image(cv2.resize(image.img, size, interpolation=cv2.INTER_AREA))
+
+        path = self.thumbnail_path(image_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        image.save_as(path)
+        self._cache.put(path, image)
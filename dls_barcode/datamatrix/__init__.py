@@ -1,2 +1,2 @@
 from .datamatrix import DataMatrix
-from .locate import Locator
+from .locate import Locator, FinderPatternTracker
@@ -1,11 +1,14 @@
 import logging
 import string
+from concurrent.futures import ThreadPoolExecutor
 from string import ascii_lowercase
 
 from pylibdmtx.pylibdmtx import decode
 
 from dls_util.image.image import Image
+from dls_util.shape import Point
 
+from .decode_cache import DecodeCache
 from .locate import Locator
 
 # We predict the location of the center of each square (pixel/bit) in the datamatrix based on the
@@ -28,9 +31,14 @@ class DataMatrix:
     """
     DEFAULT_SIZE = 14
     DEFAULT_SIDE_SIZES = [12, 14]
+    # Number of threads used to decode several datamatrices at once
+    READ_WORKERS = 4
     # allow only capitol letters, digits and dash in the decoded string
     ALLOWED_CHARS = set(string.ascii_uppercase + string.ascii_lowercase + string.digits + '-' + '_')
 
+    # Decode results shared between all DataMatrix objects
+    _decode_cache = DecodeCache()
+
     def __init__(self, finder_pattern):
         """ Initialize the DataMatrix object with its finder pattern location in an image. To actually
         interpret the DataMatrix, the perform_read() function must be called, which will attempt to read
@@ -64,6 +72,21 @@ class DataMatrix:
             self._read(sub.img)
             self._is_read_performed = True
 
+    @staticmethod
+    def read_many(barcodes, image, workers=READ_WORKERS, force_read=False):
+        """ Perform the read operation on each of the supplied DataMatrices that hasn't already been read.
+        libdmtx releases the GIL while it decodes, so the reads are run concurrently on a pool of threads.
+        The result of each read is stored on the DataMatrix itself, as with perform_read().
+        """
+        to_read = [bc for bc in barcodes if force_read or not bc.is_read()]
+
+        if workers > 1 and len(to_read) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda bc: bc.perform_read(image, force_read), to_read))
+        else:
+            for bc in to_read:
+                bc.perform_read(image, force_read)
+
     def is_read(self):
         """ True if the read operation has been performed (whether successful or not) """
         return self._is_read_performed
@@ -109,30 +132,46 @@ class DataMatrix:
         
     def _read(self, gray_image):
         """ From the supplied grayscale image, attempt to read the barcode at the location
-        given by the datamatrix finder pattern.
+        given by the datamatrix finder pattern. If the same image has been decoded recently,
+        the cached result is used instead.
         """
         try:
-            result = decode(gray_image, max_count = 1)
-            if len(result) > 0:
-                d = result[0].data
-                decoded = d.decode('UTF-8')
-                if self._contains_allowed_chars_only(decoded):
-                    new_line_removed = decoded.replace("\n","")
-                    self._data = new_line_removed
-                    self._read_ok = True
-                    self._error_message = ""
-                else:
-                    self._read_ok = False
+            key = DecodeCache.make_key(gray_image, self._matrix_sizes)
+            found, data = DataMatrix._decode_cache.lookup(key)
+            if not found:
+                data = self._decode(gray_image)
+                DataMatrix._decode_cache.store(key, data)
+
+            if data is not None:
+                self._data = data
+                self._read_ok = True
+                self._error_message = ""
             else:
                 self._read_ok = False
-                #cv2.imshow("Erode", gray_image)
-                #cv2.waitKey(0) 
         except(Exception) as ex:
             self._read_ok = False
             self._error_message = str(ex)
 
         self._damaged_symbol = not self._read_ok
-        
+
+    def _decode(self, gray_image):
+        """ Decode the barcode with libdmtx. Returns the data string, or None if it couldn't be
+        decoded or contains characters that aren't allowed.
+        """
+        result = decode(gray_image, max_count = 1)
+        if len(result) > 0:
+            d = result[0].data
+            decoded = d.decode('UTF-8')
+            if self._contains_allowed_chars_only(decoded):
+                return decoded.replace("\n","")
+
+        return None
+
+    @staticmethod
+    def decode_cache():
+        """ The cache of decode results, which keeps count of its hits and misses. """
+        return DataMatrix._decode_cache
+
     def draw(self, img, color):
         """ Draw the lines of the finder pattern on the specified image. """
         fp = self._finder_pattern
@@ -143,22 +182,48 @@ class DataMatrix:
         return (set(text)).issubset(self.ALLOWED_CHARS)
 
     @staticmethod
-    def locate_all_barcodes_in_image(grayscale_img, matrix_sizes=[DEFAULT_SIZE]):
+    def locate_all_barcodes_in_image(grayscale_img, matrix_sizes=[DEFAULT_SIZE], workers=1):
         """ Searches the image for all datamatrix finder patterns
         """
         locator = Locator()
+        locator.set_workers(workers)
         finder_patterns = locator.locate_shallow(grayscale_img)
         unread_barcodes = DataMatrix._fps_to_barcodes(finder_patterns, matrix_sizes)
         return unread_barcodes
 
     @staticmethod
-    def locate_all_barcodes_in_image_deep(grayscale_img, matrix_sizes=[DEFAULT_SIDE_SIZES]):
-        """ Searches the image for all datamatrix finder patterns
+    def locate_all_barcodes_in_image_deep(grayscale_img, matrix_sizes=[DEFAULT_SIDE_SIZES], workers=1, tracker=None,
+                                          region=None, scale=1.0):
+        """ Searches the image for all datamatrix finder patterns. If a FinderPatternTracker is supplied, the
+        patterns from the previous frame are followed into this one where possible, and the whole image is
+        only searched when they can't be. If a region (Circle) is supplied, only the square part of the image
+        around it is searched. If the scale is less than 1, the search is done coarse-to-fine, starting
+        with the image reduced by that factor (see Locator.locate_pyramid).
         """
-        # TODO: deep scan is more likely to find some false finder patterns. Filter these out
-        locator = Locator()
-        locator.set_median_radius_tolerance(0.2)
-        finder_patterns = locator.locate_deep(grayscale_img, expected_radius=None, filter_overlap=True)
+        finder_patterns = tracker.track(grayscale_img) if tracker is not None else None
+        is_tracked = finder_patterns is not None
+
+        if not is_tracked:
+            # TODO: deep scan is more likely to find some false finder patterns. Filter these out
+            locator = Locator()
+            locator.set_median_radius_tolerance(0.2)
+            locator.set_workers(workers)
+            if region is None:
+                window, offset = grayscale_img, Point(0, 0)
+            else:
+                # The sub image is a view on the frame; the patterns are moved back into frame coordinates
+                window, roi = grayscale_img.sub_image(region.center(), region.radius())
+                offset = Point(roi[0], roi[1])
+
+            if scale < 1:
+                finder_patterns = locator.locate_pyramid(window, scale)
+            else:
+                finder_patterns = locator.locate_deep(window, expected_radius=None, filter_overlap=True)
+            finder_patterns = [fp.offset(offset) for fp in finder_patterns]
+
+        if tracker is not None:
+            tracker.update(grayscale_img, finder_patterns, tracked=is_tracked)
+
         unread_barcodes = DataMatrix._fps_to_barcodes(finder_patterns, matrix_sizes)
         return unread_barcodes
 
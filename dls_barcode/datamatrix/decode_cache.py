@@ -0,0 +1,106 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from dls_util.object_with_lifetime import ObjectWithLifetime
+
+
+class _CachedDecode(ObjectWithLifetime):
+    """ The result of decoding one datamatrix image; data is None if the decode failed. """
+    def __init__(self, data, lifetime):
+        ObjectWithLifetime.__init__(self, lifetime)
+        self.data = data
+
+
+class DecodeCache:
+    """ Least-recently-used cache of datamatrix decode results, keyed on the content of the image
+    that was decoded. When the camera is looking at a stationary puck, the same barcodes are decoded
+    from (almost) the same pixels over and over again; this allows the result to be reused instead of
+    calling libdmtx again.
+
+    The key is made from the image downsampled to a small fixed grid and quantized to a few gray levels,
+    so that small amounts of sensor noise between frames still produce the same key. Entries are discarded
+    when they are older than the lifetime (in seconds) or when the cache is full and they are the least
+    recently used.
+
+    Failed decodes are cached too, but with a much shorter lifetime: a barcode that is out of focus or
+    partly covered while the puck is being placed should be tried again as soon as the image settles.
+
+    The cache may be used from several threads at once.
+    """
+    DEFAULT_MAX_SIZE = 256
+    DEFAULT_LIFETIME = 30
+    # Lifetime (in seconds) of a failed decode
+    DEFAULT_FAILURE_LIFETIME = 1
+
+    GRID_SIZE = 32
+    QUANTIZE_SHIFT = 5
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, lifetime=DEFAULT_LIFETIME,
+                 failure_lifetime=DEFAULT_FAILURE_LIFETIME):
+        self._max_size = max_size
+        self._lifetime = lifetime
+        self._failure_lifetime = failure_lifetime
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_key(gray_image, matrix_sizes):
+        """ Generate the cache key for a raw (OpenCV) grayscale image and a set of datamatrix sizes. """
+        height, width = gray_image.shape[:2]
+        if height == 0 or width == 0:
+            signature = b""
+        else:
+            grid = (DecodeCache.GRID_SIZE, DecodeCache.GRID_SIZE)
+            small = cv2.resize(np.ascontiguousarray(gray_image), grid, interpolation=cv2.INTER_AREA)
+            signature = (small >> DecodeCache.QUANTIZE_SHIFT).tobytes()
+
+        digest = hashlib.blake2b(signature, digest_size=16).digest()
+        return digest, height, width, tuple(matrix_sizes)
+
+    def lookup(self, key):
+        """ Returns a (found, data) pair. If found is True, data is the cached result of the decode
+        (None for a failed decode). """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.has_expired():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self._misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return True, entry.data
+
+    def store(self, key, data):
+        """ Add the result of a decode to the cache, evicting the least recently used entry if full. """
+        lifetime = self._lifetime if data is not None else self._failure_lifetime
+        with self._lock:
+            self._entries[key] = _CachedDecode(data, lifetime)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """ Remove all entries and reset the hit/miss counters. """
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def size(self):
+        return len(self._entries)
+
+    def hits(self):
+        return self._hits
+
+    def misses(self):
+        return self._misses
@@ -32,6 +32,15 @@ class FinderPattern:
     def bounds(self):
         return Circle(self.center, self.radius)
 
+    def offset(self, point):
+        """ Returns a new finder pattern which is the same as this one but offset (moved by the specified amount). """
+        return FinderPattern(self.corner + point, self.baseVector, self.sideVector)
+
+    def scale(self, factor):
+        """ Returns a new finder pattern which is this one scaled about the image origin, e.g. to move a pattern
+        found in a resized copy of an image back into the coordinates of the original. """
+        return FinderPattern(self.corner * factor, self.baseVector * factor, self.sideVector * factor)
+
     def draw_to_image(self, image, color=None):
         if color is None:
             color = Color.Green()
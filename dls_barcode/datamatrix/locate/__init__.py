@@ -1 +1,2 @@
 from .locate import Locator
+from .track import FinderPatternTracker
@@ -1,20 +1,31 @@
 from __future__ import division
 
 import math
+from concurrent.futures import ThreadPoolExecutor
 
+import cv2
 import numpy as np
 
+from dls_util.image import Image
+from dls_util.shape import Point
 from .locate_contour import ContourLocator
+from .threshold_cache import ThresholdCache
 
 
 class Locator:
     """ Provides access to several different algorithms for locating (not reading) datamatrix
     finder patterns in an image.
     """
+    # Size of the search window around a finder pattern in locate_near(), relative to the pattern radius
+    NEAR_WINDOW_FACTOR = 2.0
+    # Default scale of the reduced image searched first by locate_pyramid()
+    PYRAMID_SCALE = 0.5
+
     def __init__(self):
         self._median_radius_tolerance = 0.3
         self._median_radius = 0
         self._image = None
+        self._workers = 1
 
     def set_median_radius_tolerance(self, value):
         """ The contour methods filter their results by eliminating any supposed finder patterns that differ
@@ -22,13 +33,19 @@ class Locator:
         defines how much the size of a pattern must differ by before it is discarded. """
         self._median_radius_tolerance = value
 
+    def set_workers(self, value):
+        """ The number of threads used to run the contour algorithm with its different parameter sets. Most
+        of the work is done in OpenCV, which releases the GIL, so the parameter sets can run concurrently.
+        The results are merged in a fixed order so they are the same as when run on a single thread. """
+        self._workers = max(1, int(value))
+
     def locate_shallow(self, img):
         """ Use contour locating algorithm to locate finder patterns in the image. Uses a single set of
         parameters to the contour algorithm. This is quick to run and most suitable for scanning an image
         that contains multiple datamatrices. To run the algorithm multiple times with varying parameters,
         use locate_deep(). """
         # Locate finder patterns in whole image
-        finder_patterns = self._contours_shallow(img)
+        finder_patterns = self._contours_shallow(img, self._workers)
 
         # Filter out any which differ significantly in size
         if len(finder_patterns) > 3:
@@ -57,7 +74,7 @@ class Locator:
         self._median_radius = expected_radius
         self._image = img
 
-        finder_patterns = self._contours_deep(img)
+        finder_patterns = self._contours_deep(img, self._workers)
 
         if expected_radius is None and any(finder_patterns):
             expected_radius = np.median([fp.radius for fp in finder_patterns])
@@ -77,34 +94,108 @@ class Locator:
 
         return finder_patterns
 
+    def locate_near(self, img, finder_pattern, expected_radius=None):
+        """ Locate the finder pattern in the image that is closest to the supplied (approximate) one, by
+        searching a small window around it. Returns None if there is no pattern within the supplied
+        pattern's radius. The quick shallow search is tried first and the deep one only if that fails. """
+        window, roi = img.sub_image(finder_pattern.center, self.NEAR_WINDOW_FACTOR * finder_pattern.radius)
+        if window.width == 0 or window.height == 0:
+            return None
+
+        offset = Point(roi[0], roi[1])
+        candidates = Locator().locate_shallow(window)
+        best = self._closest_pattern(candidates, offset, finder_pattern)
+        if best is None:
+            locator = Locator()
+            locator.set_median_radius_tolerance(self._median_radius_tolerance)
+            candidates = locator.locate_deep(window, expected_radius, filter_overlap=True)
+            best = self._closest_pattern(candidates, offset, finder_pattern)
+
+        return best
+
+    def locate_pyramid(self, img, scale=PYRAMID_SCALE, expected_radius=None):
+        """ Coarse-to-fine version of locate_deep() for large images. The deep search is run on a copy of the
+        image reduced by the scale factor, which is much quicker, then each of the finder patterns found is
+        refined at full resolution by searching the small area around it (see locate_near()). Patterns that
+        can't be found again at full resolution are discarded, as are any that overlap.
+
+        The datamatrices must still be large enough to be located in the reduced image: a scale of 0.5 is
+        suitable for frames from the top camera, smaller scales only for larger images.
+        """
+        small_img = cv2.resize(img.img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        small_radius = expected_radius * scale if expected_radius is not None else None
+
+        coarse = self.locate_deep(Image(small_img), small_radius, filter_overlap=True)
+        if expected_radius is None and any(coarse):
+            expected_radius = np.median([fp.radius for fp in coarse]) / scale
+
+        finder_patterns = []
+        for fp in coarse:
+            refined = self.locate_near(img, fp.scale(1 / scale), expected_radius)
+            if refined is not None:
+                finder_patterns.append(refined)
+
+        return self._filter_overlapping_patterns(finder_patterns)
+
+    @staticmethod
+    def _closest_pattern(candidates, offset, target):
+        """ Moves the candidates found in a window back into image coordinates and returns the one closest to
+        the target pattern, or None if there isn't one within the target pattern's radius. """
+        best, best_distance = None, target.radius
+        for fp in candidates:
+            fp = fp.offset(offset)
+            distance = fp.center.distance_to(target.center)
+            if distance < best_distance:
+                best, best_distance = fp, distance
+
+        return best
+
     @staticmethod
-    def _contours_shallow(img):
+    def _contours_shallow(img, workers=1):
         """ Run the contour locating algorithm with a single parameter set. """
         c_values = [16, 8]
         morph_size = 3
         block_size = 35
 
         # Use a couple of different values of C as much more likely to locate the finder patterns
-        finder_patterns = []
-        for C in c_values:
-            fps = ContourLocator().locate_datamatrices(img, block_size, C, morph_size)
-            finder_patterns.extend(fps)
-
-        return finder_patterns
+        parameter_sets = [(C, morph_size) for C in c_values]
+        return Locator._run_contour_locator(img, block_size, parameter_sets, workers)
 
     @staticmethod
-    def _contours_deep(img):
+    def _contours_deep(img, workers=1):
         """ Run the contour locating algorithm multiple times with different parameter sets. """
         c_values = [16, 8, 0, 4, 20]
         morph_sizes = [3, 2]
         block_size = 35
 
         # Use a couple of different values of C as much more likely to locate the finder patterns
+        parameter_sets = [(C, ms) for ms in morph_sizes for C in c_values]
+        return Locator._run_contour_locator(img, block_size, parameter_sets, workers)
+
+    @staticmethod
+    def _run_contour_locator(img, block_size, parameter_sets, workers):
+        """ Run the contour locating algorithm once for each (C, morph size) parameter set and combine the
+        results in the order of the parameter sets. The thresholded images are shared between parameter
+        sets through the cache. """
+        cache = ThresholdCache(img)
+
+        def locate(parameters):
+            C, morph_size = parameters
+            return ContourLocator().locate_datamatrices(img, block_size, C, morph_size, cache)
+
+        if workers > 1:
+            # Fill the cache with the thresholded images first so the workers only ever read them
+            for C, _ in parameter_sets:
+                cache.threshold_image(block_size, C)
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(locate, parameter_sets))
+        else:
+            results = map(locate, parameter_sets)
+
         finder_patterns = []
-        for ms in morph_sizes:
-            for C in c_values:
-                fps = ContourLocator().locate_datamatrices(img, block_size, C, ms)
-                finder_patterns.extend(fps)
+        for fps in results:
+            finder_patterns.extend(fps)
 
         return finder_patterns
 
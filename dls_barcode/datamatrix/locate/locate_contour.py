@@ -8,6 +8,7 @@ import numpy as np
 from dls_barcode.datamatrix.finder_pattern import FinderPattern
 from dls_util.shape import Point
 from dls_util.image import Image
+from .threshold_cache import ThresholdCache
 
 OPENCV_MAJOR = cv2.__version__[0]
 
@@ -19,33 +20,114 @@ class ContourLocator:
     def __init__(self):
         pass
 
-    def locate_datamatrices(self, gray_image, blocksize, C, close_size):
+    def locate_datamatrices(self, gray_image, blocksize, C, close_size, cache=None):
         """Get the positions of (hopefully all) datamatrices within an image.
+
+        When the locator is run several times on the same image, pass the same ThresholdCache
+        each time so the preprocessing shared between parameter sets is only done once.
         """
-        # Perform adaptive threshold, reducing to a binary image
-        threshold_image = self._do_threshold(gray_image, blocksize, C)
-        
-        # Perform a morphological close, removing noise and closing some gaps
-        morphed_image = self._do_close_morph(threshold_image, close_size)
+        if cache is None:
+            cache = ThresholdCache(gray_image)
+
+        # Perform adaptive threshold, reducing to a binary image, followed by a morphological
+        # close, removing noise and closing some gaps
+        morphed_image = cache.closed_image(blocksize, C, close_size)
 
         # Find a bunch of contours in the image.
         contours = self._get_contours(morphed_image)
         polygons = self._contours_to_polygons(contours)
 
-        # Convert lists of vertices to lists of edges (easier to work with).
-        edge_sets = map(self._polygons_to_edges, polygons)
+        # Discard all polygons which probably aren't datamatrix perimeters and convert the rest
+        # to FinderPattern objects.
+        fps = self._polygons_to_finder_patterns(polygons)
 
-        # Discard all edge sets which probably aren't datamatrix perimeters.
-        edge_sets = filter(self._filter_non_trivial, edge_sets)
-        edge_sets = filter(self._filter_longest_adjacent, edge_sets)
-        edge_sets = filter(self._filter_longest_approx_orthogonal, edge_sets)
-        edge_sets = filter(self._filter_longest_similar_in_length, edge_sets)
+        return fps
+
+    @staticmethod
+    def _polygons_to_finder_patterns(polygons):
+        """ Filter the polygons and convert those that look like datamatrix perimeters to finder patterns.
+
+        This applies the same tests as the edge set filters below (_filter_non_trivial, etc.) and produces
+        the same finder patterns as _get_finder_pattern, but works on the edges of all of the polygons at
+        once as numpy arrays rather than on one edge at a time in Python. The edge set functions remain as
+        the reference implementation (see _reference_polygons_to_finder_patterns).
+        """
+        self = ContourLocator
 
-        # Convert edge sets to FinderPattern objects
-        fps = [self._get_finder_pattern(es) for es in edge_sets]
+        # Discard polygons with too few edges
+        polygons = [p for p in polygons if len(p) > 6]
+        if not polygons:
+            return []
+
+        # Stack the vertices of all polygons; the edge k runs from vertex k to vertex next_vertex[k]
+        counts = np.array([len(p) for p in polygons])
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        vertices = np.concatenate(polygons).astype(np.int64)
+        next_vertex = np.arange(len(vertices)) + 1
+        next_vertex[ends - 1] = starts
+
+        vectors = vertices - vertices[next_vertex]
+        lengths = np.sqrt((vectors[:, 0] ** 2 + vectors[:, 1] ** 2).astype(np.float64))
+
+        # Longest two edges (global indices) of each polygon
+        i, j = self._longest_pair_indices_batch(lengths, counts, starts, ends)
+
+        # Filter - longest adjacent
+        separation = np.abs(i - j)
+        adjacent = (separation == 1) | (separation == counts - 1)
+
+        # Filter - longest approximately orthogonal
+        l_i, l_j = lengths[i], lengths[j]
+        dot = np.sum(vectors[i] * vectors[j], axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            orthogonal = np.abs(dot / (l_i * l_j)) < 0.1
+
+            # Filter - longest similar in length
+            similar = np.abs(l_i - l_j) / np.abs(l_i + l_j) < 0.1
+
+        keep = adjacent & orthogonal & similar
+        i, j = i[keep], j[keep]
+        if not len(i):
+            return []
+
+        # Find the corner shared by the two longest edges and the other end of each edge
+        a0, a1 = vertices[i], vertices[next_vertex[i]]
+        b0, b1 = vertices[j], vertices[next_vertex[j]]
+        corner_is_a0 = _rows_equal(a0, b0) | _rows_equal(a0, b1)
+        corners = np.where(corner_is_a0[:, None], a0, a1)
+        c = np.where(_rows_equal(a0, corners)[:, None], a1, a0)
+        d = np.where(_rows_equal(b0, corners)[:, None], b1, b0)
+        vec_c, vec_d = c - corners, d - corners
+
+        # FIXME: There seems to be a sign error here... (see _get_finder_pattern)
+        c_is_base = (vec_c[:, 0] * vec_d[:, 1] - vec_c[:, 1] * vec_d[:, 0]) < 0
+        bases = np.where(c_is_base[:, None], vec_c, vec_d)
+        sides = np.where(c_is_base[:, None], vec_d, vec_c)
+
+        fps = []
+        for corner, base, side in zip(corners.tolist(), bases.tolist(), sides.tolist()):
+            fps.append(FinderPattern(Point(*corner), Point(*base), Point(*side)))
 
         return fps
 
+    @staticmethod
+    def _longest_pair_indices_batch(lengths, counts, starts, ends):
+        """ Return the indices of the longest and second longest edge of each polygon. The result is the
+        same as calling _longest_pair_indices on each polygon in turn. """
+        # Sort edges by polygon, then length; the last three in each polygon's block are the longest
+        polygon_ids = np.repeat(np.arange(len(counts)), counts)
+        order = np.lexsort((lengths, polygon_ids))
+        first, second, third = order[ends - 1], order[ends - 2], order[ends - 3]
+
+        # Where edges tie, the order chosen by argsort depends on its algorithm, so use it directly
+        ties = (lengths[first] == lengths[second]) | (lengths[second] == lengths[third])
+        for p in np.flatnonzero(ties):
+            polygon_lengths = np.array(lengths[starts[p]:ends[p]])
+            first[p], second[p] = starts[p] + polygon_lengths.argsort()[-2:][::-1]
+
+        return first, second
+
     @staticmethod
     def _do_threshold(gray_image, block_size, c):
         """ Perform an adaptive threshold operation on the image. """
@@ -82,6 +164,18 @@ class ContourLocator:
         shapes = [cv2.approxPolyDP(rc, epsilon, True).reshape(-1, 2) for rc in contours]
         return shapes
 
+    @staticmethod
+    def _reference_polygons_to_finder_patterns(polygons):
+        """ The reference implementation of _polygons_to_finder_patterns, which applies the edge set
+        filters below to one polygon at a time. Used to check and benchmark the batched version. """
+        self = ContourLocator
+        edge_sets = map(self._polygons_to_edges, polygons)
+        edge_sets = filter(self._filter_non_trivial, edge_sets)
+        edge_sets = filter(self._filter_longest_adjacent, edge_sets)
+        edge_sets = filter(self._filter_longest_approx_orthogonal, edge_sets)
+        edge_sets = filter(self._filter_longest_similar_in_length, edge_sets)
+        return [self._get_finder_pattern(es) for es in edge_sets]
+
     @staticmethod
     def _polygons_to_edges(vertex_list):
         """Return a list of edges based on the given list of vertices. """
@@ -201,6 +295,10 @@ class ContourLocator:
                 return vertex_a
 
 
+def _rows_equal(a, b):
+    return np.all(a == b, axis=1)
+
+
 def _length(edge):
     return _distance(*edge)
 
@@ -0,0 +1,49 @@
+import cv2
+
+from dls_util.image import Image
+
+
+class ThresholdCache:
+    """ Holds the intermediate images produced while preparing a single grayscale frame for the
+    contour locator, so that several runs of the locator with different parameters don't repeat
+    the same work.
+
+    An adaptive (mean) threshold compares each pixel against the mean of its neighbourhood. That mean
+    only depends on the block size, so it is calculated once per block size and each value of C is
+    then derived from it with a single comparison. The result is identical to cv2.adaptiveThreshold.
+    Closed (morphed) images are also kept, keyed by the full set of parameters used to create them.
+    """
+    def __init__(self, gray_image):
+        self._image = gray_image
+        self._differences = {}
+        self._thresholds = {}
+        self._closed = {}
+
+    def threshold_image(self, block_size, c):
+        """ The binary image produced by an adaptive threshold of the frame. """
+        key = (block_size, c)
+        if key not in self._thresholds:
+            difference = self._difference_from_mean(block_size)
+            thresh = cv2.compare(difference, -c, cv2.CMP_GT)
+            self._thresholds[key] = Image(thresh)
+        return self._thresholds[key]
+
+    def closed_image(self, block_size, c, morph_size):
+        """ The thresholded image after a morphological close, which removes noise and closes some gaps. """
+        key = (block_size, c, morph_size)
+        if key not in self._closed:
+            threshold_image = self.threshold_image(block_size, c)
+            element = cv2.getStructuringElement(cv2.MORPH_RECT, (morph_size, morph_size))
+            closed = cv2.morphologyEx(threshold_image.img, cv2.MORPH_CLOSE, element, iterations=1)
+            self._closed[key] = Image(closed)
+        return self._closed[key]
+
+    def _difference_from_mean(self, block_size):
+        """ Signed difference between each pixel and the (rounded) mean of the block around it. This uses
+        the same box filter and border handling as cv2.adaptiveThreshold. """
+        if block_size not in self._differences:
+            raw = self._image.img
+            mean = cv2.boxFilter(raw, -1, (block_size, block_size), normalize=True,
+                                 borderType=cv2.BORDER_REPLICATE | cv2.BORDER_ISOLATED)
+            self._differences[block_size] = cv2.subtract(raw, mean, dtype=cv2.CV_16S)
+        return self._differences[block_size]
@@ -0,0 +1,83 @@
+from __future__ import division
+
+import cv2
+import numpy as np
+
+from .locate import Locator
+
+
+class FinderPatternTracker:
+    """ Follows the finder patterns found in one frame into the next, so that a full deep locate
+    doesn't need to be run on every frame of a camera stream that is looking at a stationary puck.
+
+    Each frame is compared with the previous one. If it has not changed significantly, each of the
+    previous finder patterns is searched for again in a small window around its old position. If any
+    of them can't be found again, if the frame has changed, or if enough frames have passed since the
+    last full locate, track() returns None and the caller should locate the finder patterns in the
+    whole image (then pass them to update()).
+    """
+    # Frames are compared after being shrunk by this factor, which also smooths out sensor noise
+    MOTION_SCALE = 0.25
+    # Mean absolute difference (in gray levels) between frames above which the puck is assumed to have moved
+    MOTION_THRESHOLD = 3.0
+    # A full locate is forced after this many tracked frames so that new patterns are picked up
+    FULL_LOCATE_INTERVAL = 10
+
+    def __init__(self):
+        self._previous_image = None
+        self._finder_patterns = []
+        self._expected_radius = None
+        self._tracked_frames = 0
+
+    def reset(self):
+        """ Forget the previous frame, forcing a full locate for the next one. """
+        self._previous_image = None
+        self._finder_patterns = []
+        self._expected_radius = None
+        self._tracked_frames = 0
+
+    def track(self, gray_image):
+        """ Returns the finder patterns in the grayscale image by searching around the positions of the
+        patterns in the previous frame, or None if a full locate is needed. """
+        if not self._finder_patterns or self._tracked_frames >= self.FULL_LOCATE_INTERVAL:
+            return None
+
+        if self._has_moved(gray_image):
+            return None
+
+        finder_patterns = []
+        for previous in self._finder_patterns:
+            fp = self._find_near(gray_image, previous)
+            if fp is None:
+                return None
+            finder_patterns.append(fp)
+
+        return finder_patterns
+
+    def update(self, gray_image, finder_patterns, tracked=False):
+        """ Store the frame and the finder patterns found in it, ready to track them into the next frame. """
+        self._previous_image = self._small_image(gray_image)
+        self._finder_patterns = list(finder_patterns)
+        if any(self._finder_patterns):
+            self._expected_radius = np.median([fp.radius for fp in self._finder_patterns])
+        self._tracked_frames = self._tracked_frames + 1 if tracked else 0
+
+    def _has_moved(self, gray_image):
+        """ True if the image differs significantly from the previous one. """
+        small = self._small_image(gray_image)
+        if self._previous_image is None or small.shape != self._previous_image.shape:
+            return True
+
+        difference = cv2.absdiff(small, self._previous_image)
+        return np.mean(difference) > self.MOTION_THRESHOLD
+
+    def _small_image(self, gray_image):
+        return cv2.resize(gray_image.img, None, fx=self.MOTION_SCALE, fy=self.MOTION_SCALE,
+                          interpolation=cv2.INTER_AREA)
+
+    def _find_near(self, gray_image, previous):
+        """ Locate the finder pattern closest to the previous one in a window around its position. Returns
+        None if there isn't one within the previous pattern's radius. """
+        locator = Locator()
+        locator.set_median_radius_tolerance(0.2)
+        return locator.locate_near(gray_image, previous, self._expected_radius)
@@ -1,5 +1,6 @@
 from PyQt5.QtCore import  QObject, pyqtSignal
 
+from dls_barcode.camera.synchronized_capture import SynchronizedCapture
 from dls_util.cv.frame import Frame
 
 class FrameGrabber(QObject):
@@ -9,31 +10,59 @@ class FrameGrabber(QObject):
     images_collected = pyqtSignal(Frame, Frame)
     camera_error = pyqtSignal()
 
+    # How often (in seconds) the synchronized capture loop checks whether it has been stopped
+    STOP_CHECK_INTERVAL = 0.1
 
-    def __init__(self, side_camera_stream, top_camera_stream):
+    def __init__(self, side_camera_stream, top_camera_stream, synchronized=False):
         super().__init__()
         self._side_camera_stream = side_camera_stream
         self._top_camera_stream = top_camera_stream
+        # In synchronized mode the two cameras are captured together on their own threads (see
+        # SynchronizedCapture); otherwise a frame is read from one camera and then the other
+        self._synchronized = synchronized
         # run flag is used to stop the main scan loop in a clean way
         self._run_flag = True
 
 
     def run(self): 
-        while self._run_flag: 
-            side_frame = self._side_camera_stream.get_frame()
-            top_frame = self._top_camera_stream.get_frame()
-            if side_frame is None:
-                self.camera_error.emit()
-                break 
-            self.new_side_frame.emit(side_frame)
-            if top_frame is None:
-                self.camera_error.emit()
-                break
-            self.new_top_frame.emit(top_frame)
-            self.images_collected.emit(side_frame, top_frame)
+        if self._synchronized:
+            self._run_synchronized()
+        else:
+            while self._run_flag: 
+                side_frame = self._side_camera_stream.get_frame()
+                top_frame = self._top_camera_stream.get_frame()
+                if not self._emit_frames(side_frame, top_frame):
+                    break
 
         self.finished.emit()
 
+    def _run_synchronized(self):
+        capture = SynchronizedCapture([self._side_camera_stream, self._top_camera_stream])
+        capture.start()
+        try:
+            while self._run_flag:
+                frames = capture.next_frames(timeout=self.STOP_CHECK_INTERVAL)
+                if frames is None:
+                    continue
+                side_frame, top_frame = frames
+                if not self._emit_frames(side_frame, top_frame):
+                    break
+        finally:
+            capture.stop()
+
+    def _emit_frames(self, side_frame, top_frame):
+        """ Emit the signals for a pair of frames. Returns False if either camera failed. """
+        if side_frame is None:
+            self.camera_error.emit()
+            return False
+        self.new_side_frame.emit(side_frame)
+        if top_frame is None:
+            self.camera_error.emit()
+            return False
+        self.new_top_frame.emit(top_frame)
+        self.images_collected.emit(side_frame, top_frame)
+        return True
+
     def stop(self):
         self._run_flag = False
 
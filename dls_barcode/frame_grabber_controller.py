@@ -22,7 +22,8 @@ class FrameGrabberController(QObject):
     def start_grabber_thread(self, displayHolderFrame, displayPuckFrame, displayCameraErrorMessage):
         self.grabber_thread = QThread()
         self._manager.initialise_scanner()
-        self.grabber_worker = FrameGrabber(self._manager.side_camera_stream, self._manager.top_camera_stream)
+        self.grabber_worker = FrameGrabber(self._manager.side_camera_stream, self._manager.top_camera_stream,
+                                           synchronized=True)
         self.grabber_worker.moveToThread(self.grabber_thread)
         self.grabber_thread.started.connect(self.grabber_worker.run)
         self.grabber_worker.new_side_frame.connect(displayHolderFrame)
@@ -39,6 +40,8 @@ class FrameGrabberController(QObject):
             self.grabber_worker.stop()     
         self.grabber_thread.quit()
         self.grabber_thread.wait()
+        # Finish with any frames being processed before the cameras are released
+        self._processor_controller.stop()
         self._manager.cleanup()
 
     @pyqtSlot(Frame, Frame)
@@ -1,51 +1,109 @@
 import logging
-from PyQt5.QtCore import QObject, pyqtSignal
+import threading
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
 from dls_barcode.camera.scanner_message import ScanErrorMessage
 from dls_barcode.scan.scan_result import ScanResult
+from dls_util.latest_queue import LatestQueue
+
+
+class _QueuedProcessor(QObject):
+    """ Long-lived worker which processes the frames from one camera on the thread that it has been moved
+    to. Frames are passed in with submit() through a bounded queue; if frames arrive faster than they can
+    be processed, the older waiting frames are dropped so that the newest frame is always processed next.
+
+    Each frame is processed by calling process(stream, frame), where process is the function passed
+    in by the subclass. The finished signal is emitted, with the frame, after each frame has been processed.
+    """
+    finished = pyqtSignal(object)
+    _frame_submitted = pyqtSignal()
+
+    # Number of frames that may wait to be processed
+    QUEUE_SIZE = 1
+
+    def __init__(self, stream_source, process):
+        super().__init__()
+        # Function which returns the camera stream to process the frames with; the streams are replaced
+        # each time that the cameras are started
+        self._stream_source = stream_source
+        self._process = process
+        self._queue = LatestQueue(self.QUEUE_SIZE)
+        self._busy = threading.Event()
+        self._processed = 0
+        # Queued connection once the worker has been moved to its thread
+        self._frame_submitted.connect(self._process_next)
+
+    def submit(self, frame):
+        """ Queue the frame to be processed on the worker's thread (may be called from any thread). """
+        self._queue.put(frame)
+        self._frame_submitted.emit()
+
+    def is_busy(self):
+        """ True if a frame is being processed or is waiting to be. """
+        return self._busy.is_set() or self._queue.depth() > 0
+
+    def clear(self):
+        """ Drop any frame that is waiting to be processed. """
+        self._queue.clear()
+
+    def queue_depth(self):
+        return self._queue.depth()
+
+    def dropped_frames(self):
+        return self._queue.dropped()
 
+    def processed_frames(self):
+        return self._processed
 
-class SideProcessor(QObject):
-    finished = pyqtSignal()
+    @pyqtSlot()
+    def _process_next(self):
+        # A frame that replaced another in the queue is picked up by the first of their signals
+        frame = self._queue.get()
+        if frame is None:
+            return
+
+        self._busy.set()
+        try:
+            self._process(self._stream_source(), frame)
+            self._processed += 1
+        finally:
+            self._busy.clear()
+        self.finished.emit(frame)
+
+
+class SideProcessor(_QueuedProcessor):
+    """ Processes the side (holder) frames. Each frame is submitted as a (side frame, top frame) pair
+    of frames captured together, so that the top frame can be passed on with the finished signal.
+    """
     side_result_signal = pyqtSignal(ScanResult)
     side_scan_error_signal = pyqtSignal(ScanErrorMessage)
-    
-    def __init__(self, side_camera_stream, side_frame) -> None:
-        super().__init__()
+
+    def __init__(self, side_stream_source) -> None:
+        super().__init__(side_stream_source, self._process_side)
         self._log = logging.getLogger(".".join([__name__]))
-        self._side_camera_stream = side_camera_stream
-        self._side_frame = side_frame 
 
-    def run(self):
-        side_result = self._side_camera_stream.process_frame(self._side_frame)
+    def _process_side(self, side_camera_stream, frames):
+        side_frame, _ = frames
+        side_result = side_camera_stream.process_frame(side_frame)
         if side_result.error() is not None:
             # self._log.debug(side_result.error().content())
             self.side_scan_error_signal.emit(side_result.error())
         if side_result.has_valid_barcodes():
             # self._log.debug("side has valid barcodes")
             self.side_result_signal.emit(side_result)
-            
-        self.finished.emit()
-    
-    
-class TopProcessor(QObject):
-    finished = pyqtSignal()
+
+
+class TopProcessor(_QueuedProcessor):
     top_result_signal = pyqtSignal(ScanResult)
     full_and_valid_signal = pyqtSignal()
-    
-    def __init__(self, top_camera_stream, top_frame) -> None:
-        super().__init__()
-        self._top_camera_stream = top_camera_stream
-        self._top_frame = top_frame
 
-    def run(self):
-        top_result = self._top_camera_stream.process_frame(self._top_frame)    
+    def __init__(self, top_stream_source) -> None:
+        super().__init__(top_stream_source, self._process_top)
+
+    def _process_top(self, top_camera_stream, top_frame):
+        top_result = top_camera_stream.process_frame(top_frame)
 
         if top_result.success():
             self.top_result_signal.emit(top_result)
             if top_result.is_full_valid():
                 self.full_and_valid_signal.emit()
-                
-        self.finished.emit()
-
-
-
@@ -1,13 +1,21 @@
+import logging
+
 from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSlot
 from dls_barcode.frame_processor import SideProcessor, TopProcessor
 from dls_barcode.scan.scan_result import ScanResult
 
 
 class FrameProcessorController(QObject):
+    """ Passes the frames from the cameras to a long-lived worker for each camera, each on its own thread.
+    The side (holder) frame of each pair is processed first; if it shows a new holder, the top (puck)
+    frame is processed next. Frames that arrive while a worker is busy wait in its queue, where a newer
+    frame replaces any older frame that is still waiting.
+    """
     
     def __init__(self, manager, config, displayPuckScanCompleteMessage, displayScanTimeoutMessage, is_latest_holder_barcode, 
                  startCountdown, addRecordFrame, clear_frame, scanCompleted):
         super().__init__()
+        self._log = logging.getLogger(".".join([__name__]))
         self.side_processor_thread = QThread() 
         self.top_processor_thread = QThread()
         self.config = config
@@ -18,6 +26,7 @@ class FrameProcessorController(QObject):
         self.timer.timeout.connect(self._on_time_out)
         self._side_result = None
         self._top_result = None
+        self._skipped_frames = 0
         self.processing_flag = False
         # UI funstions
         self.displayPuckScanCompleteMessage = displayPuckScanCompleteMessage
@@ -28,37 +37,68 @@ class FrameProcessorController(QObject):
         self.clear_frame = clear_frame 
         self.scanCompleted = scanCompleted
 
-        
+        # The workers and their connections last for the life of the controller
+        self.side_processor = SideProcessor(lambda: self._manager.side_camera_stream)
+        self.side_processor.moveToThread(self.side_processor_thread)
+        #self.side_processor.side_scan_error_signal.connect(self.clear_frame_display_message)
+        self.side_processor.side_result_signal.connect(self._set_new_side_result)
+        self.side_processor.finished.connect(self._on_side_processed)
+
+        self.top_processor = TopProcessor(lambda: self._manager.top_camera_stream)
+        self.top_processor.moveToThread(self.top_processor_thread)
+        self.top_processor.full_and_valid_signal.connect(self._set_full_and_valid_scan)
+        self.top_processor.top_result_signal.connect(self._set_new_top_result)
+
     #@pyqtSlot(Frame, Frame)
-    def start_processor(self, side_frame, top_frame):    
-        if not self.top_processor_thread.isRunning():
-                self.processor_worker = SideProcessor(self._manager.side_camera_stream, side_frame)
-                self.processor_worker.moveToThread(self.side_processor_thread)
-                self.side_processor_thread.started.connect(self.processor_worker.run)
-                self.processor_worker.finished.connect(self.side_processor_thread.quit)
-                self.processor_worker.finished.connect(self.processor_worker.deleteLater) 
-                self.processor_worker.finished.connect(self.side_processor_thread.wait)
-                self.side_processor_thread.start()
-                #self.processor_worker.side_scan_error_signal.connect(self.clear_frame_display_message)
-                self.processor_worker.side_result_signal.connect(self._set_new_side_result)
-                self.processor_worker.finished.connect(lambda: self.process_side(top_frame))
-                
-              
+    def start_processor(self, side_frame, top_frame):
+        # While the puck is being scanned the holder frames are skipped, leaving the time to the puck scan
+        if self.top_processor.is_busy():
+            self._skipped_frames += 1
+            return
+
+        self._start_thread(self.side_processor_thread)
+        # The top frame stays with the side frame it was captured with
+        self.side_processor.submit((side_frame, top_frame))
+
     def process_side(self, top_frame):
         if self.processing_flag:
             if not self.timer.isActive():
                 self.timer.start(self.config.get_top_camera_tiemout()*1000) # convert duration to miliseconds
                 self.startCountdown(self.config.get_top_camera_tiemout()) #UI
                 self.clear_frame() #UI  
-            self.top_processor_worker = TopProcessor(self._manager.top_camera_stream, top_frame)
-            self.top_processor_worker.moveToThread(self.top_processor_thread)
-            self.top_processor_thread.started.connect(self.top_processor_worker.run)
-            self.top_processor_worker.finished.connect(self.top_processor_thread.quit)
-            self.top_processor_worker.finished.connect(self.top_processor_thread.wait)
-            self.top_processor_worker.finished.connect(self.top_processor_worker.deleteLater) 
-            self.top_processor_thread.start()
-            self.top_processor_worker.full_and_valid_signal.connect(self._set_full_and_valid_scan)
-            self.top_processor_worker.top_result_signal.connect(self._set_new_top_result)
+            self._start_thread(self.top_processor_thread)
+            self.top_processor.submit(top_frame)
+
+    def stop(self):
+        """ Drop any waiting frames and stop the worker threads (waiting for any frames being processed). """
+        self._log.debug("Frame counters: {}".format(self.frame_counters()))
+        for processor, thread in [(self.side_processor, self.side_processor_thread),
+                                  (self.top_processor, self.top_processor_thread)]:
+            processor.clear()
+            thread.quit()
+            thread.wait()
+
+    def frame_counters(self):
+        """ The number of frames processed, dropped (replaced in a queue by a newer frame) and waiting in
+        the queue for each camera. Holder frames which arrive while the puck is being scanned are skipped
+        without being queued, and are counted as dropped. """
+        side, top = self.side_processor, self.top_processor
+        return {
+            "side": {"processed": side.processed_frames(), "queue_depth": side.queue_depth(),
+                     "dropped": side.dropped_frames() + self._skipped_frames},
+            "top": {"processed": top.processed_frames(), "queue_depth": top.queue_depth(),
+                    "dropped": top.dropped_frames()},
+        }
+
+    @pyqtSlot(object)
+    def _on_side_processed(self, frames):
+        _, top_frame = frames
+        self.process_side(top_frame)
+
+    @staticmethod
+    def _start_thread(thread):
+        if not thread.isRunning():
+            thread.start()
             
     def _on_time_out(self):
         self.processing_flag = False
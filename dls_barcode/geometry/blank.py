@@ -1,4 +1,6 @@
-from dls_util.shape import Circle
+import numpy as np
+
+from dls_util.shape import Circle, points_in_circles
 
 
 class BlankGeometry:
@@ -25,6 +27,13 @@ class BlankGeometry:
         """ Get a circle which defines the bounds of the numbered barcode slot. """
         return self._barcode_bounds[slot_num - 1]
 
+    def slot_membership(self, points):
+        """ Boolean array of shape (points, slots) which is True where the point is within the bounds of
+        the slot. """
+        centers = np.array([(b.x(), b.y()) for b in self._barcode_bounds], dtype=float).reshape(-1, 2)
+        radii = np.array([b.radius() for b in self._barcode_bounds], dtype=float)
+        return points_in_circles(points, centers, radii)
+
     ############################
     # Drawing Functions
     ############################
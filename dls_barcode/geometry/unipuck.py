@@ -2,7 +2,9 @@ from __future__ import division
 
 import math
 
-from dls_util.shape import Point, Circle
+import numpy as np
+
+from dls_util.shape import Point, Circle, points_in_circles
 from .unipuck_template import UnipuckTemplate as Template
 
 
@@ -26,7 +28,9 @@ class Unipuck:
         self._feature_center = feature_center
         self._feature_boarder = feature_boarder
 
-        self._slot_bounds = []
+        self._slot_centers = None
+        self._slot_radii = None
+        self._slot_bounds = None
         self.set_rotation(rotation)
 
     def center(self): return self._center
@@ -41,7 +45,7 @@ class Unipuck:
         return self._radius * Template.SLOT_RADIUS
 
     def slot_bounds(self, slot_num):
-        return self._slot_bounds[slot_num - 1]
+        return self._bounds_list()[slot_num - 1]
 
     def center_radius(self):
         return self._radius * Template.CENTER_RADIUS
@@ -53,15 +57,24 @@ class Unipuck:
         return Unipuck.NUM_SLOTS
 
     def slot_center(self, slot_num):
-        return self._slot_bounds[slot_num - 1].center()
+        x, y = self._slot_centers[slot_num - 1]
+        return Point(int(x), int(y))
 
     def containing_slot(self, point):
         """ Returns the number of the slot which contains the specified point or None otherwise. """
-        for i, bounds in enumerate(self._slot_bounds):
-            if bounds.contains_point(point):
-                return i + 1
+        return self.containing_slots([point])[0]
+
+    def containing_slots(self, points):
+        """ Returns a list with the number of the slot which contains each of the specified points, or None
+        for a point which isn't in any slot. """
+        inside = self.slot_membership(points)
+        slot_nums = np.argmax(inside, axis=1) + 1
+        return [int(n) if any_slot else None for n, any_slot in zip(slot_nums, inside.any(axis=1))]
 
-        return None
+    def slot_membership(self, points):
+        """ Boolean array of shape (points, slots) which is True where the point is within the bounds of
+        the slot. """
+        return points_in_circles(points, self._slot_centers, self._slot_radii)
 
     def set_center(self, center):
         """ Set the center of the puck to the specified position. Recalculate the positions of the slots. """
@@ -78,6 +91,10 @@ class Unipuck:
         self._rotation = angle
         self._reset_slot_bounds()
 
+    def feature_center(self):
+        """ Position of the feature (notch) on the edge of the puck, if the puck was located from it. """
+        return self._feature_center
+
     def set_feature_center(self, feature_center):
         self._feature_center = feature_center
 
@@ -85,18 +102,32 @@ class Unipuck:
         self._feature_boarder = feature_boarder
 
     def _reset_slot_bounds(self):
-        self._slot_bounds = self.calculate_slot_bounds(self._center, self._radius, self._rotation)
+        self._slot_centers, self._slot_radii = self.calculate_slot_layout(self._center, self._radius, self._rotation)
+        self._slot_bounds = None
+
+    def _bounds_list(self):
+        """ The bounds of the slots as Circles. These are only needed for drawing and by the Plate, so they
+        are created from the slot layout when first asked for rather than every time the geometry changes. """
+        if self._slot_bounds is None:
+            self._slot_bounds = self._layout_to_bounds(self._slot_centers, self._slot_radii)
+        return self._slot_bounds
 
     @staticmethod
     def calculate_slot_bounds(center, radius, rotation):
         """ Calculates the bounds (position and radius) of all of the slots in the puck, based on the
         puck's geometry (position, size, and angle)."""
-        # Calculate pin slot locations
+        centers, radii = Unipuck.calculate_slot_layout(center, radius, rotation)
+        return Unipuck._layout_to_bounds(centers, radii)
+
+    @staticmethod
+    def calculate_slot_layout(center, radius, rotation):
+        """ Calculates the positions and radii of all of the slots in the puck as arrays of shape (slots, 2)
+        and (slots,). Slot centers are truncated to whole pixels. """
         layer_counts = Template.N
         layer_radii = Template.LAYER_RADII
         slot_radius = radius * Template.SLOT_RADIUS
 
-        slot_bounds = []
+        slot_centers = []
         for i, layer_count in enumerate(layer_counts):
             layer_radius = layer_radii[i] * radius
 
@@ -104,11 +135,15 @@ class Unipuck:
                 angle = (2.0 * math.pi * -j / layer_count) - (math.pi / 2.0) + rotation
                 x = int(center.x + layer_radius * math.cos(angle))
                 y = int(center.y + layer_radius * math.sin(angle))
-                slot_center = Point(x, y)
-                bounds = Circle(slot_center, slot_radius)
-                slot_bounds.append(bounds)
+                slot_centers.append((x, y))
 
-        return slot_bounds
+        centers = np.array(slot_centers, dtype=float)
+        radii = np.full(len(slot_centers), float(slot_radius))
+        return centers, radii
+
+    @staticmethod
+    def _layout_to_bounds(centers, radii):
+        return [Circle(Point(int(x), int(y)), r) for (x, y), r in zip(centers, radii.tolist())]
 
     ############################
     # Drawing Functions
@@ -122,13 +157,13 @@ class Unipuck:
         if(self._feature_center != None):
             img.draw_dot(self._feature_center, color)
             img.draw_feature_outline(self._feature_boarder, color, thickness=th)
-        for bounds in self._slot_bounds:
+        for bounds in self._bounds_list():
             img.draw_dot(bounds.center(), color)
             img.draw_circle(bounds, color)
 
     def draw_pin_highlight(self, img, color, pin_number):
         """ Draws a highlight circle and slot number for the specified slot on the image. """
-        bounds = self._slot_bounds[pin_number - 1]
+        bounds = self.slot_bounds(pin_number)
         img.draw_circle(bounds, color, thickness=int(bounds.radius() * 0.2))
         img.draw_text(str(pin_number), bounds.center(), color, centered=True)
 
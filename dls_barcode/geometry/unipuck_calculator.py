@@ -6,7 +6,6 @@ import time
 import math
 
 import numpy as np
-from scipy.optimize import fmin
 
 from dls_util.shape import Point
 from .exception import GeometryAlignmentError
@@ -26,6 +25,9 @@ class UnipuckCalculator:
     center of each slot, the unique orientation and position of the puck can be determined.
     This is possible even if some of the slot locations are not none.
     """
+    # Angular step (degrees) of the search for the puck orientation, and of the refinement around the best angle
+    ORIENTATION_STEP = 2
+    ORIENTATION_FINE_STEP = 0.25
 
     def __init__(self, slot_centers):
         """ Determine the puck geometry (position and orientation) for the locations of the
@@ -72,14 +74,22 @@ class UnipuckCalculator:
 
         Within each layer there may be some missing points, so if we calculate the center
         position of the puck by averaging the center positions of the slots, the results will
-        be a bit out. Instead, we use the average center position (the centroid) as a starting
-        point.
-        We then iterate over different values for the puck center position, attempting to find
-        a location that is equidistant from all of the slot centers.
+        be a bit out. Instead, we find the point that is (in a least squares sense) equidistant
+        from all of the slot centers, which can be solved for directly. The slots are then split
+        into the two layers by their distance from that point and the fit is repeated allowing a
+        different radius for each layer, which is considerably more accurate.
+
+        If the fit can't be solved, we fall back to iterating over different values for the puck
+        center position, starting from the centroid, to find the point that is equidistant from
+        all of the slot centers.
         """
-        centroid = calculate_centroid(pin_centers)
-        # Optimise for the puck center by finding the point that is equidistant from every point
-        center = fmin(func=_center_minimiser, x0=centroid.tuple(), args=tuple([pin_centers]), xtol=1, disp=False)
+        points = np.array([[p.x, p.y] for p in pin_centers], dtype=np.float64)
+        center = _fit_center(points)
+        if center is not None:
+            center = _fit_center_two_layers(points, center)
+        else:
+            center = _find_center_iteratively(pin_centers)
+
         center = Point(center[0], center[1]).intify()
 
         return center
@@ -104,29 +114,20 @@ class UnipuckCalculator:
     def _determine_puck_orientation(puck, pin_centers):
         """ Using the known size and position of the puck in the image, determine the correct
         orientation of puck. Try the template at a set of incremental rotations and determine
-        which is the best orientation by looking at sum of squared errors. This algorithm can
-        definitely be improved upon but this does the job
+        which is the best orientation by looking at sum of squared errors; the errors for all of
+        the rotations are calculated together as arrays. The best angle is then refined by trying
+        smaller increments either side of it.
         """
-
-        errors = []
-        best_sse = 10000000
-        best_angle = 0
-        original_angle = puck.angle()
+        self = UnipuckCalculator
+        pins = np.array([[p.x, p.y] for p in pin_centers], dtype=np.float64).reshape(-1, 2)
 
         # For each angular increment, calculate the sum of squared errors in slot center position
-        for a in range(0, 360, 2):
-            angle = a / (180 / math.pi)
-            puck.set_rotation(angle)
-            sse = 0
-            for p in pin_centers:
-                sse += UnipuckCalculator._shortest_sq_distance(puck, p)
-            if sse < best_sse:
-                best_sse = sse
-                best_angle = angle
-            errors.append([angle, sse])
+        angles = _coarse_angles()
+        errors = _orientation_errors(puck, pins, angles, _coarse_slot_directions())
 
-        # Set the puck back to its original angle
-        puck.set_rotation(original_angle)
+        best = int(np.argmin(errors))
+        best_sse = errors[best]
+        best_angle = angles[best]
 
         average_error = best_sse / (puck.radius() ** 2) / len(pin_centers)
         if average_error > 0.003:
@@ -134,24 +135,64 @@ class UnipuckCalculator:
             log.debug("Unable to determine Unipuck orientation")
             raise GeometryAlignmentError("Unable to determine Unipuck orientation")
 
+        # Refine the angle within the increment either side of the best one
+        num_fine = int(self.ORIENTATION_STEP / (2 * self.ORIENTATION_FINE_STEP))
+        fine_angles = [best_angle + math.radians(k * self.ORIENTATION_FINE_STEP) for k in range(-num_fine, num_fine + 1)]
+        fine_errors = _orientation_errors(puck, pins, fine_angles, _slot_directions(fine_angles))
+        fine_best = int(np.argmin(fine_errors))
+        if fine_errors[fine_best] < best_sse:
+            best_angle = fine_angles[fine_best]
+
         return best_angle
 
-    @staticmethod
-    def _shortest_sq_distance(puck, point):
-        """ Returns the distance from the specified point to the closest slot in the puck. """
-        low_l_sq = 100000000
-        slot_sq = puck.slot_radius() ** 2
 
-        for num in range(puck.num_slots()):
-            center = puck.slot_center(num + 1)
-            length_sq = point.distance_to_sq(center)
-            if length_sq < low_l_sq:
-                low_l_sq = length_sq
-                # Slots are non-overlapping so if its in the slot radius, it must be the closest
-                if length_sq < slot_sq:
-                    return length_sq
+_COARSE_DIRECTIONS = None
+
+
+def _coarse_angles():
+    """ The angles (radians) tried by the initial orientation search. """
+    step = UnipuckCalculator.ORIENTATION_STEP
+    return [a / (180 / math.pi) for a in range(0, 360, step)]
+
+
+def _coarse_slot_directions():
+    """ Slot directions for the initial orientation search. These only depend on the template, so are
+    calculated once. """
+    global _COARSE_DIRECTIONS
+    if _COARSE_DIRECTIONS is None:
+        _COARSE_DIRECTIONS = _slot_directions(_coarse_angles())
+    return _COARSE_DIRECTIONS
+
+
+def _slot_directions(angles):
+    """ Unit vectors from the center of the puck towards the center of each slot, for the template rotated
+    to each of the angles. Returns arrays of cosines and sines, each of shape (angles, slots). The angles are
+    calculated in the same way as in Unipuck.calculate_slot_bounds() so the slot positions are identical. """
+    cosines, sines = [], []
+    for rotation in angles:
+        slot_angles = [(2.0 * math.pi * -j / layer_count) - (math.pi / 2.0) + rotation
+                       for layer_count in UnipuckTemplate.N for j in range(layer_count)]
+        cosines.append([math.cos(a) for a in slot_angles])
+        sines.append([math.sin(a) for a in slot_angles])
+    return np.array(cosines), np.array(sines)
+
+
+def _orientation_errors(puck, pins, angles, directions):
+    """ For the puck rotated to each of the angles, the sum over the pins of the squared distance from the
+    pin to the closest slot center. """
+    center, radius = puck.center(), puck.radius()
+    layer_radii = np.array([UnipuckTemplate.LAYER_RADII[i] * radius
+                            for i, layer_count in enumerate(UnipuckTemplate.N) for _ in range(layer_count)])
 
-        return low_l_sq
+    # Slot centers are truncated to whole pixels, as they are in a Unipuck
+    cosines, sines = directions
+    slot_x = np.trunc(center.x + layer_radii * cosines)
+    slot_y = np.trunc(center.y + layer_radii * sines)
+
+    errors = np.zeros(len(angles))
+    for x, y in pins:
+        errors += np.min((x - slot_x) ** 2 + (y - slot_y) ** 2, axis=1)
+    return errors
 
 
 def calculate_centroid(points):
@@ -162,6 +203,52 @@ def calculate_centroid(points):
     return Point((sum(x) / len(points)), (sum(y) / len(points))).intify()
 
 
+def _fit_center(points):
+    """ Least squares fit of a single circle through the points (the minimum of _center_minimiser).
+    Returns the center or None if there isn't a unique solution. """
+    sq_lengths = np.sum(points ** 2, axis=1)
+    a = 2 * (points - np.mean(points, axis=0))
+    b = sq_lengths - np.mean(sq_lengths)
+    return _solve_least_squares(a, b)
+
+
+def _fit_center_two_layers(points, center):
+    """ Least squares fit of two concentric circles, one through the points of each layer. The points are
+    split into layers by their distance from the supplied (approximate) center, which is returned unchanged
+    if the split or the fit fails. """
+    distances = list(np.sqrt(np.sum((points - center) ** 2, axis=1)))
+    order = np.argsort(distances, kind='stable')
+    layer_break = _partition(distances)
+    if layer_break == 0:
+        return center
+
+    outer = np.zeros(len(points), dtype=bool)
+    outer[order[layer_break:]] = True
+
+    # For a point p on a circle of center c and radius r: 2p.c + (r^2 - c.c) = p.p; one radius per layer
+    a = np.column_stack([2 * points, ~outer, outer]).astype(np.float64)
+    b = np.sum(points ** 2, axis=1)
+    solution = _solve_least_squares(a, b)
+    return solution[:2] if solution is not None else center
+
+
+def _solve_least_squares(a, b):
+    solution, _, rank, _ = np.linalg.lstsq(a, b, rcond=None)
+    if rank < a.shape[1] or not np.all(np.isfinite(solution)):
+        return None
+    return solution
+
+
+def _find_center_iteratively(pin_centers):
+    """ Optimise for the puck center by finding the point that is equidistant from every point. This is
+    much slower than the direct fit, so is only used if that fails. """
+    # scipy is slow to import, so only load it if it is needed
+    from scipy.optimize import fmin
+
+    centroid = calculate_centroid(pin_centers)
+    return fmin(func=_center_minimiser, x0=centroid.tuple(), args=tuple([pin_centers]), xtol=1, disp=False)
+
+
 def _center_minimiser(center, dist):
     """ Used as the cost function in an optimisation routine.
     for a trial center point, we calculate an error that is the sum of the squares of the deviation
@@ -0,0 +1,62 @@
+import logging
+import os
+import sys
+import threading
+
+import cv2
+
+from dls_util.image.contours_manager import ContoursManager
+
+
+def _resolve_template_path():
+    """ Location of the image of the feature (the round cut on the edge of a puck), which differs between
+    running from source and running from the .exe bundle. """
+    if getattr(sys, 'frozen', False):  # for the .exe bundle
+        # see https://pythonhosted.org/PyInstaller/runtime-information.html
+        return os.path.abspath(os.path.join('resources', 'features', 'fit.png'))
+    else:
+        dir_path = os.path.dirname(os.path.abspath(__file__))
+        return os.path.join(dir_path, '..', '..', 'resources', 'features', 'fit.png')
+
+
+class UnipuckFeatureTemplate:
+    """ The contour of the Unipuck feature that the UnipuckLocator looks for in each image (see
+    ContoursManager.match_shapes).
+
+    The template image is only read and processed the first time that it is needed; after that the same
+    template is shared by every locator in the process. Call load() when a scanner is created so that a
+    missing template file is reported then, rather than when the first frame is scanned.
+    """
+    PATH = _resolve_template_path()
+
+    _template = None
+    _lock = threading.Lock()
+
+    def __init__(self, contour):
+        self._contour = contour
+
+    def contour(self):
+        return self._contour
+
+    @staticmethod
+    def load():
+        """ Get the template, reading it from file if this is the first time it has been asked for. """
+        self = UnipuckFeatureTemplate
+        if self._template is None:
+            with self._lock:
+                if self._template is None:
+                    self._template = self.from_file(self.PATH)
+        return self._template
+
+    @staticmethod
+    def from_file(f_path):
+        """ Create the template from the (dark on light) image of the feature in the file. """
+        image = cv2.imread(f_path, 0) if os.path.exists(f_path) else None
+        if image is None:
+            message = "Cannot find the Unipuck feature template image: {}".format(os.path.abspath(f_path))
+            logging.getLogger(".".join([__name__])).error(message)
+            raise IOError(2, message, f_path)
+
+        contours = ContoursManager(255 - image)
+        contours.find_all()
+        return UnipuckFeatureTemplate(contours.get_lagerst())
@@ -2,13 +2,11 @@ import cv2
 import logging
 import numpy as np
 import math
-import os
-
-import sys
 
 from dls_util.image.contours_manager import ContoursManager
 from dls_util.image.image_morphology import ImageMorphology
 from dls_barcode.geometry.unipuck import Unipuck
+from dls_barcode.geometry.unipuck_feature_template import UnipuckFeatureTemplate
 from dls_util import Color, Image
 from dls_util.shape import Point
 
@@ -16,6 +14,14 @@ OPENCV_MAJOR = cv2.__version__[0]
 # factores's values found during tests
 FEATURE_MATCH_FACTOR = 0.07  # the lowest the number the closer the match
 FEATURE_HULL_MATCH_FACTOR = 0.96  # maximum value is 1, higher value better match
+# only contours of about the size of the feature are compared with it (r is the puck radius). The ranges
+# were found by measuring the feature in the puck images in tests/test-resources, at full and at reduced
+# scale: it was 0.013 - 0.016 r^2 in area and 0.49 - 0.54 r in perimeter. The ranges allow about 3 times
+# less or 4 times more area and 2.5 times less or 3 times more perimeter, which leaves out the specks of
+# noise (below 0.002 r^2 and 0.18 r) and the outline of the whole puck (above 1.5 r^2 and 5 r) which, in
+# some of the images, matched the template more closely than the feature did.
+FEATURE_AREA_RANGE = (0.004, 0.06)  # relative to the square of the puck radius
+FEATURE_PERIMETER_RANGE = (0.2, 1.5)  # relative to the puck radius
 #PUCK_FEATURE_AREA_FACTOR_MIN = 0.05  # discard small elements
 
 
@@ -25,18 +31,40 @@ class UnipuckLocator:
     Next a feature - the round cut on the edge of a puck - is detected.
     The position of the puck is known once the position of the feature is found."""
 
-    def __init__(self, image):
+    # images wider than this are searched at a reduced scale and the result refined at full resolution
+    REDUCE_ABOVE_WIDTH = 1200
+    REDUCED_SCALE = 0.5
+
+    # sizes (in pixels) of the filters used to find the puck in the full resolution and in the reduced image
+    BLUR_SIZE = 9
+    THRESHOLD_BLOCK_SIZE = 35
+    OPEN_MORPH_SIZE = 8
+    REDUCED_BLUR_SIZE = 3
+    REDUCED_THRESHOLD_BLOCK_SIZE = 19
+    REDUCED_OPEN_MORPH_SIZE = 4
+    THRESHOLD_C = 16
+
+    def __init__(self, image, reduce=None):
+        """ If reduce is None, images wider than REDUCE_ABOVE_WIDTH are searched at the reduced scale and
+        smaller ones at full resolution. """
         self._log = logging.getLogger(".".join([__name__]))
-        self.image = image.img.copy()
+        self.image = image.img
         self.unipuck_contours = None
 
+        if reduce is None:
+            reduce = self.image.shape[1] > self.REDUCE_ABOVE_WIDTH
+        self._scale = self.REDUCED_SCALE if reduce else 1.0
+
     def find_location(self):
         # find center, radius and location of the puck
         # use feature detection to identify the orientation of the puck
-        self.unipuck_contours = self._find_puck_contours()
-        (x, y), radius = self._find_enclosing_circle_of_largest_contour()
-        features_cnt = self._find_contours_of_features(x, y, radius)
-        match_factor, match_cnt = self._find_feature(features_cnt)
+        if self._scale != 1.0:
+            (x, y), radius, match_factor, match_cnt = self._find_feature_at_reduced_scale()
+        else:
+            self.unipuck_contours = self._find_puck_contours(self.image, self.BLUR_SIZE, self.THRESHOLD_BLOCK_SIZE)
+            (x, y), radius = self._find_enclosing_circle_of_largest_contour()
+            features_cnt = self._find_contours_of_features(x, y, radius, self.image.shape, self.OPEN_MORPH_SIZE)
+            match_factor, match_cnt = self._find_feature(features_cnt, radius)
 
         uni = None
 
@@ -61,54 +89,171 @@ class UnipuckLocator:
 
         return uni
 
-    def _find_puck_contours(self):
+    def _find_puck_contours(self, image, blur_size, block_size, external_only=False):
         # find contours of the image which is initially blurred and thresholded
-        blurred = cv2.GaussianBlur(self.image, (9, 9), 0)
-        edged = cv2.adaptiveThreshold(blurred, 255.0, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 35, 16)
+        edged = self._threshold(image, blur_size, block_size)
         cnt = ContoursManager(255 - edged)
-        cnt.find_all()
+        if external_only:
+            cnt.find_external()
+        else:
+            cnt.find_all()
 
         return cnt
 
+    def _threshold(self, image, blur_size, block_size):
+        blurred = cv2.GaussianBlur(image, (blur_size, blur_size), 0)
+        return cv2.adaptiveThreshold(blurred, 255.0, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY,
+                                     block_size, self.THRESHOLD_C)
+
     def _find_enclosing_circle_of_largest_contour(self):
         (x, y), radius = cv2.minEnclosingCircle(self.unipuck_contours.get_lagerst())
         return (int(x), int(y)), int(radius)
 
-    def _find_contours_of_features(self, x, y, rad):
+    def _find_contours_of_features(self, x, y, rad, shape, morph_size):
         # find features on the edge of the puck
-        blank_image = np.zeros(self.image.shape, np.uint8)
+        blank_image = np.zeros(shape, np.uint8)
         cv2.circle(blank_image, (x, y), rad, (255, 255, 255), -1)
 
         self.unipuck_contours.draw_largest_cnt(blank_image, Color.Black(), -1)
 
-        img_open = ImageMorphology(blank_image).do_open_morph(8)  # removes some white artifacts
+        img_open = ImageMorphology(blank_image).do_open_morph(morph_size)  # removes some white artifacts
         img_open_cnt = ContoursManager(img_open)
         img_open_cnt.find_all()
 
         return img_open_cnt
 
-    def _find_feature(self, features_cnt):  # do this better
-        # compares the feature from the image with the features found on the edge of the puck
-        if getattr(sys, 'frozen', False): # for the .exe bundle
-            #see: #see https://pythonhosted.org/PyInstaller/runtime-information.html
-            #f_path = os.path.join('..', 'resources', 'features', 'fit.png')
-            f_path = os.path.join('resources', 'features', 'fit.png')
-        else:
-            dir_path = os.path.dirname(os.path.abspath(__file__))
-            f_path = os.path.join(dir_path, '..', '..', 'resources', 'features', 'fit.png')
-        img_feature_cnt = ContoursManager(255 - self._read_feature_image(f_path))
-        img_feature_cnt.find_all()
+    ############################
+    # Reduced Scale Search
+    ############################
+    def _find_feature_at_reduced_scale(self):
+        """ Find the puck and its feature in a reduced copy of the image, then refine the enclosing circle
+        and the outline of the feature by looking at the full resolution image only around them. If the
+        outline can't be refined, the one found in the reduced image is scaled up instead. """
+        scale = self._scale
+        small = cv2.resize(self.image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        # Only the largest contour is used, which is never the contour of a hole, so the others aren't needed
+        self.unipuck_contours = self._find_puck_contours(small, self.REDUCED_BLUR_SIZE,
+                                                         self.REDUCED_THRESHOLD_BLOCK_SIZE, external_only=True)
+        largest = self.unipuck_contours.get_lagerst()
 
-        match_factor, match_cnt = features_cnt.match_shapes(img_feature_cnt.get_lagerst())
+        (sx, sy), small_radius = self._find_enclosing_circle_of_largest_contour()
+        features_cnt = self._find_contours_of_features(sx, sy, small_radius, small.shape,
+                                                       self.REDUCED_OPEN_MORPH_SIZE)
+        match_factor, match_cnt = self._find_feature(features_cnt, small_radius)
 
-        return match_factor, match_cnt
+        (x, y), radius = self._refine_enclosing_circle(largest)
 
-    def _read_feature_image(self, f_path):
-        if os.path.exists(f_path):
-            return cv2.imread(f_path, 0)
-        else:
-            self._log.error("Cannot find {}".format(f_path))
-            raise IOError(2, "Cannot find", f_path)
+        if match_cnt is not None:
+            refined_cnt = self._refine_feature(match_cnt, largest, x, y, radius)
+            if refined_cnt is not None:
+                template = UnipuckFeatureTemplate.load()
+                match_factor = cv2.matchShapes(template.contour(), refined_cnt, cv2.CONTOURS_MATCH_I1, 0.0)
+                match_cnt = refined_cnt
+            else:
+                match_cnt = self._to_full_resolution(match_cnt)
+
+        return (x, y), radius, match_factor, match_cnt
+
+    def _refine_enclosing_circle(self, small_contour):
+        """ The enclosing circle of the contour of the puck is defined by the few points of the contour
+        that touch it. Each of these is found again at full resolution, in a small window around where it
+        is in the reduced image, and the circle is calculated from them. """
+        scale = self._scale
+        (sx, sy), small_radius = cv2.minEnclosingCircle(small_contour)
+        points = small_contour[:, 0, :]
+        distances = np.hypot(points[:, 0] - sx, points[:, 1] - sy)
+        touching = points[distances >= small_radius - 0.01]
+
+        center_x, center_y, radius = sx / scale, sy / scale, small_radius / scale
+        max_distance = radius + 1 / scale + 1
+        half_size = int(math.ceil(2 / scale)) + 2
+
+        refined = []
+        for point in touching:
+            px, py = int(round(point[0] / scale)), int(round(point[1] / scale))
+            x0, y0, x1, y1 = self._clip_window(px - half_size, py - half_size, px + half_size + 1, py + half_size + 1)
+            ys, xs = np.nonzero(self._full_resolution_foreground(x0, y0, x1, y1))
+            xs, ys = xs + x0, ys + y0
+            near = np.hypot(xs - center_x, ys - center_y) <= max_distance
+            refined.append(np.stack([xs[near], ys[near]], axis=1))
+
+        refined = np.vstack(refined) if refined else np.zeros((0, 2))
+        if len(refined) == 0:
+            return (int(center_x), int(center_y)), int(radius)
+
+        (x, y), radius = cv2.minEnclosingCircle(refined.astype(np.int32).reshape(-1, 1, 2))
+        return (int(x), int(y)), int(radius)
+
+    def _refine_feature(self, small_feature, small_contour, x, y, radius):
+        """ Find the outline of the feature at full resolution within a window around where it was found
+        in the reduced image. As in the full resolution search, the feature is the part of the enclosing
+        circle that is outside of the contour of the puck. Returns None if the feature found runs into the
+        edge of the window. """
+        margin = self.THRESHOLD_BLOCK_SIZE
+        bx, by, bw, bh = cv2.boundingRect(self._to_full_resolution(small_feature))
+        x0, y0, x1, y1 = self._clip_window(bx - margin, by - margin, bx + bw + margin, by + bh + margin)
+        offset = np.array([x0, y0], dtype=np.int32)
+        foreground = self._full_resolution_foreground(x0, y0, x1, y1)
+
+        # Inside of the puck: the area within its outline (from the reduced image, shrunk to allow for the
+        # lower resolution) plus the parts of the full resolution outline that it touches
+        puck = np.zeros(foreground.shape, np.uint8)
+        cv2.drawContours(puck, [self._to_full_resolution(small_contour) - offset], -1, 255, -1)
+        _, labels = cv2.connectedComponents(foreground, connectivity=8)
+        outline_labels = np.unique(labels[(puck > 0) & (foreground > 0)])
+        erode_size = 2 * (int(math.ceil(1 / self._scale)) + 1) + 1
+        inside = ImageMorphology(puck).do_erode_morph(erode_size) > 0
+        inside |= np.isin(labels, outline_labels[outline_labels > 0])
+
+        blank_image = np.zeros(foreground.shape, np.uint8)
+        cv2.circle(blank_image, (x - x0, y - y0), radius, 255, -1)
+        blank_image[inside] = 0
+        img_open = ImageMorphology(blank_image).do_open_morph(self.OPEN_MORPH_SIZE)
+
+        # Take the part that overlaps most with the feature found in the reduced image
+        count, labels = cv2.connectedComponents(img_open, connectivity=8)
+        small_mask = np.zeros(foreground.shape, np.uint8)
+        cv2.drawContours(small_mask, [self._to_full_resolution(small_feature) - offset], -1, 255, -1)
+        overlap = np.bincount(labels[small_mask > 0], minlength=count)
+        overlap[0] = 0
+        if overlap.max() == 0:
+            return None
+
+        feature = np.uint8(labels == np.argmax(overlap)) * 255
+        fx, fy, fw, fh = cv2.boundingRect(feature)
+        height, width = self.image.shape[:2]
+        if (fx == 0 and x0 > 0) or (fy == 0 and y0 > 0) or \
+                (fx + fw == feature.shape[1] and x1 < width) or (fy + fh == feature.shape[0] and y1 < height):
+            return None
+
+        contours, _ = cv2.findContours(feature, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+        return contours[0] + offset
+
+    def _full_resolution_foreground(self, x0, y0, x1, y1):
+        """ The (inverted) thresholded full resolution image within the window. The filters are applied to
+        a larger area around the window so the result is the same as for the whole image. """
+        context = self.THRESHOLD_BLOCK_SIZE // 2 + self.BLUR_SIZE // 2 + 2
+        cx0, cy0, cx1, cy1 = self._clip_window(x0 - context, y0 - context, x1 + context, y1 + context)
+        edged = self._threshold(self.image[cy0:cy1, cx0:cx1], self.BLUR_SIZE, self.THRESHOLD_BLOCK_SIZE)
+        return 255 - edged[y0 - cy0:y1 - cy0, x0 - cx0:x1 - cx0]
+
+    def _clip_window(self, x0, y0, x1, y1):
+        height, width = self.image.shape[:2]
+        return max(0, x0), max(0, y0), min(width, x1), min(height, y1)
+
+    def _to_full_resolution(self, contour):
+        return np.round(contour / self._scale).astype(np.int32)
+
+    def _find_feature(self, features_cnt, radius):  # do this better
+        # compares the feature from the image with the features found on the edge of the puck
+        template = UnipuckFeatureTemplate.load()
+        candidates = features_cnt.candidates(min_area=FEATURE_AREA_RANGE[0] * radius ** 2,
+                                             max_area=FEATURE_AREA_RANGE[1] * radius ** 2,
+                                             min_perimeter=FEATURE_PERIMETER_RANGE[0] * radius,
+                                             max_perimeter=FEATURE_PERIMETER_RANGE[1] * radius)
+        match_factor, match_cnt = features_cnt.match_shapes(template.contour(), candidates)
+
+        return match_factor, match_cnt
 
     @staticmethod
     def _find_contour_momentum(c):
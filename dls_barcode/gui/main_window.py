@@ -159,6 +159,7 @@ class DiamondBarcodeMainWindow(QtWidgets.QMainWindow):
         """This overrides the method from the base class.
         It is called when the user closes the window from the X on the top right."""
         self._frame_grabber_controller.kill_grabber_thread()
+        self._record_table.close_store()
         event.accept()
 
     def displayCameraErrorMessage(self):
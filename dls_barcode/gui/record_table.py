@@ -1,12 +1,18 @@
 from __future__ import division
 
+import os
+
 from PyQt5 import QtWidgets
-from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QGroupBox, QVBoxLayout, QHBoxLayout, QTableWidget, QMessageBox
+from PyQt5.QtWidgets import QGroupBox, QVBoxLayout, QHBoxLayout, QTableView, QMessageBox
 
 from dls_barcode.data_store import Store
+from dls_barcode.data_store.record import Record
+from dls_barcode.data_store.sqlite_store import SqliteStore
+from dls_barcode.data_store.store_migrator import StoreMigrator
 from dls_barcode.data_store.store_loader import StoreLoader
 from dls_barcode.data_store.store_writer import StoreWriter
+from dls_barcode.data_store.thumbnails import Thumbnails
+from dls_barcode.gui.record_table_model import RecordTableModel
 
 # todo: allow delete key to be used for deletion
 # todo: allow record selection with arrow keys
@@ -17,17 +23,15 @@ class ScanRecordTable(QGroupBox):
     details of the scan to appear in other GUI components (list of barcodes in the barcode
     table and image of the puck in the image frame).
     """
-    COLUMNS = ['Date', 'Time', 'Plate Barcode', 'Valid', 'Invalid', 'Empty', 'Plate Type']
+    COLUMNS = RecordTableModel.COLUMNS
 
     def __init__(self, barcode_table, image_frame, holder_frame, result_frame, options):
         super(ScanRecordTable, self).__init__()
 
-        # Read the store from file
-        store_writer = StoreWriter(options.get_store_directory(), "store")
-        store_loader = StoreLoader(options.get_store_directory(), "store")
-
-        self._store = Store(store_writer, store_loader.load_records_from_file())
+        self._store = self._open_store(options)
+        self._thumbnails = Thumbnails(Record.IMAGE_CACHE)
         self._options = options
+        self._model = RecordTableModel(self._store, options)
 
         self._barcodeTable = barcode_table
         self._image_frame = image_frame
@@ -39,13 +43,26 @@ class ScanRecordTable(QGroupBox):
 
         self._init_ui()
 
+    @staticmethod
+    def _open_store(options):
+        """ Open the SQLite database store (copying the store files into it the first time) if the
+        option is set, else read the store from file. """
+        store_directory = options.get_store_directory()
+        store_writer = StoreWriter(store_directory, "store", image_writer=options.get_image_writer())
+        if options.is_store_database():
+            database_path = os.path.join(store_directory, "store.db")
+            StoreMigrator(store_directory, "store").migrate(database_path)
+            return SqliteStore(store_writer, database_path)
+
+        store_loader = StoreLoader(store_directory, "store")
+        return Store(store_writer, store_loader.load_records_from_file())
+
     def _init_ui(self):
         # Create record table - lists all the records in the store
-        self._table = QTableWidget()
+        self._table = QTableView()
         self._table.setMinimumWidth(720) #900
         self._table.setMinimumHeight(400)
-        self._table.setColumnCount(len(self.COLUMNS))
-        self._table.setHorizontalHeaderLabels(self.COLUMNS)
+        self._table.setModel(self._model)
 
         self._table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
 
@@ -68,42 +85,25 @@ class ScanRecordTable(QGroupBox):
         self.setLayout(vbox)
 
     def cell_pressed_action_triggered(self, to_run_on_table_clicked):
-        self._table.cellPressed.connect(to_run_on_table_clicked)
-        self._table.cellPressed.connect(self._record_selected)
+        self._table.pressed.connect(to_run_on_table_clicked)
+        self._table.pressed.connect(self._record_selected)
 
     def add_record_frame(self, holder_barcode, plate, holder_img, pins_img):
         """ Add a new scan frame - creates a new record if its a new puck, else merges with previous record"""
-        self._store.merge_record(holder_barcode, plate, holder_img, pins_img)
-        self._load_store_records()
+        self._model.merge_record(holder_barcode, plate, holder_img, pins_img)
+        self._select_latest_record()
         if self._options.scan_clipboard.value():
             self._barcodeTable.copy_to_clipboard()
 
     def _load_store_records(self):
-        """ Populate the record table with all of the records in the store.
+        """ Show the records in the store in the record table.
         """
-        self._table.clearContents()
-        self._table.setRowCount(self._store.size())
-
-        for n, record in enumerate(self._store.records):
-            items = [record.date, record.time, record.holder_barcode, record.num_valid_barcodes,
-                     record.num_unread_slots, record.num_empty_slots, record.plate_type]
-            valid_empty = record.num_valid_barcodes + record.num_empty_slots
-            if valid_empty == record.num_slots:
-                color = self._options.col_ok()
-            elif valid_empty < record.num_slots and record.num_valid_barcodes > 0:
-                color = self._options.col_accept()
-            else:
-                color = self._options.col_bad()
-
-            color.a = 192
-            for m, item in enumerate(items):
-                new_item = QtWidgets.QTableWidgetItem(str(item))
-                new_item.setBackground(color.to_qt())
-                new_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-                self._table.setItem(n, m, new_item)
-
-        # Display the first (most recent) record
-        self._table.setCurrentCell(0, 0)
+        self._model.refresh()
+        self._select_latest_record()
+
+    def _select_latest_record(self):
+        """ Display the first (most recent) record. """
+        self._table.selectRow(0)
         self._record_selected()
 
     def _record_selected(self):
@@ -118,8 +118,8 @@ class ScanRecordTable(QGroupBox):
             record = self._store.get_record(row)
             self._barcodeTable.populate(record.holder_barcode, record.barcodes)
             marked_image = record.get_marked_image(self._options)
-            image = record.get_image()
-            holder_image = record.get_holder_image()
+            image = self._thumbnail_or_image(record.image_path, record.get_image)
+            holder_image = self._thumbnail_or_image(record.holder_image_path, record.get_holder_image)
             self._image_frame.display_image(image)
             self._holder_frame.display_image(holder_image)
             self._result_frame.display_image(marked_image)
@@ -127,6 +127,11 @@ class ScanRecordTable(QGroupBox):
             self._barcodeTable.clear()
 #            self._imageFrame.clear_frame("Record table empty\nNothing to display")
 
+    def _thumbnail_or_image(self, image_path, get_image):
+        """ The thumbnail of the image if it has been made, else the full size image. """
+        thumbnail = self._thumbnails.get(image_path)
+        return thumbnail if thumbnail is not None else get_image()
+
     def _delete_selected_records(self):
         """ Called when the 'Delete' button is pressed. Deletes all of the selected records
         (and the associated images) from the store and from disk. Asks for user confirmation.
@@ -138,20 +143,20 @@ class ScanRecordTable(QGroupBox):
 
         # If yes, find the appropriate records and delete them
         if reply == QMessageBox.Yes:
-            rows = self._table.selectionModel().selectedRows()
-            records_to_delete = []
-            for row in rows:
-                index = row.row()
-                record = self._store.get_record(index)
-                records_to_delete.append(record)
+            rows = [index.row() for index in self._table.selectionModel().selectedRows()]
 
             if self._options.backup.value():
                 self._store.backup_records(self._options.get_backup_directory())
-            self._store.delete_records(records_to_delete)
+            self._model.delete_rows(rows)
 
-            self._load_store_records()
+            self._select_latest_record()
 
     def is_latest_holder_barcode(self, holder_barcode):
         return self._store.is_latest_holder_barcode(holder_barcode)
 
+    def close_store(self):
+        """ Write any journaled changes to the store file before the program exits. """
+        self._thumbnails.stop()
+        self._store.close()
+
 
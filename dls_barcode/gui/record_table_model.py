@@ -0,0 +1,115 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class RecordTableModel(QAbstractTableModel):
+    """ Table model which shows the records in the store (most recent first). The rows are read from the
+    store as the view asks for them, so only the rows that are visible are ever made. Changes to the
+    store must be made through the model, so that the view is told which rows have changed.
+    """
+    COLUMNS = ['Date', 'Time', 'Plate Barcode', 'Valid', 'Invalid', 'Empty', 'Plate Type']
+
+    # Number of recently displayed records that are kept, so that the store isn't asked for the same
+    # record for each of its cells
+    ROW_CACHE_SIZE = 256
+
+    def __init__(self, store, options):
+        super(RecordTableModel, self).__init__()
+        self._store = store
+        self._options = options
+        self._row_cache = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._store.size()
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return super(RecordTableModel, self).headerData(section, orientation, role)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.BackgroundRole):
+            return None
+
+        record = self.record(index.row())
+        if record is None:
+            return None
+
+        if role == Qt.BackgroundRole:
+            return self._row_color(record).to_qt()
+
+        items = [record.date, record.time, record.holder_barcode, record.num_valid_barcodes,
+                 record.num_unread_slots, record.num_empty_slots, record.plate_type]
+        return str(items[index.column()])
+
+    def record(self, row):
+        """ The record shown in the row, or None if there is no such row. """
+        record = self._row_cache.get(row)
+        if record is None:
+            if not 0 <= row < self._store.size():
+                return None
+
+            record = self._store.get_record(row)
+            if len(self._row_cache) >= self.ROW_CACHE_SIZE:
+                self._row_cache.clear()
+            self._row_cache[row] = record
+        return record
+
+    def merge_record(self, holder_barcode, plate, holder_img, pins_img):
+        """ Add a new record to the store (see Store.merge_record). The record goes in the first row; if
+        it replaces the most recent record, only that row changes. """
+        if self._store.is_latest_holder_barcode(holder_barcode):
+            self._store.merge_record(holder_barcode, plate, holder_img, pins_img)
+            self._row_cache.clear()
+            self.dataChanged.emit(self.index(0, 0), self.index(0, len(self.COLUMNS) - 1))
+        else:
+            self.beginInsertRows(QModelIndex(), 0, 0)
+            self._store.merge_record(holder_barcode, plate, holder_img, pins_img)
+            self._row_cache.clear()
+            self.endInsertRows()
+
+    def delete_rows(self, rows):
+        """ Delete the records in the rows from the store. Each run of adjacent rows is removed from the
+        store and the view in one go, starting from the bottom so the remaining row numbers stay valid. """
+        for first, last in reversed(self._contiguous_ranges(rows)):
+            records = [self.record(row) for row in range(first, last + 1)]
+
+            self.beginRemoveRows(QModelIndex(), first, last)
+            self._store.delete_records(records)
+            self._row_cache.clear()
+            self.endRemoveRows()
+
+    def _contiguous_ranges(self, rows):
+        """ Group the valid rows into (first, last) ranges of adjacent rows, in ascending order. """
+        ranges = []
+        for row in sorted(set(row for row in rows if 0 <= row < self.rowCount())):
+            if ranges and row == ranges[-1][1] + 1:
+                ranges[-1] = (ranges[-1][0], row)
+            else:
+                ranges.append((row, row))
+        return ranges
+
+    def refresh(self):
+        """ Update the view after the store or the display options have changed. """
+        self.beginResetModel()
+        self._row_cache.clear()
+        self.endResetModel()
+
+    def _row_color(self, record):
+        valid_empty = record.num_valid_barcodes + record.num_empty_slots
+        if valid_empty == record.num_slots:
+            color = self._options.col_ok()
+        elif valid_empty < record.num_slots and record.num_valid_barcodes > 0:
+            color = self._options.col_accept()
+        else:
+            color = self._options.col_bad()
+
+        color.a = 192
+        return color
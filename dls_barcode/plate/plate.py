@@ -1,5 +1,7 @@
 import uuid
 
+import numpy as np
+
 from dls_barcode.geometry import Geometry
 from .slot import Slot, EMPTY_SLOT_SYMBOL, NOT_FOUND_SLOT_SYMBOL
 
@@ -45,6 +47,21 @@ class Plate:
             bounds = geometry.slot_bounds(slot.number())
             slot.set_bounds(bounds)
 
+    def match_barcodes(self, barcodes):
+        """ For each slot, find the first of the barcodes whose center lies within the slot bounds. Returns
+        a list with a barcode (or None) for each slot. All of the barcodes are tested against all of the
+        slots in one go using the geometry's slot layout. """
+        matches = [None] * self.num_slots
+        if not barcodes:
+            return matches
+
+        inside = self._geometry.slot_membership([bc.center() for bc in barcodes])[:, :self.num_slots]
+        first = np.argmax(inside, axis=0)
+        for i, found in enumerate(inside.any(axis=0)):
+            if found:
+                matches[i] = barcodes[first[i]]
+        return matches
+
     def invalid_slots(self):
         return [s for s in self._slots if s.state() != Slot.VALID]
 
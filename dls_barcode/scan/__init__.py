@@ -1,2 +1,3 @@
+from .stage_timer import StageTimer
 from .with_geometry import GeometryScanner, SlotScanner
 from .open import OpenScanner
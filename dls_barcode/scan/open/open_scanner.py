@@ -6,6 +6,7 @@ from dls_barcode.plate import Plate
 from dls_barcode.geometry import Geometry
 from ..no_barcodes_detected_error import NoBarcodesDetectedError
 from .open_scan_result import OpenScanResult
+from ..stage_timer import StageTimer
 
 
 class OpenScanner:
@@ -21,7 +22,6 @@ class OpenScanner:
         self._old_barcode_data = []
 
     def scan_next_frame(self, frame, is_single_image=False):
-        self._frame_img = frame.convert_to_gray()
         self._frame = frame
         self._frame_number += 1
         self._is_single_image = is_single_image
@@ -29,37 +29,42 @@ class OpenScanner:
         result.set_old_barcode_data(self._old_barcode_data)
         result.start_timer()
 
+        with result.stage(StageTimer.GRAY):
+            self._frame_img = frame.convert_to_gray()
+
         # Read all the barcodes in the image
         try:
-            barcodes = self._perform_frame_scan()
+            barcodes = self._perform_frame_scan(result)
             result.set_barcodes(barcodes)
             result.set_frame(self._frame)
         except NoBarcodesDetectedError as ex:
             result.set_frame(self._frame)
             result.set_error(ScanErrorMessage(str(ex)))
 
-        # Create a 'blank' geometry object to store the barcode locations
-        new_barcodes = result.new_barcodes()
-        num_new_barcodes = len(new_barcodes)
-        geometry = self._create_geometry(new_barcodes)
+        with result.stage(StageTimer.MERGE):
+            # Create a 'blank' geometry object to store the barcode locations
+            new_barcodes = result.new_barcodes()
+            num_new_barcodes = len(new_barcodes)
+            geometry = self._create_geometry(new_barcodes)
 
-        # Create the plate
-        if any(new_barcodes):
-            plate = Plate(self.plate_type, num_slots=num_new_barcodes)
-            plate.set_geometry(geometry)
-            for s, barcode in enumerate(new_barcodes):
-                plate.slot(s).set_barcode(barcode)
-            result.set_plate(plate)
+            # Create the plate
+            if any(new_barcodes):
+                plate = Plate(self.plate_type, num_slots=num_new_barcodes)
+                plate.set_geometry(geometry)
+                for s, barcode in enumerate(new_barcodes):
+                    plate.slot(s).set_barcode(barcode)
+                result.set_plate(plate)
 
         result.end_timer()
         return result
 
-    def _perform_frame_scan(self):
-        barcodes = self._locate_all_barcodes_in_image()
+    def _perform_frame_scan(self, result):
+        with result.stage(StageTimer.LOCATE):
+            barcodes = self._locate_all_barcodes_in_image()
+        with result.stage(StageTimer.DECODE):
+            DataMatrix.read_many(barcodes, self._frame_img)
 
         for barcode in barcodes:
-            barcode.perform_read(self._frame_img)
-
             if self._is_barcode_new(barcode):
                 # todo: limit number of previous barcodes stored
                 self._old_barcode_data.append(barcode.data())
@@ -1,8 +1,13 @@
 import logging
 import time
 
+from .stage_timer import StageTimer
+
 
 class ScanResult:
+    # Set to False to turn off the recording of the time taken by each stage of the scan
+    RECORD_STAGE_TIMES = True
+
     def __init__(self, frame_number):
         self._log = logging.getLogger(".".join([__name__]))
 
@@ -19,6 +24,7 @@ class ScanResult:
 
         self._start_time = 0
         self._scan_time = 0
+        self._stage_timer = StageTimer(self.RECORD_STAGE_TIMES)
 
     def start_timer(self):
         self._start_time = time.time()
@@ -26,6 +32,11 @@ class ScanResult:
     def end_timer(self):
         self._scan_time = time.time() - self._start_time
 
+    def stage(self, name):
+        """ Context manager which adds the time spent within it to the named stage of the scan
+        (see StageTimer). """
+        return self._stage_timer.stage(name)
+
     def set_previous_plate(self, plate):
         self._previous_plate = plate
         self._previous_plate_count = plate.num_valid_barcodes() if plate else 0
@@ -103,6 +114,13 @@ class ScanResult:
     def scan_time(self):
         return self._scan_time
 
+    def stage_times(self):
+        """ Time (in seconds) spent in each stage of the scan. """
+        return self._stage_timer.times()
+
+    def stage_times_summary(self):
+        return self._stage_timer.summary()
+
     def is_new_plate(self):
         return self._plate and \
                (self._previous_plate is None or self._plate.id != self._previous_plate.id)
@@ -117,6 +135,8 @@ class ScanResult:
     def print_summary(self):
         self._log.debug('Frame {}'.format(self._frame_number))
         self._log.debug("Scan Duration: {0:.3f} secs".format(self.scan_time()))
+        if self._stage_timer.is_enabled():
+            self._log.debug("Stage Times: {}".format(self.stage_times_summary()))
 
         if self.any_finder_patterns():
             self._log.debug("Barcodes Located: {}".format(len(self._barcodes)))
@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+
+
+class _NullStage:
+    """ Context used for every stage when timing is disabled; does nothing. """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, timer, name):
+        self._timer = timer
+        self._name = name
+
+    def __enter__(self):
+        self._timer._enter(self._name)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._timer._exit()
+        return False
+
+
+class StageTimer:
+    """ Records how long is spent in each stage of a scan, e.g.:
+
+        with timer.stage(StageTimer.LOCATE):
+            ...
+
+    The time for a stage that is entered more than once is added up. Stages may be nested; time spent in
+    the inner stage is not counted towards the outer one, so the stage times add up to the total time
+    spent in all of the stages. When the timer is disabled, stage() returns a shared context that does
+    nothing, so the instrumentation costs next to nothing.
+    """
+    GRAY = "gray"
+    LOCATE = "locate"
+    GEOMETRY = "geometry"
+    EMPTY_DETECTION = "empty detection"
+    DECODE = "decode"
+    MERGE = "merge"
+
+    def __init__(self, enabled=True):
+        self._enabled = enabled
+        self._times = OrderedDict()
+        self._active = []
+        self._mark = 0
+
+    def is_enabled(self):
+        return self._enabled
+
+    def stage(self, name):
+        """ Context manager which times the stage with the given name. """
+        if not self._enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def times(self):
+        """ Time spent (in seconds) in each stage, in the order that the stages were first entered. """
+        return OrderedDict(self._times)
+
+    def total(self):
+        return sum(self._times.values())
+
+    def summary(self):
+        """ A one line description of the stage times, e.g. 'gray 1.2 ms; locate 130.4 ms'. """
+        return "; ".join("{} {:.1f} ms".format(name, t * 1000) for name, t in self._times.items())
+
+    def _enter(self, name):
+        now = time.perf_counter()
+        if self._active:
+            self._add(self._active[-1], now - self._mark)
+        self._active.append(name)
+        self._mark = now
+
+    def _exit(self):
+        now = time.perf_counter()
+        self._add(self._active.pop(), now - self._mark)
+        self._mark = now
+
+    def _add(self, name, seconds):
+        self._times[name] = self._times.get(name, 0) + seconds
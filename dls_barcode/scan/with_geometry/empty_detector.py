@@ -1,19 +1,38 @@
 from dls_util.image import Color
 from dls_util.cv import CircleDetector
+from dls_util.shape import Point, Circle
 
 
 class EmptySlotDetector:
+    # For Unipuck, empty hole radius is about 1.1-1.3 x barcode radius
+    MIN_FACTOR = 1.00
+    MAX_FACTOR = 1.50
+
+    # For Unipuck, separation between closest neighbours is about 3.7-3.9 x barcode radius
+    SEPARATION_FACTOR = 3.6
+
+    # Half the size of the area searched around a slot, relative to the barcode radius: room for the largest
+    # hole if the puck has moved by up to half a barcode radius since the slot position was predicted
+    NEIGHBOURHOOD_FACTOR = MAX_FACTOR + 0.5
+
     def __init__(self):
         pass
 
     @staticmethod
-    def detect(image, barcodes):
+    def detect(image, barcodes, geometry=None):
+        """ Find the empty slots (holes) in the image. If the geometry of the puck is known approximately
+        (e.g. from the previous frame) and the barcodes are all within its slots, only the neighbourhoods
+        of the other slots are searched rather than the whole image. """
         if len(barcodes) == 0:
             return []
 
         avg_radius = sum([b.radius() for b in barcodes]) / len(barcodes)
 
-        circles = EmptySlotDetector._hole_detection(image, avg_radius)
+        neighbourhoods = EmptySlotDetector._slot_neighbourhoods(geometry, barcodes, avg_radius)
+        if neighbourhoods is None:
+            circles = EmptySlotDetector._hole_detection(image, avg_radius)
+        else:
+            circles = EmptySlotDetector._hole_detection_near_slots(image, avg_radius, neighbourhoods)
 
         # Exclude any points that overlap known barcode locations
         bc_centers = [bc.center() for bc in barcodes]
@@ -36,24 +55,61 @@ class EmptySlotDetector:
 
     @staticmethod
     def _hole_detection(image, avg_barcode_radius):
-        # For Unipuck, empty hole radius is about 1.1-1.3 x barcode radius
-        MIN_FACTOR = 1.00
-        MAX_FACTOR = 1.50
+        detector = EmptySlotDetector._hole_detector(avg_barcode_radius)
+        circles = detector.find_circles(image)
 
-        # For Unipuck, separation between closest neighbours is about 3.7-3.9 x barcode radius
-        SEPARATION_FACTOR = 3.6
+        return circles
 
-        min_radius = MIN_FACTOR * avg_barcode_radius
-        max_radius = MAX_FACTOR * avg_barcode_radius
-        min_dist = SEPARATION_FACTOR * avg_barcode_radius
+    @staticmethod
+    def _hole_detection_near_slots(image, avg_barcode_radius, neighbourhoods):
+        """ Search for holes within each of the (square) neighbourhoods only. A hole found from more than
+        one neighbourhood is only counted once. """
+        self = EmptySlotDetector
+        detector = self._hole_detector(avg_barcode_radius)
+        min_dist = self.SEPARATION_FACTOR * avg_barcode_radius
+
+        circles = []
+        for center, half_size in neighbourhoods:
+            sub_image, roi_rect = image.sub_image(center, half_size)
+            if sub_image.width == 0 or sub_image.height == 0:
+                continue
+
+            offset = Point(roi_rect[0], roi_rect[1])
+            for circle in detector.find_circles(sub_image):
+                circle = Circle(circle.center() + offset, circle.radius())
+                if all(circle.center().distance_to(c.center()) >= min_dist for c in circles):
+                    circles.append(circle)
+
+        return circles
+
+    @staticmethod
+    def _hole_detector(avg_barcode_radius):
+        self = EmptySlotDetector
+        min_radius = self.MIN_FACTOR * avg_barcode_radius
+        max_radius = self.MAX_FACTOR * avg_barcode_radius
+        min_dist = self.SEPARATION_FACTOR * avg_barcode_radius
 
         detector = CircleDetector()
         detector.set_minimum_radius(min_radius)
         detector.set_maximum_radius(max_radius)
         detector.set_minimum_separation(min_dist)
-        circles = detector.find_circles(image)
+        return detector
 
-        return circles
+    @staticmethod
+    def _slot_neighbourhoods(geometry, barcodes, avg_barcode_radius):
+        """ The square areas, as (center, half size), around each slot of the geometry that doesn't contain
+        a barcode. Returns None if there is no geometry or it doesn't fit the
+        barcodes. """
+        if geometry is None:
+            return None
+
+        filled = geometry.containing_slots([bc.center() for bc in barcodes])
+        if None in filled:
+            return None
+
+        half_size = EmptySlotDetector.NEIGHBOURHOOD_FACTOR * avg_barcode_radius
+        return [(geometry.slot_center(n), half_size)
+                for n in range(1, geometry.num_slots() + 1) if n not in filled]
 
     @staticmethod
     def _puck_detection(image, approx_radius, tolerance=0.1):
@@ -0,0 +1,122 @@
+from __future__ import division
+
+import numpy as np
+
+from dls_util.shape import Point
+
+
+class GeometryCache:
+    """ Holds the geometry of the puck as calculated for a recent frame, so that it can be used again for
+    the following frames instead of being calculated from scratch. Most frames in a scan session show the
+    same stationary puck.
+
+    The geometry is only reused while the barcodes in the new frame are in the same places as they were
+    in the frame that the geometry was calculated for, and the area of the image around the puck's
+    feature (notch) looks the same.
+    """
+    # The geometry is reused if the barcodes have moved by no more than this (median, in pixels). The center
+    # of a single barcode can shift by several pixels between frames depending on how it was found, so the
+    # median is used rather than the mean
+    MAX_RESIDUAL = 2.0
+    # A barcode is compared with the closest barcode from the cached frame if it is within this fraction of
+    # the slot radius of it; otherwise it is a barcode that wasn't found in that frame
+    MATCH_DISTANCE_FACTOR = 0.5
+    # Number of barcodes that must match those from the cached frame (if that frame had this many)
+    MIN_MATCHES = 2
+
+    # Half the size of the square area of the image kept around the feature, relative to the puck radius
+    NOTCH_WINDOW_FACTOR = 0.15
+    # The geometry is not reused if the mean difference in gray level around the feature is more than this
+    MAX_NOTCH_DIFFERENCE = 20
+
+    def __init__(self):
+        self._geometry = None
+        self._centers = None
+        self._notch_window = None
+        self._notch_patch = None
+
+    def geometry(self):
+        """ The cached geometry, or None if there isn't one. """
+        return self._geometry
+
+    def clear(self):
+        self._geometry = None
+        self._centers = None
+        self._notch_window = None
+        self._notch_patch = None
+
+    def store(self, geometry, barcodes, frame_img):
+        """ Keep the geometry of the frame along with the positions of the barcodes and (if the geometry
+        was located from the feature) the area around the feature in the frame. """
+        self.clear()
+        if geometry is None or not barcodes:
+            return
+
+        self._geometry = geometry
+        self._centers = self._barcode_centers(barcodes)
+
+        # A geometry that was calculated from the barcodes rather than located from the feature can only
+        # be checked against the barcodes
+        feature = geometry.feature_center()
+        if feature is not None:
+            half_size = max(1, int(geometry.radius() * self.NOTCH_WINDOW_FACTOR))
+            self._notch_window = self._window(frame_img, feature, half_size)
+            self._notch_patch = self._patch(frame_img, self._notch_window).copy()
+
+    def has_feature(self):
+        """ True if the cached geometry was located from the feature, so can be checked with notch_matches()
+        before the frame is searched for barcodes. """
+        return self._notch_patch is not None
+
+    def barcodes_match(self, barcodes):
+        """ True if the barcodes found in a new frame are where they were in the cached frame (to within
+        MAX_RESIDUAL), apart from any new barcodes, which must be within the slots of the geometry. """
+        if self._geometry is None or not barcodes:
+            return False
+
+        centers = self._barcode_centers(barcodes)
+        differences = centers[:, np.newaxis, :] - self._centers[np.newaxis, :, :]
+        distances = np.sqrt(np.min(np.sum(differences ** 2, axis=2), axis=1))
+
+        matched = distances <= self._geometry.slot_radius() * self.MATCH_DISTANCE_FACTOR
+        if np.count_nonzero(matched) < min(self.MIN_MATCHES, len(self._centers)):
+            return False
+
+        residual = np.median(distances[matched])
+        if residual > self.MAX_RESIDUAL:
+            return False
+
+        # Barcodes that weren't in the cached frame must still be in one of the slots
+        new_points = [Point(x, y) for x, y in centers[~matched]]
+        return None not in self._geometry.containing_slots(new_points)
+
+    def notch_matches(self, frame_img):
+        """ True if the area around the puck's feature looks the same in a new frame as in the cached frame.
+        This is a cheap check that can be made before searching the frame for barcodes. """
+        if self._geometry is None:
+            return False
+        if self._notch_patch is None:
+            return True
+
+        patch = self._patch(frame_img, self._notch_window)
+        if patch.shape != self._notch_patch.shape:
+            return False
+
+        difference = np.mean(np.abs(patch.astype(np.int16) - self._notch_patch))
+        return difference <= self.MAX_NOTCH_DIFFERENCE
+
+    @staticmethod
+    def _barcode_centers(barcodes):
+        return np.array([(bc.center().x, bc.center().y) for bc in barcodes], dtype=float)
+
+    @staticmethod
+    def _window(frame_img, center, half_size):
+        height, width = frame_img.img.shape[:2]
+        x0, y0 = int(max(center.x - half_size, 0)), int(max(center.y - half_size, 0))
+        x1, y1 = int(min(center.x + half_size, width)), int(min(center.y + half_size, height))
+        return x0, y0, x1, y1
+
+    @staticmethod
+    def _patch(frame_img, window):
+        x0, y0, x1, y1 = window
+        return frame_img.img[y0:y1, x0:x1]
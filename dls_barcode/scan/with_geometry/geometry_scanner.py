@@ -1,19 +1,30 @@
 from __future__ import division
+import copy
 import logging
 from dls_barcode.camera.scanner_message import ScanErrorMessage
 
 
-from dls_barcode.datamatrix import DataMatrix
+from dls_barcode.datamatrix import DataMatrix, FinderPatternTracker
+from dls_barcode.geometry.unipuck_feature_template import UnipuckFeatureTemplate
 from dls_barcode.geometry.unipuck_locator import UnipuckLocator
 from dls_barcode.plate import Plate, Slot
 from dls_barcode.plate.geometry_adjuster import UnipuckGeometryAdjuster, GeometryAdjustmentError
 from dls_barcode.geometry import Geometry, GeometryException
 from .empty_detector import EmptySlotDetector
+from .geometry_cache import GeometryCache
 from .plate_scanner import PlateScanner
 from ..scan_result import ScanResult
+from ..stage_timer import StageTimer
 from ..no_barcodes_detected_error import NoBarcodesDetectedError
 
 class GeometryScanner:
+    # Number of threads used to run the parameter sets of the deep locate concurrently
+    LOCATE_WORKERS = 4
+    # When the puck has been found, barcodes are only searched for within its bounds expanded by this factor
+    LOCATE_REGION_MARGIN = 1.1
+    # Frames wider than this are searched coarse-to-fine, starting with a copy reduced to this width
+    LOCATE_FULL_WIDTH = 1600
+
     def __init__(self, plate_type, barcode_sizes):
         self.plate_type = plate_type
         self.barcode_sizes = barcode_sizes
@@ -27,20 +38,30 @@ class GeometryScanner:
         self._barcodes = []
         self._is_single_image = False
         self._frame_result = None
+        self._tracker = FinderPatternTracker()
+        self._geometry_cache = GeometryCache()
         self.log = logging.getLogger(".".join([__name__]))
 
+        # Read the feature template now so that if it is missing the scanner fails to start, rather than
+        # failing on every frame
+        if self.plate_type == Geometry.UNIPUCK:
+            UnipuckFeatureTemplate.load()
+
     def scan_next_frame(self, frame, is_single_image=False):
         self._new_frame()
 
-        self._frame_img = frame.convert_to_gray()
+        with self._frame_result.stage(StageTimer.GRAY):
+            self._frame_img = frame.convert_to_gray()
         self._is_single_image = is_single_image
 
         try:
             self._perform_frame_scan()
+            self._update_geometry_cache()
             self._frame_result.set_plate(self._plate)
             self._frame_result.set_frame(frame)
         #TODO: use logs
         except (NoBarcodesDetectedError, GeometryException, GeometryAdjustmentError) as ex:
+            self._geometry_cache.clear()
             self.log.error(ex)
             self._frame_result.set_error(ScanErrorMessage(str(ex)))
             self._frame_result.set_frame(frame)
@@ -61,33 +82,97 @@ class GeometryScanner:
         self._frame_result.start_timer()
 
     def _perform_frame_scan(self):
-        self._barcodes = self._locate_all_barcodes_in_image()
+        stage = self._frame_result.stage
+        # Use the geometry from a previous frame (if it can be) or find the puck first, so that the
+        # (expensive) barcode search can be limited to the area it covers
+        cached_geometry = self._cached_geometry()
+        if cached_geometry is not None:
+            # A cached geometry that was calculated from the barcodes is only checked once they are found
+            self._geometry = cached_geometry if self._geometry_cache.has_feature() else None
+        elif self.plate_type == Geometry.UNIPUCK:
+            with stage(StageTimer.GEOMETRY):
+                self._geometry = UnipuckLocator(self._frame_img).find_location() # do something if location not found
+
+        tracker_state = copy.copy(self._tracker)
+        with stage(StageTimer.LOCATE):
+            self._barcodes = self._locate_all_barcodes_in_image()
+
+        if cached_geometry is not None:
+            self._check_cached_geometry(tracker_state)
         self._frame_result.set_barcodes(self._barcodes)
-        if self.plate_type == Geometry.UNIPUCK:
-            self._geometry = UnipuckLocator(self._frame_img).find_location() # do something if location not found
+
         if self._geometry is None:
-            self._geometry = self._calculate_geometry()
+            with stage(StageTimer.GEOMETRY):
+                self._geometry = self._calculate_geometry()
 
         self._frame_result.set_geometry(self._geometry)
 
         # Determine if the previous plate scan has any barcodes in common with this one.
-        has_common_barcodes, is_same_align = self._find_common_barcode(self._geometry, self._barcodes)
+        with stage(StageTimer.DECODE):
+            has_common_barcodes, is_same_align = self._find_common_barcode(self._geometry, self._barcodes)
 
         if has_common_barcodes and self._plate.is_full_valid():
             return
 
         elif not has_common_barcodes:
-            self._initialize_plate_from_barcodes()
+            with stage(StageTimer.MERGE):
+                self._initialize_plate_from_barcodes()
 
         elif has_common_barcodes and not is_same_align:
-            self._geometry = self._adjust_geometry(self._barcodes)
+            with stage(StageTimer.GEOMETRY):
+                self._geometry = self._adjust_geometry(self._barcodes)
 
         # Merge with old plate
         if has_common_barcodes:
-            self._merge_frame_into_plate()
+            with stage(StageTimer.MERGE):
+                self._merge_frame_into_plate()
+
+    def _cached_geometry(self):
+        """ The geometry from a previous frame, unless the area around the puck's feature has changed since. """
+        if self._is_single_image or self._geometry_cache.geometry() is None:
+            return None
+
+        with self._frame_result.stage(StageTimer.GEOMETRY):
+            if self._geometry_cache.notch_matches(self._frame_img):
+                return self._geometry_cache.geometry()
+
+        self._geometry_cache.clear()
+        return None
+
+    def _check_cached_geometry(self, tracker_state):
+        """ Use the cached geometry if the barcodes found in this frame fit it. Otherwise find the puck again
+        and, unless it can't be found and the whole frame has already been searched, repeat the search for
+        barcodes (from the same starting point) within its bounds. """
+        stage = self._frame_result.stage
+        with stage(StageTimer.GEOMETRY):
+            if self._geometry_cache.barcodes_match(self._barcodes):
+                self._geometry = self._geometry_cache.geometry()
+                return
+
+            searched_whole_frame = self._geometry is None
+            self._geometry_cache.clear()
+            self._geometry = None
+            if self.plate_type == Geometry.UNIPUCK:
+                self._geometry = UnipuckLocator(self._frame_img).find_location()
+
+        if self._geometry is not None or not searched_whole_frame:
+            self._tracker = tracker_state
+            with stage(StageTimer.LOCATE):
+                self._barcodes = self._locate_all_barcodes_in_image()
+
+    def _update_geometry_cache(self):
+        """ Keep the geometry of this frame for the next one, unless it was taken from the cache (in
+        which case the cache still holds the barcode positions that it was calculated for). """
+        if not self._is_single_image and self._geometry is not self._geometry_cache.geometry():
+            self._geometry_cache.store(self._geometry, self._barcodes, self._frame_img)
 
     def _locate_all_barcodes_in_image(self):
-        barcodes = DataMatrix.locate_all_barcodes_in_image_deep(self._frame_img, self.barcode_sizes)
+        # Single images are always searched in full; frames from a stream follow the previous frame's barcodes
+        tracker = None if self._is_single_image else self._tracker
+        region = self._geometry.bounds().scale(self.LOCATE_REGION_MARGIN) if self._geometry is not None else None
+        scale = min(1.0, self.LOCATE_FULL_WIDTH / self._frame_img.width)
+        barcodes = DataMatrix.locate_all_barcodes_in_image_deep(self._frame_img, self.barcode_sizes,
+                                                                self.LOCATE_WORKERS, tracker, region, scale)
         if len(barcodes) == 0:
             # log = logging.getLogger(".".join([__name__]))
             # log.error(NoBarcodesDetectedError())
@@ -100,24 +185,33 @@ class GeometryScanner:
         if self.plate_type == Geometry.UNIPUCK:
             use_emptys = len(self._barcodes) < 8
             if use_emptys:
-                empty_circles = EmptySlotDetector.detect(self._frame_img, self._barcodes)
+                with self._frame_result.stage(StageTimer.EMPTY_DETECTION):
+                    empty_circles = EmptySlotDetector.detect(self._frame_img, self._barcodes,
+                                                             self._previous_geometry())
                 empty_centers = [c.center() for c in empty_circles]
                 slot_centers.extend(empty_centers)
 
         geometry = Geometry.calculate_geometry(self.plate_type, slot_centers)
         return geometry
 
+    def _previous_geometry(self):
+        """ The geometry of the plate in the previous frame, which predicts roughly where the slots are in
+        this frame (if the puck hasn't been replaced). Single images have no previous frame. """
+        if self._is_single_image or self._plate is None:
+            return None
+        return self._plate.geometry()
+
     def _initialize_plate_from_barcodes(self):
         if self._frame_img is not None:
             self._plate = Plate(self.plate_type)
             self._plate_scan = PlateScanner(self._plate, self._is_single_image)
-            self._plate_scan.new_frame(self._frame_img, self._geometry, self._barcodes)
+            self._plate_scan.new_frame(self._frame_img, self._geometry, self._barcodes, self._frame_result)
 
     def _merge_frame_into_plate(self):
         # If one of the barcodes matches the previous frame and is aligned in the same slot, then we can
         # be fairly sure we are dealing with the same plate. Copy all of the barcodes that we read in the
         # previous plate over to their slot in the new plate. Then read any that we haven't already read.
-        self._plate_scan.new_frame(self._frame_img, self._geometry, self._barcodes)
+        self._plate_scan.new_frame(self._frame_img, self._geometry, self._barcodes, self._frame_result)
 
     def _find_common_barcode(self, geometry, barcodes):
         """ Determine if the set of finder patterns has any barcodes in common with the existing plate.
@@ -132,29 +226,33 @@ class GeometryScanner:
 
         slotted_barcodes = self._make_slotted_barcodes_list(barcodes, geometry)
 
-        # Determine if the previous plate scan has any barcodes in common with this one.
+        # Only interested in reading barcodes that might match existing ones
+        candidates = []
         for i in range(self._plate.num_slots):
             old_slot = self._plate.slot(i)
             new_bc = slotted_barcodes[i-1]
+            if new_bc is not None and old_slot.state() == Slot.VALID:
+                candidates.append((old_slot, new_bc))
 
-            # Only interested in reading barcodes that might match existing ones
-            if new_bc is None or old_slot.state() != Slot.VALID:
-                continue
-
-            # Read the barcode
-            new_bc.perform_read(self._frame_img)
+        # Read the barcodes a batch at a time; usually only one or two need to be read before we are done
+        batch_size = DataMatrix.READ_WORKERS
+        for start in range(0, len(candidates), batch_size):
+            batch = candidates[start:start + batch_size]
+            DataMatrix.read_many([new_bc for _, new_bc in batch], self._frame_img)
 
-            if not new_bc.is_valid():
-                continue
+            # Determine if the previous plate scan has any barcodes in common with this one.
+            for old_slot, new_bc in batch:
+                if not new_bc.is_valid():
+                    continue
 
-            num_common_barcodes += 1
-            has_common_geometry = new_bc.data() == old_slot.barcode_data()
-            has_common_barcodes = has_common_geometry or self._plate.contains_barcode(new_bc.data())
+                num_common_barcodes += 1
+                has_common_geometry = new_bc.data() == old_slot.barcode_data()
+                has_common_barcodes = has_common_geometry or self._plate.contains_barcode(new_bc.data())
 
-            # If the geometry of this and the previous frame line up, then we are done. Otherwise we
-            # need to read at least 2 barcodes so we can perform a realignment.
-            if has_common_geometry or num_common_barcodes >= 2:
-                break
+                # If the geometry of this and the previous frame line up, then we are done. Otherwise we
+                # need to read at least 2 barcodes so we can perform a realignment.
+                if has_common_geometry or num_common_barcodes >= 2:
+                    return has_common_barcodes, has_common_geometry
 
         return has_common_barcodes, has_common_geometry
 
@@ -162,8 +260,8 @@ class GeometryScanner:
     def _make_slotted_barcodes_list(barcodes, geometry):
         # Make a list of the unread barcodes with associated slot numbers - from this frame's geometry
         slotted_bcs = [None] * geometry.num_slots()
-        for bc in barcodes:
-            slot_num = geometry.containing_slot(bc.center())
+        slot_nums = geometry.containing_slots([bc.center() for bc in barcodes])
+        for bc, slot_num in zip(barcodes, slot_nums):
             if slot_num is not None:
                 slotted_bcs[slot_num - 1] = bc
 
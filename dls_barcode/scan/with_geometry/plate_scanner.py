@@ -1,6 +1,9 @@
 import numpy as np
 import cv2
 
+from dls_barcode.datamatrix import DataMatrix
+from dls_barcode.plate.slot import Slot
+from dls_barcode.scan.stage_timer import StageTimer
 from dls_barcode.scan.with_geometry.slot_scanner import SlotScanner
 
 
@@ -15,7 +18,7 @@ class PlateScanner:
         self._plate = plate
         self._force_deep_scan = single_frame
 
-    def new_frame(self, frame_img, geometry, barcodes):
+    def new_frame(self, frame_img, geometry, barcodes, scan_result=None):
         """ Merge the set of barcodes from a new scan into the plate. The new set comes from a new image
         of the same plate, so will almost certainly contain many of the same barcodes. Actually reading a
         barcode is relatively expensive; we iterate through each slot in the plate and only attempt to
@@ -25,32 +28,60 @@ class PlateScanner:
         object and update the slot position with the actual position of the center of the barcode. The
         position is likely to be similar to, but not exactly the same as, the bound's center. This info
         is retained as it allows us to properly calculate the geometry for future frames.
+
+        If a scan result is supplied, the time spent decoding barcodes and checking for empty slots is
+        recorded against those stages of its scan.
         """
+        stage = scan_result.stage if scan_result is not None else StageTimer(enabled=False).stage
         self._frame_img = frame_img
         self._barcodes = barcodes 
         self._plate.set_geometry(geometry)
         
         self.radius_avg = self._calculate_average_radius()
-        self.brightness_threshold = self._calculate_brightness_threshold()
+        with stage(StageTimer.EMPTY_DETECTION):
+            self.brightness_threshold = self._calculate_brightness_threshold()
+
+        # Find the barcode from the new set that is in each slot position
+        slots = self._plate.slots()
+        slot_barcodes = self._plate.match_barcodes(self._barcodes)
+
+        # Read all of the barcodes that are needed in one batch
+        to_read = [bc for slot, bc in zip(slots, slot_barcodes) if bc and slot.state() != Slot.VALID]
+        with stage(StageTimer.DECODE):
+            DataMatrix.read_many(to_read, self._frame_img)
 
         # Fill each slot with the correct barcodes
-        for slot in self._plate.slots():
-            self._new_slot_frame(slot)
+        with stage(StageTimer.EMPTY_DETECTION):
+            for slot, barcode in zip(slots, slot_barcodes):
+                self._new_slot_position(slot, barcode)
+
+            slots_empty = self._classify_empty_slots(slots)
+            for slot, barcode, is_empty in zip(slots, slot_barcodes, slots_empty):
+                self._new_slot_frame(slot, barcode, is_empty)
 
-    def _new_slot_frame(self, slot):
+    @staticmethod
+    def _new_slot_position(slot, barcode):
         slot.new_frame()
 
-        # Find the barcode from the new set that is in the slot position
-        barcode = slot.find_matching_barcode(self._barcodes)
         position = barcode.center() if barcode else slot.bounds().center()
         slot.set_barcode_position(position)
-        
+
+    def _new_slot_frame(self, slot, barcode, is_empty):
         #slot_image = self._slot_image(slot)
         #cv2.imshow("Slot image", slot_image.img)
         #cv2.waitKey(0) 
 
-        slot_scanner = SlotScanner(self._frame_img, slot, barcode, self.radius_avg, self.brightness_threshold)
+        slot_scanner = SlotScanner(self._frame_img, slot, barcode, self.radius_avg, self.brightness_threshold,
+                                   is_empty)
         slot_scanner.scan_slot()
+
+    def _classify_empty_slots(self, slots):
+        """ Decide for every slot at once whether it looks empty, i.e. whether the small area at its
+        barcode position is darker than the brightness threshold. """
+        size = self.radius_avg / 2
+        brightness = self._frame_img.calculate_brightnesses([slot.barcode_position() for slot in slots],
+                                                            size, size)
+        return brightness < self.brightness_threshold
     
     def _calculate_average_radius(self):
         if self._barcodes:
@@ -68,15 +99,11 @@ class PlateScanner:
         pixels. This allows us to distinguish between an empty slot with no pin, and a slot with a pin
         where we just haven't been able to locate the barcode.
         """
-        pin_brights = []
-        for bc in self._barcodes:
-            size = bc.radius() / 2
-            center_in_frame = self._image_contains_point(bc.center(), radius=size)
-            if center_in_frame:
-                brightness = self._frame_img.calculate_brightness(bc.center(), size, size)
-                pin_brights.append(brightness)
-
-        if any(pin_brights):
+        in_frame = [bc for bc in self._barcodes if self._image_contains_point(bc.center(), radius=bc.radius() / 2)]
+        sizes = [bc.radius() / 2 for bc in in_frame]
+        pin_brights = self._frame_img.calculate_brightnesses([bc.center() for bc in in_frame], sizes, sizes)
+
+        if np.any(pin_brights):
             avg_brightness = np.mean(pin_brights)
         else:
             avg_brightness = 0
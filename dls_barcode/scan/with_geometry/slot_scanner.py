@@ -9,7 +9,7 @@ from dls_barcode.plate.slot import Slot
 class SlotScanner:
     FRAMES_BEFORE_DEEP = 3
     
-    def __init__(self, image, slot, barcode, radius_avg, brightness_threshold):
+    def __init__(self, image, slot, barcode, radius_avg, brightness_threshold, is_empty=None):
         self._log = logging.getLogger(".".join([__name__]))
 
         self.image = image
@@ -19,8 +19,13 @@ class SlotScanner:
         self.radius_avg = radius_avg
         self.side_avg = self.radius_avg * (2 / math.sqrt(2))
         self.brightness_threshold = brightness_threshold
+        # Whether the slot looks empty, if this has already been worked out (e.g. for all slots at once)
+        self._is_empty = is_empty
 
     def is_slot_empty(self):
+        if self._is_empty is not None:
+            return bool(self._is_empty)
+
         center = self.slot.barcode_position()
 
         # If we cant see the slot in the current frame, skip it
@@ -1,3 +1,5 @@
+import time
+
 from dls_util.cv.frame import Frame
 import cv2 as opencv
 
@@ -30,6 +32,7 @@ class CaptureManager:
         self._cap = None
         self._frame = None
         self._read_ok = False
+        self._timestamp = None
 
     def create_capture(self):
         self._cap = opencv.VideoCapture(self._camera.get_number(), opencv.CAP_DSHOW)
@@ -37,14 +40,27 @@ class CaptureManager:
         self._set_height(self._camera.get_height())
 
     def get_frame(self):
-        return Frame(self._frame)
+        return Frame(self._frame, self._timestamp)
 
     def is_read_ok(self):
         return self._read_ok
 
     def read_frame(self):
+        self._timestamp = time.perf_counter()
         self._read_ok, self._frame = self._cap.read()
 
+    def grab_frame(self):
+        """ Capture the next frame from the camera without decoding it (see retrieve_frame()). Grabbing is
+        quick, so frames from several cameras can be grabbed at nearly the same moment and then decoded. """
+        self._timestamp = time.perf_counter()
+        self._read_ok = self._cap.grab()
+        return self._read_ok
+
+    def retrieve_frame(self):
+        """ Decode the frame captured by the last call to grab_frame(). """
+        if self._read_ok:
+            self._read_ok, self._frame = self._cap.retrieve()
+
     def release_resources(self):
         if self._cap is not None:
             self._cap.release()
@@ -3,11 +3,16 @@ from dls_util.image import Image
 
 class Frame:
     
-    def __init__(self, original_frame):
+    def __init__(self, original_frame, timestamp=None):
         self._frame = original_frame
+        # Time (time.perf_counter()) at which the frame was captured, if known
+        self._timestamp = timestamp
 
         self._image =  Image(self._frame)
        
+    def timestamp(self):
+        return self._timestamp
+
     def get_copy(self):
         return self._frame.copy()
     
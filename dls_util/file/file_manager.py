@@ -19,6 +19,19 @@ class FileManager:
         with open(file_path, 'a') as file:
             file.writelines(lines)
 
+    def write_lines_atomically(self, file_path, lines):
+        """Writes the lines to a temporary file which then replaces the file, so that the file is never
+        left partly written"""
+        temp_path = file_path + '.tmp'
+        with open(temp_path, 'w') as file:
+            file.writelines(lines)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, file_path)
+
+    def replace(self, source_path, destination_path):
+        os.replace(source_path, destination_path)
+
     def is_file(self, path):
         return os.path.isfile(path)
 
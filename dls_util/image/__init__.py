@@ -1,3 +1,4 @@
 from .color import Color
 from .image import Image
+from .image_cache import ImageCache
 from .overlay import Overlay, TextOverlay
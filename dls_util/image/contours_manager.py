@@ -1,20 +1,99 @@
 import cv2
+import numpy as np
 
 
 class ContoursManager:
     """
     Image contours manager class.
+
+    The area of every contour is calculated once, the first time it is needed after the contours are found
+    (finding the largest contours only measures those that could be the largest).
+    The perimeters are calculated as they are needed and kept, so they are only calculated for the contours
+    that get that far. Use candidates() to narrow down the contours before comparing their shapes.
     """
+    _NO_MATCH = 1000000
+
     def __init__(self, image):
         self.image = image
         self.contours = []
+        self._areas = None
+        self._perimeters = {}
 
     def find_all(self):
-        self.contours, _ = cv2.findContours(self.image, cv2.RETR_LIST, cv2.CHAIN_APPROX_NONE)
+        self._find(cv2.RETR_LIST)
+
+    def find_external(self):
+        """ Find only the outer contours, leaving out the contours of any holes within them. """
+        self._find(cv2.RETR_EXTERNAL)
+
+    def _find(self, mode):
+        self.contours, _ = cv2.findContours(self.image, mode, cv2.CHAIN_APPROX_NONE)
+        self._areas = None
+        self._perimeters = {}
+
+    def areas(self):
+        """ Array of the area of each contour. """
+        if self._areas is None:
+            self._areas = np.array([cv2.contourArea(cnt) for cnt in self.contours], dtype=float)
+        return self._areas
+
+    def perimeter(self, i):
+        """ Perimeter of the numbered contour. """
+        if i not in self._perimeters:
+            self._perimeters[i] = cv2.arcLength(self.contours[i], True)
+        return self._perimeters[i]
 
     def get_lagerst(self):
-        cnts = sorted(self.contours, key=cv2.contourArea, reverse=True)
-        return cnts[0]
+        return self.get_largest(1)[0]
+
+    def get_largest(self, count):
+        """ The specified number of contours with the largest areas, largest first. Only the largest
+        contours are put in order, rather than sorting all of them. """
+        areas = self.areas() if self._areas is not None else self._areas_of_largest(count)
+        if 0 < count < len(areas):
+            # Keep everything as large as the count'th largest area so that, as with a stable sort, the
+            # first of several contours with equal areas comes first
+            smallest_kept = -np.partition(-areas, count - 1)[count - 1]
+            candidates = np.flatnonzero(areas >= smallest_kept)
+        else:
+            candidates = np.arange(len(areas))
+        order = sorted(candidates, key=lambda i: (-areas[i], i))[:count]
+        return [self.contours[i] for i in order]
+
+    def _areas_of_largest(self, count):
+        """ The areas of the contours, except that contours which must be smaller than the count'th largest
+        are not measured and have an area of -inf. The points of a contour are neighbouring pixels, so its
+        perimeter is at most sqrt(2) times the number of points and its area at most n^2 / (2 pi). """
+        lengths = np.array([len(cnt) for cnt in self.contours], dtype=float)
+        areas = np.full(len(lengths), -np.inf)
+        if len(lengths) == 0 or count <= 0:
+            return areas
+
+        longest = np.argsort(-lengths, kind='stable')[:count]
+        for i in longest:
+            areas[i] = cv2.contourArea(self.contours[i])
+        smallest_kept = np.min(areas[longest])
+
+        for i in np.flatnonzero(lengths ** 2 / (2 * np.pi) >= smallest_kept):
+            if areas[i] == -np.inf:
+                areas[i] = cv2.contourArea(self.contours[i])
+        return areas
+
+    def candidates(self, min_area=None, max_area=None, min_perimeter=None, max_perimeter=None):
+        """ Indices of the contours whose area and perimeter are within the specified ranges. """
+        areas = self.areas()
+        keep = np.ones(len(areas), dtype=bool)
+        if min_area is not None:
+            keep &= areas >= min_area
+        if max_area is not None:
+            keep &= areas <= max_area
+
+        indices = np.flatnonzero(keep)
+        if min_perimeter is not None or max_perimeter is not None:
+            low = min_perimeter if min_perimeter is not None else -np.inf
+            high = max_perimeter if max_perimeter is not None else np.inf
+            indices = [i for i in indices if low <= self.perimeter(i) <= high]
+        return list(indices)
 
     def draw_all_contours_self(self, color, thickness):
         cv2.drawContours(self.image, self.contours, -1, color.rgb(), thickness)
@@ -28,16 +107,17 @@ class ContoursManager:
     def draw_largest_cnt(self, img, color, thickness):  # negative thickness means filled
         cv2.drawContours(img, [self.get_lagerst()], - 1, color.rgb(), thickness)
 
-    def match_shapes(self, contour_pattern):
-        ret_min = 1000000
+    def match_shapes(self, contour_pattern, candidates=None):
+        """ Find the contour that is the closest in shape to the pattern. Returns the match factor (lower
+        is better) and the contour. If a list of candidate indices is given, only those are compared. """
+        if candidates is None:
+            candidates = range(len(self.contours))
+
+        ret_min = self._NO_MATCH
         cnt_min = None
-        for cnt_m in self.contours:
-            ret = cv2.matchShapes(contour_pattern, cnt_m, 1, 0.0)
+        for i in candidates:
+            ret = cv2.matchShapes(contour_pattern, self.contours[i], cv2.CONTOURS_MATCH_I1, 0.0)
             if ret < ret_min:
                 ret_min = ret
-                cnt_min = cnt_m
+                cnt_min = self.contours[i]
         return ret_min, cnt_min
-
-
-
-
@@ -32,6 +32,10 @@ class Image:
         # All draw requests will be offset by this amount
         self.draw_offset = Point(0, 0)
 
+        # Integral image, calculated the first time that it is needed (see integral())
+        self._integral = None
+        self._integral_of = None
+
     def size(self):
         return self.size()
 
@@ -56,9 +60,10 @@ class Image:
         blank_image = np.full((height, width, channels), value, np.uint8)
         return Image(img=blank_image)
 
-    def save_as(self, filename):
-        """ Write the image to the specified file. """
-        opencv.imwrite(filename, self.img)
+    def save_as(self, filename, params=None):
+        """ Write the image to the specified file. The optional params are the OpenCV encoding
+        parameters (e.g. [cv2.IMWRITE_JPEG_QUALITY, 90]). """
+        opencv.imwrite(filename, self.img, params if params is not None else [])
 
     def popup(self):
         """Pop up a window to display an image until a key is pressed (blocking)."""
@@ -293,3 +298,50 @@ class Image:
 
         brightness = np.sum(self.img[y1:y2, x1:x2]) / (width * height)
         return brightness
+
+    def calculate_brightnesses(self, centers, widths, heights):
+        """ Return an array of the average brightness over the region surrounding each of the points, as
+        calculate_brightness() would for each one. The width and height may be a single value or one value
+        per point. Regions which extend past the edge of the image are cut off at the edge.
+
+        The sum over each region is looked up in the integral image, so each region costs the same however
+        large it is.
+        """
+        count = len(centers)
+        if count == 0:
+            return np.zeros(0)
+
+        cx = np.array([c.x for c in centers], dtype=float)
+        cy = np.array([c.y for c in centers], dtype=float)
+        widths = np.broadcast_to(np.asarray(widths, dtype=float), (count,))
+        heights = np.broadcast_to(np.asarray(heights, dtype=float), (count,))
+
+        x1, y1 = np.round(cx - widths / 2), np.round(cy - heights / 2)
+        x2, y2 = np.round(x1 + widths), np.round(y1 + heights)
+
+        return self.region_sums(x1, y1, x2, y2) / (widths * heights)
+
+    def region_sums(self, x1, y1, x2, y2):
+        """ Return the sum of the pixel values (over all channels) within each of the rectangles
+        [x1, x2) x [y1, y2), given as arrays of coordinates. The rectangles are cut off at the edges
+        of the image. """
+        integral = self.integral()
+        h, w = self.img.shape[:2]
+        x1, x2 = np.clip(x1, 0, w).astype(int), np.clip(x2, 0, w).astype(int)
+        y1, y2 = np.clip(y1, 0, h).astype(int), np.clip(y2, 0, h).astype(int)
+        x2, y2 = np.maximum(x1, x2), np.maximum(y1, y2)
+
+        sums = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+        if sums.ndim > 1:
+            sums = np.sum(sums, axis=1)
+        return sums
+
+    def integral(self):
+        """ The integral image (summed area table) of the image: an array one larger than the image in
+        each dimension, where the value at (y, x) is the sum of all of the pixels above and to the left
+        of (y, x). It is calculated once and kept, so the image should not be drawn on after this has
+        been used. """
+        if self._integral is None or self._integral_of is not self.img:
+            self._integral = opencv.integral(self.img, sdepth=opencv.CV_64F)
+            self._integral_of = self.img
+        return self._integral
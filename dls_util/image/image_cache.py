@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+
+
+class ImageCache:
+    """ Thread-safe cache of Images, which discards the least recently used images when the total
+    size of the images is more than the limit (in bytes). The cached images are shared, so must not be
+    changed; copy an image before drawing on it.
+    """
+    def __init__(self, max_bytes):
+        self._images = OrderedDict()
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """ The image for the key, or None if it isn't in the cache. """
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def put(self, key, image):
+        """ Add the image to the cache, discarding the least recently used images if the cache is full.
+        An image that is larger than the whole cache isn't kept. """
+        size = image.img.nbytes
+        with self._lock:
+            self._remove(key)
+            if size > self._max_bytes:
+                return
+
+            self._images[key] = image
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                _, oldest = self._images.popitem(last=False)
+                self._bytes -= oldest.img.nbytes
+
+    def discard(self, key):
+        """ Remove the image for the key from the cache, if it is there. """
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._bytes = 0
+
+    def total_bytes(self):
+        """ Total size of the images in the cache. """
+        with self._lock:
+            return self._bytes
+
+    def __len__(self):
+        with self._lock:
+            return len(self._images)
+
+    def _remove(self, key):
+        image = self._images.pop(key, None)
+        if image is not None:
+            self._bytes -= image.img.nbytes
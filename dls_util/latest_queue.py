@@ -0,0 +1,57 @@
+import threading
+from collections import deque
+
+
+class LatestQueue:
+    """ Thread-safe bounded queue for passing frames to a worker that may not keep up with them.
+
+    When the queue is full, putting a new item drops the oldest one, so the worker always gets the most
+    recent items (latest wins). The number of items dropped in this way is counted.
+    """
+    def __init__(self, max_size=1):
+        if max_size < 1:
+            raise ValueError("The queue must be able to hold at least one item")
+
+        self._items = deque()
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._dropped = 0
+        self._max_depth = 0
+
+    def put(self, item):
+        """ Add the item to the queue, dropping the oldest item if the queue is full. Returns True if an
+        item was dropped. """
+        with self._lock:
+            dropped = len(self._items) >= self._max_size
+            if dropped:
+                self._items.popleft()
+                self._dropped += 1
+            self._items.append(item)
+            self._max_depth = max(self._max_depth, len(self._items))
+        return dropped
+
+    def get(self):
+        """ Remove and return the oldest item in the queue, or None if it is empty. Doesn't block. """
+        with self._lock:
+            return self._items.popleft() if self._items else None
+
+    def clear(self):
+        """ Remove every item from the queue. The items removed are counted as dropped. """
+        with self._lock:
+            self._dropped += len(self._items)
+            self._items.clear()
+
+    def depth(self):
+        """ Number of items currently waiting in the queue. """
+        with self._lock:
+            return len(self._items)
+
+    def max_depth(self):
+        """ Largest number of items that have been waiting in the queue at once. """
+        with self._lock:
+            return self._max_depth
+
+    def dropped(self):
+        """ Number of items that were dropped (replaced by newer ones) without being taken off the queue. """
+        with self._lock:
+            return self._dropped
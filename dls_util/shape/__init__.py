@@ -1,2 +1,2 @@
 from .point import Point
-from .circle import Circle
+from .circle import Circle, points_in_circles
@@ -1,6 +1,9 @@
 from __future__ import division
 
 import math
+
+import numpy as np
+
 from .point import Point
 
 
@@ -64,4 +67,15 @@ class Circle:
         y = float(tokens[1])
         r = float(tokens[2])
         center = Point(x, y)
-        return Circle(center, r)
\ No newline at end of file
+        return Circle(center, r)
+
+
+def points_in_circles(points, centers, radii):
+    """ Test many points against many circles at once. The points are a list of Points, the centers an
+    array of shape (circles, 2) and the radii an array of shape (circles,). Returns a boolean array of shape
+    (points, circles) which is True where the point is within the circle's radius, as in
+    Circle.contains_point(). """
+    coords = np.array([(p.x, p.y) for p in points], dtype=float).reshape(-1, 2)
+    dx = coords[:, 0, np.newaxis] - centers[:, 0]
+    dy = coords[:, 1, np.newaxis] - centers[:, 1]
+    return dx ** 2 + dy ** 2 < radii ** 2
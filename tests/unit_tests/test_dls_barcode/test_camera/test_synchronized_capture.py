@@ -0,0 +1,90 @@
+import threading
+import time
+import unittest
+
+from mock import MagicMock
+
+from dls_barcode.camera.synchronized_capture import SynchronizedCapture
+from dls_util.cv.frame import Frame
+
+
+class _FakeStream:
+    """ Camera stream which records when each frame was grabbed and fails after a number of frames. """
+    def __init__(self, frames=None):
+        self.grab_times = []
+        self._frames_left = frames
+        self._lock = threading.Lock()
+
+    def grab_frame(self):
+        with self._lock:
+            self.grab_times.append(time.perf_counter())
+            if self._frames_left is None:
+                return True
+            self._frames_left -= 1
+            return self._frames_left >= 0
+
+    def retrieve_frame(self):
+        time.sleep(0.001)
+        return Frame(MagicMock(), self.grab_times[-1])
+
+
+class TestSynchronizedCapture(unittest.TestCase):
+
+    def test_frames_are_returned_in_stream_order(self):
+        side, top = _FakeStream(), _FakeStream()
+        capture = SynchronizedCapture([side, top])
+        capture.start()
+        try:
+            frames = capture.next_frames(timeout=1)
+        finally:
+            capture.stop()
+
+        self.assertEqual(len(frames), 2)
+        self.assertIn(frames[0].timestamp(), side.grab_times)
+        self.assertIn(frames[1].timestamp(), top.grab_times)
+
+    def test_paired_frames_were_captured_together(self):
+        capture = SynchronizedCapture([_FakeStream(), _FakeStream()])
+        capture.start()
+        try:
+            for _ in range(5):
+                side_frame, top_frame = capture.next_frames(timeout=1)
+                self.assertLessEqual(abs(side_frame.timestamp() - top_frame.timestamp()),
+                                     SynchronizedCapture.MAX_SKEW)
+        finally:
+            capture.stop()
+
+    def test_failed_camera_gives_none_frame(self):
+        capture = SynchronizedCapture([_FakeStream(), _FakeStream(frames=0)])
+        capture.start()
+        try:
+            frames = capture.next_frames(timeout=1)
+        finally:
+            capture.stop()
+
+        self.assertIsNone(frames[1])
+
+    def test_next_frames_returns_none_on_timeout(self):
+        capture = SynchronizedCapture([_FakeStream(), _FakeStream()])
+        self.assertIsNone(capture.next_frames(timeout=0.01))
+
+    def test_frames_captured_apart_are_not_paired(self):
+        capture = SynchronizedCapture([MagicMock(), MagicMock()])
+        capture._buffers[0].put((0.0, "old side"))
+        capture._buffers[1].put((1.0, "top"))
+
+        self.assertIsNone(capture._pair_frames())
+        self.assertEqual(capture._buffers[0].depth(), 0)
+        self.assertEqual(capture._buffers[1].depth(), 1)
+
+    def test_stop_ends_the_capture_threads(self):
+        capture = SynchronizedCapture([_FakeStream(), _FakeStream()])
+        capture.start()
+        threads = list(capture._threads)
+        capture.stop()
+
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+
+
+if __name__ == '__main__':
+    unittest.main()
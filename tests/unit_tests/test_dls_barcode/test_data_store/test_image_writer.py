@@ -0,0 +1,168 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import cv2
+import numpy as np
+from mock import MagicMock
+
+from dls_barcode.data_store.image_writer import ImageWriter
+from dls_util.image import Image
+
+
+class TestImageWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.image = Image(np.full((40, 60, 3), 120, dtype=np.uint8))
+        self.writers = []
+
+    def tearDown(self):
+        for writer in self.writers:
+            writer.close()
+        shutil.rmtree(self.directory)
+
+    def test_unknown_format_raises_value_error(self):
+        self.assertRaises(ValueError, ImageWriter, "BMP")
+
+    def test_extension_matches_format(self):
+        self.assertEqual(ImageWriter(ImageWriter.PNG).extension(), ".png")
+        self.assertEqual(ImageWriter(ImageWriter.JPEG).extension(), ".jpg")
+        self.assertEqual(ImageWriter(ImageWriter.WEBP).extension(), ".webp")
+
+    def test_image_is_saved_in_the_background(self):
+        # Arrange
+        writer = self._writer()
+        path = os.path.join(self.directory, "image.png")
+
+        # Act
+        writer.write(self.image, path)
+        writer.flush()
+
+        # Assert
+        saved = Image.from_file(path)
+        self.assertTrue(np.array_equal(saved.img, self.image.img))
+        self.assertIsNone(ImageWriter.pending_image(path))
+        self.assertEqual(writer.pending(), 0)
+
+    def test_jpeg_image_is_saved_with_the_quality_setting(self):
+        # Arrange
+        writer = self._writer(ImageWriter.JPEG, quality=80)
+        image = MagicMock()
+        image.copy.return_value = image
+
+        # Act
+        writer.write(image, os.path.join(self.directory, "image.jpg"))
+        writer.flush()
+
+        # Assert
+        image.save_as.assert_called_once_with(os.path.join(self.directory, "image.jpg"),
+                                              [cv2.IMWRITE_JPEG_QUALITY, 80])
+
+    def test_png_compression_is_limited_to_the_valid_range(self):
+        # Arrange
+        writer = self._writer(ImageWriter.PNG, png_compression=12)
+        image = MagicMock()
+        image.copy.return_value = image
+
+        # Act
+        writer.write(image, "image.png")
+        writer.flush()
+
+        # Assert
+        image.save_as.assert_called_once_with("image.png", [cv2.IMWRITE_PNG_COMPRESSION, 9])
+
+    def test_image_waiting_to_be_saved_can_be_got(self):
+        # Arrange
+        writer = self._writer()
+        release = threading.Event()
+        image = self._blocking_image(release)
+        path = os.path.join(self.directory, "waiting.png")
+
+        # Act
+        writer.write(image, path)
+        pending = ImageWriter.pending_image(path)
+        release.set()
+        writer.flush()
+
+        # Assert
+        self.assertIsNotNone(pending)
+        self.assertIsNone(ImageWriter.pending_image(path))
+
+    def test_writer_waits_and_counts_when_the_queue_is_full(self):
+        # Arrange
+        writer = self._writer(queue_size=1)
+        release = threading.Event()
+        started = threading.Event()
+        image = self._blocking_image(release, started)
+
+        # Act
+        writer.write(image, "first.png")
+        started.wait(5)
+        writer.write(image, "second.png")
+        timer = threading.Timer(0.2, release.set)
+        timer.start()
+        writer.write(image, "third.png")
+        writer.flush()
+
+        # Assert
+        self.assertEqual(writer.waits(), 1)
+        self.assertEqual(image.save_as.call_count, 3)
+
+    def test_discarded_image_is_not_saved(self):
+        # Arrange
+        writer = self._writer()
+        release = threading.Event()
+        started = threading.Event()
+        first = self._blocking_image(release, started)
+        second = MagicMock()
+        second.copy.return_value = second
+
+        # Act
+        writer.write(first, "first.png")
+        started.wait(5)
+        writer.write(second, "second.png")
+        writer.discard("second.png")
+        release.set()
+        writer.flush()
+
+        # Assert
+        second.save_as.assert_not_called()
+
+    def test_close_saves_the_queued_images(self):
+        # Arrange
+        writer = ImageWriter()
+        paths = [os.path.join(self.directory, "{}.png".format(n)) for n in range(3)]
+
+        # Act
+        for path in paths:
+            writer.write(self.image, path)
+        writer.close()
+
+        # Assert
+        for path in paths:
+            self.assertTrue(os.path.isfile(path))
+
+    def _writer(self, *args, **kwargs):
+        writer = ImageWriter(*args, **kwargs)
+        self.writers.append(writer)
+        return writer
+
+    @staticmethod
+    def _blocking_image(release, started=None):
+        image = MagicMock()
+        image.copy.return_value = image
+
+        def save_as(path, params):
+            if started is not None:
+                started.set()
+            release.wait(5)
+
+        image.save_as.side_effect = save_as
+        return image
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,16 @@
+import os
+import shutil
+import tempfile
 import unittest
 from datetime import datetime
 
-from mock import MagicMock
+import numpy as np
+from mock import MagicMock, patch
 
 from dls_barcode.data_store.record import Record
 from dls_barcode.geometry.blank import BlankGeometry
 from dls_barcode.plate import EMPTY_SLOT_SYMBOL, NOT_FOUND_SLOT_SYMBOL
+from dls_util.image import Image
 
 
 class TestRecord(unittest.TestCase):
@@ -120,3 +125,50 @@ class TestRecord(unittest.TestCase):
         mock_plate.barcodes.return_value = barcodes
         mock_plate.geometry.return_value = geometry
         return mock_plate
+
+    def test_image_is_read_from_file_once_and_then_cached(self):
+        # Arrange
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "image.png")
+        Image(np.full((20, 30, 3), 50, dtype=np.uint8)).save_as(path)
+        r = Record.from_plate("ABCD", self._create_mock_plate("None", ["a"], MagicMock()), path, path)
+
+        try:
+            # Act
+            with patch("dls_barcode.data_store.record.Image.from_file", wraps=Image.from_file) as from_file:
+                first = r.get_image()
+                second = r.get_holder_image()
+
+            # Assert
+            from_file.assert_called_once_with(path)
+            self.assertIs(first, second)
+        finally:
+            Record.IMAGE_CACHE.discard(path)
+            shutil.rmtree(directory)
+
+    def test_marked_image_is_drawn_once_for_the_same_options(self):
+        # Arrange
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "image.png")
+        Image(np.full((20, 30, 3), 50, dtype=np.uint8)).save_as(path)
+        geometry = MagicMock()
+        r = Record.from_plate("ABCD", self._create_mock_plate("None", ["a"], geometry), path, path)
+        options = MagicMock()
+        options.image_puck.value.return_value = True
+        options.image_pins.value.return_value = False
+        options.image_crop.value.return_value = False
+
+        try:
+            # Act
+            first = r.get_marked_image(options)
+            second = r.get_marked_image(options)
+            options.image_pins.value.return_value = True
+            r.get_marked_image(options)
+
+            # Assert
+            self.assertIs(first, second)
+            self.assertEqual(geometry.draw_plate.call_count, 2)
+            self.assertIsNot(first, r.get_image())
+        finally:
+            Record.IMAGE_CACHE.clear()
+            shutil.rmtree(directory)
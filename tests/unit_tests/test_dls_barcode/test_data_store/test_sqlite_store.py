@@ -0,0 +1,212 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import MagicMock, call
+
+from dls_barcode.data_store.record import Record
+from dls_barcode.data_store.sqlite_store import SqliteStore
+
+ID0 = "id0"
+ID1 = "id1"
+ID2 = "id2"
+ID3 = "id3"
+
+
+class TestSqliteStore(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._database = os.path.join(self._directory, "store.db")
+        self._store_writer = MagicMock()
+        self._store_writer.get_img_path.return_value = "img.png"
+        self._store_writer.get_holder_img_path.return_value = "img_holder.png"
+
+        self._holder_img = MagicMock()
+        self._pins_img = MagicMock()
+
+        self._plate = MagicMock()
+        self._plate.type = "None"
+        self._plate.barcodes.return_value = ["DLSL-020", "DLSL-021"]
+        geometry = MagicMock()
+        geometry.serialize.return_value = "1569:1106:70-2307:1073:68-1944:1071:68"
+        self._plate.geometry.return_value = geometry
+
+        self._stores = []
+
+    def tearDown(self):
+        for store in self._stores:
+            store.close()
+        shutil.rmtree(self._directory)
+
+    def test_records_are_returned_most_recent_first(self):
+        # Arrange
+        store = self._create_store()
+
+        # Act
+        ids = [store.get_record(n).id for n in range(store.size())]
+
+        # Assert
+        self.assertListEqual(ids, [ID0, ID1, ID2, ID3])
+        self.assertListEqual([r.id for r in store.records], [ID0, ID1, ID2, ID3])
+
+    def test_record_is_read_back_unchanged(self):
+        # Arrange
+        original = [r for r in self._get_records() if r.id == ID1][0]
+        store = self._create_store()
+
+        # Act
+        r = store.get_record(1)
+
+        # Assert
+        self.assertEqual(r.to_string(), original.to_string())
+
+    def test_get_record_returns_None_if_store_is_empty(self):
+        # Arrange
+        store = self._create_empty_store()
+
+        # Act
+        r = store.get_record(0)
+
+        # Assert
+        self.assertEqual(store.size(), 0)
+        self.assertIsNone(r)
+
+    def test_get_record_raises_index_error_when_out_of_range(self):
+        store = self._create_store()
+        self.assertRaises(IndexError, store.get_record, 4)
+
+    def test_given_an_empty_store_when_merging_a_record_then_the_record_is_added_to_the_store(self):
+        # Arrange
+        store = self._create_empty_store()
+
+        # Act
+        store.merge_record("ABCD", self._plate, self._holder_img, self._pins_img)
+
+        # Assert
+        self.assertEqual(store.size(), 1)
+        r = store.get_record(0)
+        self.assertEqual(r.holder_barcode, "ABCD")
+        self.assertListEqual(r.barcodes, ["DLSL-020", "DLSL-021"])
+        self._store_writer.to_image.assert_called_once()
+
+    def test_merging_a_record_with_same_holder_as_the_latest_record_replaces_it(self):
+        # Arrange
+        store = self._create_store()
+        latest = store.get_record(0)
+
+        # Act
+        store.merge_record(latest.holder_barcode, self._plate, self._holder_img, self._pins_img)
+
+        # Assert
+        self.assertEqual(store.size(), 4)
+        self.assertNotEqual(store.get_record(0).id, ID0)
+        self.assertListEqual(store.get_record(0).barcodes, ["DLSL-020", "DLSL-021"])
+
+    def test_multiple_records_can_be_deleted_with_their_image_files(self):
+        # Arrange
+        store = self._create_store()
+        records_to_delete = [r for r in store.records if r.id == ID1 or r.id == ID3]
+
+        # Act
+        store.delete_records(records_to_delete)
+
+        # Assert
+        self.assertEqual(store.size(), 2)
+        self.assertListEqual([r.id for r in store.records], [ID0, ID2])
+        self._store_writer.remove_img_file.assert_has_calls([call(r) for r in records_to_delete])
+        self.assertListEqual(store.find_pin_barcode("DLSL-002"), [])
+
+    def test_changes_are_not_written_to_the_store_files(self):
+        # Arrange
+        store = self._create_store()
+
+        # Act
+        store.merge_record("NEW", self._plate, self._holder_img, self._pins_img)
+        store.delete_records([r for r in store.records if r.id == ID1])
+        store.close()
+
+        # Assert
+        self._store_writer.add_to_journal.assert_not_called()
+        self._store_writer.delete_from_journal.assert_not_called()
+        self._store_writer.snapshot.assert_not_called()
+
+    def test_records_already_in_the_database_are_not_added_again(self):
+        # Arrange
+        store = self._create_store()
+
+        # Act
+        added = store.add_records(self._get_records()[:2])
+
+        # Assert
+        self.assertEqual(added, 0)
+        self.assertEqual(store.size(), 4)
+
+    def test_database_is_only_migrated_once_marked(self):
+        # Arrange
+        store = self._create_empty_store()
+        self.assertFalse(store.is_migrated())
+
+        # Act
+        store.set_migrated()
+        store.close()
+
+        # Assert
+        self.assertTrue(self._create_empty_store().is_migrated())
+
+    def test_is_latest_holder_barcode(self):
+        store = self._create_store()
+        self.assertTrue(store.is_latest_holder_barcode("DLSL-001"))
+        self.assertFalse(store.is_latest_holder_barcode("DLSL-002"))
+
+    def test_empty_store_has_no_latest_holder_barcode(self):
+        store = self._create_empty_store()
+        self.assertFalse(store.is_latest_holder_barcode("DLSL-001"))
+
+    def test_records_can_be_found_by_holder_barcode(self):
+        store = self._create_store()
+        self.assertListEqual([r.id for r in store.find_holder_barcode("DLSL-003")], [ID2])
+
+    def test_records_can_be_found_by_pin_barcode(self):
+        store = self._create_store()
+        self.assertListEqual([r.id for r in store.find_pin_barcode("DLSL-011")], [ID0, ID1, ID2, ID3])
+        self.assertListEqual([r.id for r in store.find_pin_barcode("DLSL-099")], [])
+
+    def test_records_are_kept_in_the_database(self):
+        # Arrange
+        self._create_store().close()
+
+        # Act
+        store = self._create_empty_store()
+
+        # Assert
+        self.assertEqual(store.size(), 4)
+        self.assertEqual(store.get_record(3).id, ID3)
+
+    def test_database_uses_write_ahead_logging(self):
+        store = self._create_empty_store()
+        mode = store._connection.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def _create_store(self):
+        store = self._create_empty_store()
+        store.add_records(self._get_records())
+        return store
+
+    def _create_empty_store(self):
+        store = SqliteStore(self._store_writer, self._database)
+        self._stores.append(store)
+        return store
+
+    def _get_records(self):
+        strings = list()
+        strings.append(ID2 + ";1494238921.0;test" + ID2 + ".png;test_holder.png;None;DLSL-003,DLSL-010,DLSL-011,DLSL-012;1569:1106:70-2307:1073:68-1944:1071:68")
+        strings.append(ID0 + ";1494238923.0;test" + ID0 + ".png;test_holder.png;None;DLSL-001,DLSL-010,DLSL-011,DLSL-012;1569:1106:70-2307:1073:68-1944:1071:68")
+        strings.append(ID3 + ";1494238920.0;test" + ID3 + ".png;test_holder.png;None;DLSL-004,DLSL-010,DLSL-011,DLSL-012;1569:1106:70-2307:1073:68-1944:1071:68")
+        strings.append(ID1 + ";1494238922.0;test" + ID1 + ".png;test_holder.png;None;DLSL-002,DLSL-010,DLSL-011,DLSL-012;1569:1106:70-2307:1073:68-1944:1071:68")
+        return [Record.from_string(string) for string in strings]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,13 @@
+import os
+import shutil
+import tempfile
 import unittest
 from mock import MagicMock
 from mock import call
 from dls_barcode.data_store import Store
 from dls_barcode.data_store.record import Record
+from dls_barcode.data_store.store_loader import StoreLoader
+from dls_barcode.data_store.store_writer import StoreWriter
 
 ID0 = "id0"
 ID1 = "id1"
@@ -132,29 +137,104 @@ class TestStore(unittest.TestCase):
         duplicates = [r for r in store.records if r.holder_barcode == holder_barcode]
         self.assertEqual(len(duplicates), 2)
 
-    def test_given_a_store_when_merging_a_record_then_store_is_saved_to_backing_file(self):
+    def test_given_a_store_when_merging_a_record_then_the_record_is_added_to_the_journal(self):
         # Arrange
         store = self._create_store()
         holder_barcode = "ABAB"
-        self._store_writer.to_file.assert_not_called()
+        self._store_writer.add_to_journal.assert_not_called()
 
         # Act
         store.merge_record(holder_barcode, self._plate, self._holder_img, self._pins_img)
 
         # Assert
-        self._store_writer.to_file.assert_called()
+        self._store_writer.add_to_journal.assert_called_once_with(store.records[0])
+        self._store_writer.update_csv_file.assert_called_once_with(list(store.records))
+        self._store_writer.to_file.assert_not_called()
+        self._store_writer.to_csv_file.assert_not_called()
 
-    def test_given_a_store_when_merging_a_record_then_store_is_saved_to_csv_file(self):
+    def test_given_a_store_when_merging_a_record_with_same_holder_then_the_replaced_record_is_deleted_in_the_journal(self):
         # Arrange
         store = self._create_store()
-        holder_barcode = "HELLO"
-        self._store_writer.to_csv_file.assert_not_called()
+        latest = store.records[0]
 
         # Act
-        store.merge_record(holder_barcode, self._plate, self._holder_img, self._pins_img)
+        store.merge_record(latest.holder_barcode, self._plate, self._holder_img, self._pins_img)
+
+        # Assert
+        self._store_writer.delete_from_journal.assert_called_once_with([latest])
+        self._store_writer.add_to_journal.assert_called_once_with(store.records[0])
+
+    def test_records_are_kept_most_recent_first(self):
+        # Arrange
+        store = self._create_store_with_records(list(reversed(self._get_records())))
+
+        # Act
+        store.merge_record("NEW", self._plate, self._holder_img, self._pins_img)
+
+        # Assert
+        self.assertEqual(store.get_record(0).holder_barcode, "NEW")
+        self.assertListEqual([r.id for r in list(store.records)[1:]], [ID0, ID1, ID2, ID3])
+
+    def test_store_is_compacted_in_the_background_after_enough_changes(self):
+        # Arrange
+        store = self._create_empty_store()
+        store.COMPACTION_INTERVAL = 3
+
+        # Act
+        for barcode in ["A", "B", "C"]:
+            store.merge_record(barcode, self._plate, self._holder_img, self._pins_img)
+        store.wait_for_compaction()
+
+        # Assert
+        self._store_writer.start_new_journal.assert_called_once()
+        ((records_used,), kwargs) = self._store_writer.snapshot.call_args
+        self.assertListEqual(records_used, list(store.records))
+
+    def test_store_is_not_compacted_before_enough_changes(self):
+        # Arrange
+        store = self._create_store()
+
+        # Act
+        store.merge_record("A", self._plate, self._holder_img, self._pins_img)
+        store.wait_for_compaction()
+
+        # Assert
+        self._store_writer.start_new_journal.assert_not_called()
+        self._store_writer.snapshot.assert_not_called()
+
+    def test_closing_the_store_compacts_journaled_changes(self):
+        # Arrange
+        store = self._create_store()
+        store.merge_record("A", self._plate, self._holder_img, self._pins_img)
+
+        # Act
+        store.close()
+
+        # Assert
+        self._store_writer.start_new_journal.assert_called_once()
+        self._store_writer.snapshot.assert_called_once()
+        self._store_writer.close.assert_called_once()
+
+    def test_closing_an_unchanged_store_does_not_compact_it(self):
+        # Arrange
+        store = self._create_store()
+
+        # Act
+        store.close()
 
         # Assert
-        self._store_writer.to_csv_file.assert_called()
+        self._store_writer.snapshot.assert_not_called()
+
+    def test_a_failed_compaction_does_not_raise(self):
+        # Arrange
+        store = self._create_store()
+        self._store_writer.snapshot.side_effect = IOError()
+
+        # Act
+        store.compact(wait=True)
+
+        # Assert
+        self._store_writer.snapshot.assert_called_once()
 
     def test_multiple_records_can_be_deleted(self):
         # Arrange
@@ -190,42 +270,32 @@ class TestStore(unittest.TestCase):
         # Assert
         self._store_writer.remove_img_file.assert_has_calls(expected_calls)
 
-    def test_when_records_are_deleted_then_store_file_is_updated(self):
+    def test_when_records_are_deleted_then_the_deletions_are_added_to_the_journal(self):
         # Arrange
-        self._store_writer.load_records_from_file.return_value = self._get_records()
         store = self._create_store()
         records_to_delete = [r for r in store.records if r.id == ID1 or r.id == ID3]
         self.assertTrue(records_to_delete)
-        self._store_writer.to_file.assert_not_called()
+        self._store_writer.delete_from_journal.assert_not_called()
 
         # Act
         store.delete_records(records_to_delete)
 
         # Assert
-        self._store_writer.to_file.assert_called()
-        ((record_lines_used), kwargs) = self._store_writer.to_file.call_args_list[0]
-        self.assertEqual(len(record_lines_used[0]), store.size())
-        for r, l in zip(store.records, record_lines_used):
-            self.assertIn(r, l)
+        self._store_writer.delete_from_journal.assert_called_once_with(records_to_delete)
+        self._store_writer.update_csv_file.assert_called_once_with(list(store.records))
+        self._store_writer.to_file.assert_not_called()
+        self._store_writer.to_csv_file.assert_not_called()
 
-    def test_when_records_are_deleted_then_csv_file_is_updated(self):
+    def test_deleting_records_keeps_the_remaining_records_in_order(self):
         # Arrange
-        self._store_writer.load_records_from_file.return_value = self._get_records()
         store = self._create_store()
-        records_to_delete = [r for r in store.records if r.id == ID1 or r.id == ID3]
-        self.assertTrue(records_to_delete)
-        self._store_writer.to_csv_file.assert_not_called()
+        records_to_delete = [r for r in store.records if r.id == ID0 or r.id == ID2]
 
         # Act
         store.delete_records(records_to_delete)
 
         # Assert
-        self._store_writer.to_csv_file.assert_called()
-
-        ((record_lines_used), kwargs) = self._store_writer.to_csv_file.call_args_list[0]
-        self.assertEqual(len(record_lines_used[0]), store.size())
-        for r, l in zip(store.records, record_lines_used):
-            self.assertIn(r, l)
+        self.assertListEqual([r.id for r in store.records], [ID1, ID3])
 
     def _create_store(self):
         return Store(self._store_writer, self._get_records())
@@ -251,3 +321,42 @@ class TestStore(unittest.TestCase):
             rep.append(Record.from_string(str))
         return rep
 
+
+class TestStoreCsvFile(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._csv_file = os.path.join(self._directory, "store.csv")
+        self._records = TestStore()._get_records()
+
+        self._plate = MagicMock()
+        self._plate.type = "None"
+        self._plate.barcodes.return_value = ["DLSL-020"]
+        geometry = MagicMock()
+        geometry.serialize.return_value = "1569:1106:70"
+        self._plate.geometry.return_value = geometry
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_csv_file_written_before_the_journal_stays_most_recent_first(self):
+        # Arrange: the store files as they were written before there was a journal
+        writer = StoreWriter(self._directory, "store")
+        writer.to_file(self._records)
+        writer.to_csv_file(self._records)
+        store = Store(writer, StoreLoader(self._directory, "store").load_records_from_file())
+
+        # Act
+        store.merge_record("NEW", self._plate, MagicMock(), MagicMock())
+        store.delete_records([r for r in store.records if r.id == ID2])
+        writer.wait_for_csv_file()
+
+        # Assert
+        expected = [r.to_csv_string() for r in store.records]
+        self.assertEqual(store.get_record(0).holder_barcode, "NEW")
+        self.assertListEqual(self._csv_lines(), expected)
+        self.assertListEqual(expected[1:], [r.to_csv_string() for r in self._records if r.id != ID2])
+
+    def _csv_lines(self):
+        with open(self._csv_file) as file:
+            return file.read().splitlines()
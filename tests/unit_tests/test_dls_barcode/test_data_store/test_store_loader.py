@@ -1,8 +1,19 @@
+import os
+import shutil
+import tempfile
 import unittest
 
 from mock import MagicMock
 
+from dls_barcode.data_store.record import Record
 from dls_barcode.data_store.store_loader import StoreLoader
+from dls_barcode.data_store.store_writer import StoreWriter
+
+RECORD_STRINGS = [
+    "id0;1494238923.0;test0.png;test_holder.png;None;DLSL-001,DLSL-010;1569:1106:70-2307:1073:68-1944:1071:68",
+    "id1;1494238922.0;test1.png;test_holder.png;None;DLSL-002,DLSL-010;1569:1106:70-2307:1073:68-1944:1071:68",
+    "id2;1494238921.0;test2.png;test_holder.png;None;DLSL-003,DLSL-010;1569:1106:70-2307:1073:68-1944:1071:68",
+]
 
 
 class TestStoreLoader(unittest.TestCase):
@@ -31,3 +42,103 @@ class TestStoreLoader(unittest.TestCase):
         # Assert
         self.assertEqual(len(records), 0)
 
+
+class TestStoreLoaderJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = 'store'
+        self.records = [Record.from_string(string) for string in RECORD_STRINGS]
+        self.writer = StoreWriter(self.directory, self.file_name)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_records_added_to_the_journal_are_loaded(self):
+        # Arrange
+        self.writer.snapshot(self.records[:1])
+        self.writer.add_to_journal(self.records[1])
+        self.writer.add_to_journal(self.records[2])
+
+        # Act
+        records = self._load()
+
+        # Assert
+        self.assertSetEqual({r.id for r in records}, {"id0", "id1", "id2"})
+
+    def test_records_deleted_in_the_journal_are_not_loaded(self):
+        # Arrange
+        self.writer.snapshot(self.records[:2])
+        self.writer.add_to_journal(self.records[2])
+        self.writer.delete_from_journal([self.records[0], self.records[2]])
+
+        # Act
+        records = self._load()
+
+        # Assert
+        self.assertListEqual([r.id for r in records], ["id1"])
+
+    def test_journal_is_loaded_when_there_is_no_store_file(self):
+        # Arrange
+        self.writer.add_to_journal(self.records[0])
+
+        # Act
+        records = self._load()
+
+        # Assert
+        self.assertListEqual([r.id for r in records], ["id0"])
+
+    def test_changes_made_during_a_compaction_are_loaded(self):
+        # Arrange
+        self.writer.add_to_journal(self.records[0])
+        self.writer.start_new_journal()
+        self.writer.add_to_journal(self.records[1])
+
+        # Act
+        records = self._load()
+
+        # Assert
+        self.assertSetEqual({r.id for r in records}, {"id0", "id1"})
+
+    def test_journal_left_after_the_store_file_was_written_is_replayed_without_duplicates(self):
+        # Arrange
+        self.writer.add_to_journal(self.records[0])
+        self.writer.add_to_journal(self.records[1])
+        self.writer.delete_from_journal([self.records[1]])
+        self.writer.start_new_journal()
+        self.writer.to_file(self.records[:1])
+
+        # Act
+        records = self._load()
+
+        # Assert
+        self.assertListEqual([r.id for r in records], ["id0"])
+
+    def test_compacted_store_has_no_journal(self):
+        # Arrange
+        self.writer.add_to_journal(self.records[0])
+        self.writer.start_new_journal()
+        self.writer.snapshot(self.records[:1])
+
+        # Act
+        records = self._load()
+
+        # Assert
+        self.assertListEqual([r.id for r in records], ["id0"])
+        self.assertFalse(os.path.isfile(self.writer.journal_path()))
+        self.assertFalse(os.path.isfile(self.writer.old_journal_path()))
+
+    def test_invalid_journal_entries_are_skipped(self):
+        # Arrange
+        self.writer.add_to_journal(self.records[0])
+        with open(self.writer.journal_path(), 'a') as file:
+            file.write("+not a record\nnonsense\n")
+
+        # Act
+        records = self._load()
+
+        # Assert
+        self.assertListEqual([r.id for r in records], ["id0"])
+
+    def _load(self):
+        return StoreLoader(self.directory, self.file_name).load_records_from_file()
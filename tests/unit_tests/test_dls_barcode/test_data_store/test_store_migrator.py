@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import MagicMock
+
+from dls_barcode.data_store.record import Record
+from dls_barcode.data_store.sqlite_store import SqliteStore
+from dls_barcode.data_store.store_migrator import StoreMigrator
+from dls_barcode.data_store.store_writer import StoreWriter
+
+RECORD_STRINGS = [
+    "id0;1494238923.0;test0.png;test_holder.png;None;DLSL-001,DLSL-010;1569:1106:70-2307:1073:68-1944:1071:68",
+    "id1;1494238922.0;test1.png;test_holder.png;None;DLSL-002,DLSL-010;1569:1106:70-2307:1073:68-1944:1071:68",
+]
+
+
+class TestStoreMigrator(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.database = os.path.join(self.directory, "store.db")
+        self.records = [Record.from_string(string) for string in RECORD_STRINGS]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_records_from_the_store_files_are_copied_to_the_database(self):
+        # Arrange
+        writer = StoreWriter(self.directory, "store")
+        writer.to_file(self.records[:1])
+        writer.add_to_journal(self.records[1])
+
+        # Act
+        count = StoreMigrator(self.directory, "store").migrate(self.database)
+
+        # Assert
+        self.assertEqual(count, 2)
+        store = SqliteStore(MagicMock(), self.database)
+        self.assertListEqual([r.to_string() for r in store.records], [r.to_string() for r in self.records])
+        store.close()
+        self.assertFalse(os.path.isfile(self.database + ".tmp"))
+
+    def test_records_already_in_the_database_are_not_copied_again(self):
+        # Arrange
+        StoreWriter(self.directory, "store").to_file(self.records)
+        migrator = StoreMigrator(self.directory, "store")
+        migrator.migrate(self.database)
+
+        # Act
+        count = migrator.migrate(self.database)
+
+        # Assert
+        self.assertEqual(count, 0)
+        store = SqliteStore(MagicMock(), self.database)
+        self.assertEqual(store.size(), 2)
+        store.close()
+
+    def test_store_files_are_not_read_again_once_migrated(self):
+        # Arrange
+        writer = StoreWriter(self.directory, "store")
+        writer.to_file(self.records[:1])
+        migrator = StoreMigrator(self.directory, "store")
+        migrator.migrate(self.database)
+        writer.add_to_journal(self.records[1])
+
+        # Act
+        count = migrator.migrate(self.database)
+
+        # Assert
+        self.assertEqual(count, 0)
+        store = SqliteStore(MagicMock(), self.database)
+        self.assertListEqual([r.id for r in store.records], [self.records[0].id])
+        store.close()
+
+    def test_existing_database_that_is_not_marked_as_migrated_is_migrated(self):
+        # Arrange
+        StoreWriter(self.directory, "store").to_file(self.records)
+        store = SqliteStore(MagicMock(), self.database)
+        store.add_records(self.records[:1])
+        store.close()
+
+        # Act
+        count = StoreMigrator(self.directory, "store").migrate(self.database)
+
+        # Assert
+        self.assertEqual(count, 1)
+        store = SqliteStore(MagicMock(), self.database)
+        self.assertEqual(store.size(), 2)
+        self.assertTrue(store.is_migrated())
+        store.close()
+
+    def test_empty_database_is_created_when_there_are_no_store_files(self):
+        # Arrange
+        directory = os.path.join(self.directory, "new")
+
+        # Act
+        count = StoreMigrator(directory, "store").migrate(os.path.join(directory, "store.db"))
+
+        # Assert
+        self.assertEqual(count, 0)
+        self.assertTrue(os.path.isfile(os.path.join(directory, "store.db")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import shutil
+import threading
 import unittest
 
 import os
@@ -74,12 +75,15 @@ class TestStoreWriter(unittest.TestCase):
         cm = StoreWriter(self.directory, self.file_name)
         cm._file_manager = MagicMock()
         cm._file_manager.is_file.return_value = True
+        record = self._record_with_images()
 
         # Act
-        cm.remove_img_file(MagicMock())
+        cm.remove_img_file(record)
 
         # Assert
-        self.assertEqual(cm._file_manager.remove.call_count, 2)
+        self.assertEqual(cm._file_manager.remove.call_count, 4)
+        cm._file_manager.remove.assert_any_call(record.image_path)
+        cm._file_manager.remove.assert_any_call(os.path.join(self.directory, "thumb_dir", "a_holder.png"))
                  
     def test_remove_image_file_does_not_attempt_to_remove_file_when_it_does_not_exists(self):
         # Arrange
@@ -88,7 +92,7 @@ class TestStoreWriter(unittest.TestCase):
         cm._file_manager.is_file.return_value = False
 
         # Act
-        cm.remove_img_file(MagicMock())
+        cm.remove_img_file(self._record_with_images())
 
         # Assert
         cm._file_manager.remove.assert_not_called()
@@ -153,6 +157,166 @@ class TestStoreWriter(unittest.TestCase):
         self.assertIn("img_dir", path)
         self.assertIn(self.directory, path)
 
+    def test_add_to_journal_appends_an_add_entry(self):
+        # Arrange
+        cm = StoreWriter(self.directory, self.file_name)
+        cm._file_manager = MagicMock()
+        journal = os.path.join(self.directory, self.file_name + ".journal")
+
+        # Act
+        cm.add_to_journal(self.records[0])
+
+        # Assert
+        cm._file_manager.append_lines.assert_called_once_with(journal, ["+string_one\n"])
+        cm._file_manager.write_lines.assert_not_called()
+
+    def test_delete_from_journal_appends_a_delete_entry_for_each_record(self):
+        # Arrange
+        cm = StoreWriter(self.directory, self.file_name)
+        cm._file_manager = MagicMock()
+        self.records[0].id = "id1"
+        self.records[1].id = "id2"
+
+        # Act
+        cm.delete_from_journal(self.records[:2])
+
+        # Assert
+        ((journal, lines), kwargs) = cm._file_manager.append_lines.call_args
+        self.assertListEqual(lines, ["-id1\n", "-id2\n"])
+
+    def test_start_new_journal_sets_aside_the_journal(self):
+        # Arrange
+        cm = StoreWriter(self.directory, self.file_name)
+        cm._file_manager = MagicMock()
+        cm._file_manager.is_file.side_effect = lambda path: path == cm.journal_path()
+
+        # Act
+        cm.start_new_journal()
+
+        # Assert
+        cm._file_manager.replace.assert_called_once_with(cm.journal_path(), cm.old_journal_path())
+
+    def test_start_new_journal_adds_to_a_journal_left_by_a_failed_compaction(self):
+        # Arrange
+        cm = StoreWriter(self.directory, self.file_name)
+        cm._file_manager = MagicMock()
+        cm._file_manager.is_file.return_value = True
+        cm._file_manager.read_lines.return_value = ["-id1\n"]
+
+        # Act
+        cm.start_new_journal()
+
+        # Assert
+        cm._file_manager.append_lines.assert_called_once_with(cm.old_journal_path(), ["-id1\n"])
+        cm._file_manager.remove.assert_called_once_with(cm.journal_path())
+        cm._file_manager.replace.assert_not_called()
+
+    def test_snapshot_replaces_the_store_file_and_removes_the_old_journal(self):
+        # Arrange
+        cm = StoreWriter(self.directory, self.file_name)
+        cm._file_manager = MagicMock()
+        cm._file_manager.is_file.return_value = True
+        file_name = os.path.join(self.directory, self.file_name + ".txt")
+
+        # Act
+        cm.snapshot(self.records)
+
+        # Assert
+        cm._file_manager.write_lines_atomically.assert_called_once_with(
+            file_name, ["string_one\n", "string_two\n", "string_three\n"])
+        cm._file_manager.write_lines.assert_not_called()
+        cm._file_manager.remove.assert_called_once_with(cm.old_journal_path())
+
+    def test_update_csv_file_rewrites_the_csv_file_most_recent_first(self):
+        # Arrange
+        cm = StoreWriter(self.directory, self.file_name)
+        cm._file_manager = MagicMock()
+        csv_file_name = os.path.join(self.directory, self.file_name + ".csv")
+
+        # Act
+        cm.update_csv_file(self.records)
+        cm.wait_for_csv_file()
+
+        # Assert
+        cm._file_manager.write_lines_atomically.assert_called_once_with(
+            csv_file_name, ["csv_string_one\n", "csv_string_two\n", "csv_string_three\n"])
+        cm._file_manager.append_lines.assert_not_called()
+
+    def test_only_the_latest_records_are_written_when_the_csv_file_is_updated_again_before_it_is_written(self):
+        # Arrange
+        cm = StoreWriter(self.directory, self.file_name)
+        cm._file_manager = MagicMock()
+        writing = threading.Event()
+        release = threading.Event()
+
+        def write_lines_atomically(path, lines):
+            writing.set()
+            release.wait(5)
+        cm._file_manager.write_lines_atomically.side_effect = write_lines_atomically
+
+        # Act
+        cm.update_csv_file(self.records[:1])
+        writing.wait(5)
+        cm.update_csv_file(self.records[:2])
+        cm.update_csv_file(self.records)
+        release.set()
+        cm.wait_for_csv_file()
+
+        # Assert
+        calls = cm._file_manager.write_lines_atomically.call_args_list
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(calls[1][0][1]), 3)
+
+    def test_close_waits_for_the_csv_file(self):
+        cm = StoreWriter(self.directory, self.file_name)
+        cm._file_manager = MagicMock()
+        cm.update_csv_file(self.records)
+        cm.close()
+        cm._file_manager.write_lines_atomically.assert_called_once()
+
+    def test_to_image_queues_images_with_the_image_writer(self):
+        # Arrange
+        image_writer = MagicMock()
+        image_writer.extension.return_value = '.jpg'
+        cm = StoreWriter(self.directory, self.file_name, image_writer=image_writer)
+        pin_image = MagicMock()
+        holder_image = MagicMock()
+
+        # Act
+        cm.to_image(pin_image, holder_image, 'name')
+
+        # Assert
+        self.assertTrue(cm.get_img_path().endswith('name.jpg'))
+        self.assertTrue(cm.get_holder_img_path().endswith('name_holder.jpg'))
+        image_writer.write.assert_any_call(pin_image, cm.get_img_path())
+        image_writer.write.assert_any_call(holder_image, cm.get_holder_img_path())
+        pin_image.save_as.assert_not_called()
+
+    def test_remove_image_file_discards_images_waiting_to_be_saved(self):
+        # Arrange
+        image_writer = MagicMock()
+        cm = StoreWriter(self.directory, self.file_name, MagicMock(), image_writer)
+        record = self._record_with_images()
+
+        # Act
+        cm.remove_img_file(record)
+
+        # Assert
+        image_writer.discard.assert_any_call(record.image_path)
+        image_writer.discard.assert_any_call(record.holder_image_path)
+
+    def test_close_closes_the_image_writer(self):
+        image_writer = MagicMock()
+        cm = StoreWriter(self.directory, self.file_name, image_writer=image_writer)
+        cm.close()
+        image_writer.close.assert_called_once()
+
+    def _record_with_images(self):
+        record = MagicMock()
+        record.image_path = os.path.join(self.directory, "img_dir", "a.png")
+        record.holder_image_path = os.path.join(self.directory, "img_dir", "a_holder.png")
+        return record
+
     @classmethod
     def tearDownClass(cls):
         if os.path.isdir('dir'):
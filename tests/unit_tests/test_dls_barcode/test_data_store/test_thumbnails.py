@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from dls_barcode.data_store.thumbnails import Thumbnails
+from dls_util.image import Image, ImageCache
+
+
+class TestThumbnails(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.directory, "img_dir"))
+        self.image_path = os.path.join(self.directory, "img_dir", "image.png")
+        Image(np.full((1200, 1600, 3), 80, dtype=np.uint8)).save_as(self.image_path)
+        self.cache = ImageCache(100 * 1024 * 1024)
+        self.thumbnails = Thumbnails(self.cache)
+
+    def tearDown(self):
+        self.thumbnails.stop()
+        shutil.rmtree(self.directory)
+
+    def test_thumbnail_is_kept_next_to_the_image_directory(self):
+        path = Thumbnails.thumbnail_path(self.image_path)
+        self.assertEqual(path, os.path.join(self.directory, "thumb_dir", "image.png"))
+
+    def test_thumbnail_is_made_in_the_background_the_first_time(self):
+        # Act
+        first = self.thumbnails.get(self.image_path)
+        self.thumbnails.wait()
+        second = self.thumbnails.get(self.image_path)
+
+        # Assert
+        self.assertIsNone(first)
+        self.assertEqual((second.width, second.height), (640, 480))
+        self.assertTrue(os.path.isfile(Thumbnails.thumbnail_path(self.image_path)))
+
+    def test_thumbnail_is_loaded_from_file_when_not_cached(self):
+        # Arrange
+        self.thumbnails.get(self.image_path)
+        self.thumbnails.wait()
+        self.cache.clear()
+
+        # Act
+        thumbnail = Thumbnails(self.cache).get(self.image_path)
+
+        # Assert
+        self.assertEqual((thumbnail.width, thumbnail.height), (640, 480))
+
+    def test_no_thumbnail_is_made_for_a_missing_image(self):
+        # Act
+        path = os.path.join(self.directory, "img_dir", "missing.png")
+        self.thumbnails.get(path)
+        self.thumbnails.wait()
+
+        # Assert
+        self.assertIsNone(self.thumbnails.get(path))
+        self.assertFalse(os.path.isfile(Thumbnails.thumbnail_path(path)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,14 @@
+import os
 import unittest
 
+import numpy as np
 from mock import Mock, patch
 
 from dls_barcode.datamatrix.datamatrix import DataMatrix
+from dls_util.image import Image
+from dls_util.shape import Circle
+
+TEST_IMG = os.path.join('tests', 'test-resources', 'blue_stand', 'puck4_01.png')
 
 class TestDatamatrix(unittest.TestCase):
 
@@ -14,6 +20,56 @@ class TestDatamatrix(unittest.TestCase):
         test_string_bad = "AbcD123_-$<"
         self.assertFalse(datamatrix._contains_allowed_chars_only(test_string_bad))
 
+    def test_read_many_reads_each_barcode_that_has_not_been_read(self):
+        image = Mock()
+        unread = [Mock(), Mock(), Mock()]
+        for bc in unread:
+            bc.is_read.return_value = False
+        already_read = Mock()
+        already_read.is_read.return_value = True
+
+        DataMatrix.read_many(unread + [already_read], image, workers=2)
+
+        for bc in unread:
+            bc.perform_read.assert_called_once_with(image, False)
+        already_read.perform_read.assert_not_called()
+
+    def test_read_many_with_force_read_reads_every_barcode(self):
+        image = Mock()
+        barcodes = [Mock(), Mock()]
+        for bc in barcodes:
+            bc.is_read.return_value = True
+
+        DataMatrix.read_many(barcodes, image, workers=1, force_read=True)
+
+        for bc in barcodes:
+            bc.perform_read.assert_called_once_with(image, True)
+
+    @patch('dls_barcode.datamatrix.datamatrix.decode')
+    def test_the_same_image_is_only_decoded_once(self, mock_decode):
+        DataMatrix.decode_cache().clear()
+        mock_decode.return_value = [Mock(data=b"DLSL-009")]
+        image = np.random.RandomState(1).randint(0, 256, (40, 40)).astype(np.uint8)
+
+        first = DataMatrix(Mock())
+        first._read(image)
+        second = DataMatrix(Mock())
+        second._read(image.copy())
+
+        mock_decode.assert_called_once()
+        self.assertTrue(second._read_ok)
+        self.assertEqual(second._data, "DLSL-009")
+        self.assertEqual(DataMatrix.decode_cache().hits(), 1)
+
+    def test_locate_deep_in_region_finds_patterns_in_frame_coordinates(self):
+        gray = Image.from_file(TEST_IMG).to_grayscale()
+        everywhere = DataMatrix.locate_all_barcodes_in_image_deep(gray, [14])
+        center = everywhere[0].center()
+        region = Circle(center, 200)
 
-            
+        in_region = DataMatrix.locate_all_barcodes_in_image_deep(gray, [14], region=region)
 
+        self.assertTrue(any(in_region))
+        self.assertTrue(all(abs(bc.center().x - center.x) < 200 and abs(bc.center().y - center.y) < 200
+                            for bc in in_region))
+        self.assertIn(center.tuple(), [bc.center().tuple() for bc in in_region])
@@ -0,0 +1,105 @@
+import time
+import unittest
+
+import numpy as np
+
+from dls_barcode.datamatrix.decode_cache import DecodeCache
+
+
+class TestDecodeCache(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self._image = random.randint(0, 256, (60, 60)).astype(np.uint8)
+
+    def test_lookup_of_a_stored_result_is_a_hit(self):
+        cache = DecodeCache()
+        key = DecodeCache.make_key(self._image, [14])
+        cache.store(key, "DLSL-009")
+
+        found, data = cache.lookup(key)
+
+        self.assertTrue(found)
+        self.assertEqual(data, "DLSL-009")
+        self.assertEqual(cache.hits(), 1)
+        self.assertEqual(cache.misses(), 0)
+
+    def test_failed_decodes_are_cached(self):
+        cache = DecodeCache()
+        key = DecodeCache.make_key(self._image, [14])
+        cache.store(key, None)
+
+        found, data = cache.lookup(key)
+
+        self.assertTrue(found)
+        self.assertIsNone(data)
+
+    def test_failed_decodes_expire_before_successful_ones(self):
+        cache = DecodeCache(lifetime=10, failure_lifetime=0.1)
+        cache.store("failed", None)
+        cache.store("read", "DLSL-009")
+        time.sleep(0.15)
+
+        self.assertFalse(cache.lookup("failed")[0])
+        self.assertEqual(cache.lookup("read"), (True, "DLSL-009"))
+
+    def test_failed_decodes_have_a_much_shorter_default_lifetime(self):
+        self.assertLessEqual(DecodeCache.DEFAULT_FAILURE_LIFETIME, 1)
+        self.assertLess(DecodeCache.DEFAULT_FAILURE_LIFETIME, DecodeCache.DEFAULT_LIFETIME)
+
+    def test_lookup_of_an_unknown_key_is_a_miss(self):
+        cache = DecodeCache()
+
+        found, _ = cache.lookup(DecodeCache.make_key(self._image, [14]))
+
+        self.assertFalse(found)
+        self.assertEqual(cache.misses(), 1)
+
+    def test_key_is_the_same_for_a_copy_of_the_image_and_a_view_of_the_same_pixels(self):
+        large = np.zeros((100, 100), np.uint8)
+        large[20:80, 20:80] = self._image
+        view = large[20:80, 20:80]
+
+        self.assertEqual(DecodeCache.make_key(view, [14]), DecodeCache.make_key(self._image.copy(), [14]))
+
+    def test_key_is_the_same_for_small_changes_in_brightness(self):
+        image = np.full((60, 60), 80, np.uint8)
+        image[10:30, 10:30] = 200
+        noisy = image.copy()
+        noisy[0, 0] += 2
+
+        self.assertEqual(DecodeCache.make_key(image, [14]), DecodeCache.make_key(noisy, [14]))
+
+    def test_key_depends_on_the_image_and_the_matrix_sizes(self):
+        key = DecodeCache.make_key(self._image, [14])
+
+        self.assertNotEqual(key, DecodeCache.make_key(255 - self._image, [14]))
+        self.assertNotEqual(key, DecodeCache.make_key(self._image, [12, 14]))
+
+    def test_least_recently_used_entry_is_evicted_when_full(self):
+        cache = DecodeCache(max_size=2)
+        cache.store("a", "A")
+        cache.store("b", "B")
+        cache.lookup("a")
+        cache.store("c", "C")
+
+        self.assertEqual(cache.size(), 2)
+        self.assertTrue(cache.lookup("a")[0])
+        self.assertFalse(cache.lookup("b")[0])
+
+    def test_expired_entries_are_not_returned(self):
+        cache = DecodeCache(lifetime=0.1)
+        cache.store("a", "A")
+        time.sleep(0.15)
+
+        self.assertFalse(cache.lookup("a")[0])
+        self.assertEqual(cache.size(), 0)
+
+    def test_clear_removes_entries_and_resets_counters(self):
+        cache = DecodeCache()
+        cache.store("a", "A")
+        cache.lookup("a")
+        cache.clear()
+
+        self.assertEqual(cache.size(), 0)
+        self.assertEqual(cache.hits(), 0)
@@ -0,0 +1,64 @@
+import os
+import unittest
+
+import cv2
+
+from dls_barcode.datamatrix.locate import Locator
+from dls_util.image import Image
+from dls_util.shape import Point
+
+TEST_IMG = os.path.join('tests', 'test-resources', 'puck1_01.png')
+
+
+def _fp_positions(finder_patterns):
+    return [(fp.c1.tuple(), fp.c2.tuple(), fp.c3.tuple()) for fp in finder_patterns]
+
+
+class TestLocator(unittest.TestCase):
+
+    def setUp(self):
+        self._gray = Image.from_file(TEST_IMG).to_grayscale()
+
+    def test_locate_deep_with_workers_returns_the_same_patterns_as_a_single_thread(self):
+        serial = Locator()
+        parallel = Locator()
+        parallel.set_workers(4)
+
+        expected = serial.locate_deep(self._gray, filter_overlap=True)
+        actual = parallel.locate_deep(self._gray, filter_overlap=True)
+
+        self.assertTrue(any(expected))
+        self.assertListEqual(_fp_positions(actual), _fp_positions(expected))
+
+    def test_locate_shallow_with_workers_returns_the_same_patterns_as_a_single_thread(self):
+        parallel = Locator()
+        parallel.set_workers(2)
+
+        expected = Locator().locate_shallow(self._gray)
+        actual = parallel.locate_shallow(self._gray)
+
+        self.assertListEqual(_fp_positions(actual), _fp_positions(expected))
+
+    def test_set_workers_uses_at_least_one_worker(self):
+        locator = Locator()
+        locator.set_workers(0)
+        self.assertEqual(locator._workers, 1)
+
+    def test_locate_near_finds_the_pattern_close_to_an_approximate_one(self):
+        expected = Locator().locate_deep(self._gray, filter_overlap=True)[0]
+        approximate = expected.offset(Point(4, -3))
+
+        found = Locator().locate_near(self._gray, approximate)
+
+        self.assertIsNotNone(found)
+        self.assertLess(found.center.distance_to(expected.center), expected.radius / 4)
+
+    def test_locate_pyramid_finds_the_same_patterns_as_locate_deep_at_the_reduced_scale(self):
+        large = Image(cv2.resize(self._gray.img, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC))
+
+        expected = Locator().locate_deep(self._gray, filter_overlap=True)
+        actual = Locator().locate_pyramid(large, 0.5)
+
+        self.assertEqual(len(actual), len(expected))
+        for fp in expected:
+            self.assertTrue(any(a.center.distance_to(fp.center * 2) < fp.radius / 2 for a in actual))
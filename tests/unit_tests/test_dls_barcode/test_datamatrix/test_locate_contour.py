@@ -0,0 +1,58 @@
+import os
+import unittest
+
+import numpy as np
+
+from dls_barcode.datamatrix.locate.locate_contour import ContourLocator
+from dls_barcode.datamatrix.locate.threshold_cache import ThresholdCache
+from dls_util.image import Image
+
+TEST_IMG = os.path.join('tests', 'test-resources', 'puck1_01.png')
+
+
+def _fp_positions(finder_patterns):
+    return [(fp.c1.tuple(), fp.c2.tuple(), fp.c3.tuple()) for fp in finder_patterns]
+
+
+class TestContourLocator(unittest.TestCase):
+
+    def test_polygon_filter_matches_the_reference_implementation_on_a_real_image(self):
+        cache = ThresholdCache(Image.from_file(TEST_IMG).to_grayscale())
+        for morph_size in [3, 2]:
+            for c in [16, 8, 0]:
+                closed = cache.closed_image(35, c, morph_size)
+                polygons = ContourLocator._contours_to_polygons(ContourLocator._get_contours(closed))
+
+                expected = ContourLocator._reference_polygons_to_finder_patterns(polygons)
+                actual = ContourLocator._polygons_to_finder_patterns(polygons)
+
+                self.assertListEqual(_fp_positions(actual), _fp_positions(expected))
+
+    def test_polygon_filter_finds_the_corner_of_an_l_shaped_polygon(self):
+        # Two long, orthogonal, equal length sides meeting at (10, 110) plus some short edges
+        polygon = np.array([[10, 10], [10, 110], [110, 110], [110, 100], [100, 95],
+                            [90, 80], [60, 50], [30, 20], [20, 10]], dtype=np.int32)
+
+        fps = ContourLocator._polygons_to_finder_patterns([polygon])
+
+        self.assertEqual(len(fps), 1)
+        expected = ContourLocator._reference_polygons_to_finder_patterns([polygon])
+        self.assertListEqual(_fp_positions(fps), _fp_positions(expected))
+        self.assertEqual(fps[0].c1.tuple(), (10, 110))
+
+    def test_polygon_filter_rejects_polygons_with_few_edges(self):
+        square = np.array([[0, 0], [0, 100], [100, 100], [100, 0]], dtype=np.int32)
+        self.assertListEqual(ContourLocator._polygons_to_finder_patterns([square]), [])
+
+    def test_polygon_filter_handles_no_polygons(self):
+        self.assertListEqual(ContourLocator._polygons_to_finder_patterns([]), [])
+
+    def test_polygon_filter_picks_the_same_pair_as_the_reference_when_edges_tie(self):
+        # Regular-ish octagon: several edges have exactly the same length
+        polygon = np.array([[0, 30], [0, 130], [30, 160], [130, 160], [160, 130],
+                            [160, 30], [130, 0], [30, 0]], dtype=np.int32)
+
+        expected = ContourLocator._reference_polygons_to_finder_patterns([polygon])
+        actual = ContourLocator._polygons_to_finder_patterns([polygon])
+
+        self.assertListEqual(_fp_positions(actual), _fp_positions(expected))
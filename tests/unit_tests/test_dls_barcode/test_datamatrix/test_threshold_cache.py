@@ -0,0 +1,35 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from dls_barcode.datamatrix.locate.threshold_cache import ThresholdCache
+from dls_util.image import Image
+
+
+class TestThresholdCache(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self._gray = Image(random.randint(0, 256, (120, 160)).astype(np.uint8))
+
+    def test_threshold_image_is_the_same_as_opencv_adaptive_threshold(self):
+        cache = ThresholdCache(self._gray)
+        for c in [16, 8, 0, 4, 20]:
+            expected = cv2.adaptiveThreshold(self._gray.img, 255.0, cv2.ADAPTIVE_THRESH_MEAN_C,
+                                             cv2.THRESH_BINARY, 35, c)
+            np.testing.assert_array_equal(cache.threshold_image(35, c).img, expected)
+
+    def test_closed_image_is_the_same_as_closing_the_threshold_image(self):
+        cache = ThresholdCache(self._gray)
+        thresh = cv2.adaptiveThreshold(self._gray.img, 255.0, cv2.ADAPTIVE_THRESH_MEAN_C,
+                                       cv2.THRESH_BINARY, 35, 8)
+        element = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+        expected = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, element, iterations=1)
+        np.testing.assert_array_equal(cache.closed_image(35, 8, 3).img, expected)
+
+    def test_images_are_only_calculated_once_for_each_set_of_parameters(self):
+        cache = ThresholdCache(self._gray)
+        self.assertIs(cache.threshold_image(35, 8), cache.threshold_image(35, 8))
+        self.assertIs(cache.closed_image(35, 8, 2), cache.closed_image(35, 8, 2))
+        self.assertIsNot(cache.closed_image(35, 8, 2), cache.closed_image(35, 8, 3))
@@ -0,0 +1,66 @@
+import os
+import unittest
+
+import numpy as np
+
+from dls_barcode.datamatrix.locate import FinderPatternTracker, Locator
+from dls_util.image import Image
+
+TEST_IMG = os.path.join('tests', 'test-resources', 'puck1_01.png')
+
+
+class TestFinderPatternTracker(unittest.TestCase):
+
+    def setUp(self):
+        self._gray = Image.from_file(TEST_IMG).to_grayscale()
+        locator = Locator()
+        locator.set_median_radius_tolerance(0.2)
+        self._patterns = locator.locate_deep(self._gray, filter_overlap=True)
+
+    def test_track_returns_None_when_there_is_no_previous_frame(self):
+        tracker = FinderPatternTracker()
+        self.assertIsNone(tracker.track(self._gray))
+
+    def test_patterns_are_tracked_into_an_unchanged_frame(self):
+        tracker = FinderPatternTracker()
+        tracker.update(self._gray, self._patterns)
+
+        tracked = tracker.track(self._gray.copy())
+
+        self.assertEqual(len(tracked), len(self._patterns))
+        for old, new in zip(self._patterns, tracked):
+            self.assertLess(old.center.distance_to(new.center), old.radius / 2)
+
+    def test_track_returns_None_when_the_frame_has_changed(self):
+        tracker = FinderPatternTracker()
+        tracker.update(self._gray, self._patterns)
+
+        moved = Image(np.roll(self._gray.img, 50, axis=1))
+
+        self.assertIsNone(tracker.track(moved))
+
+    def test_track_returns_None_when_a_pattern_cannot_be_found_again(self):
+        tracker = FinderPatternTracker()
+        tracker.update(self._gray, self._patterns)
+
+        erased = self._gray.copy()
+        center = self._patterns[0].center
+        radius = int(self._patterns[0].radius * 2.5)
+        erased.img[center.y - radius:center.y + radius, center.x - radius:center.x + radius] = 128
+
+        self.assertIsNone(tracker.track(erased))
+
+    def test_a_full_locate_is_needed_after_the_maximum_number_of_tracked_frames(self):
+        tracker = FinderPatternTracker()
+        tracker.update(self._gray, self._patterns)
+        for _ in range(FinderPatternTracker.FULL_LOCATE_INTERVAL):
+            tracker.update(self._gray, self._patterns, tracked=True)
+
+        self.assertIsNone(tracker.track(self._gray))
+
+    def test_reset_forgets_the_previous_frame(self):
+        tracker = FinderPatternTracker()
+        tracker.update(self._gray, self._patterns)
+        tracker.reset()
+
+        self.assertIsNone(tracker.track(self._gray))
@@ -1,3 +1,5 @@
+import time
+
 import pytest
 from mock.mock import MagicMock, Mock
 
@@ -71,3 +73,21 @@ def test_new_side_and_images_collected_emitted_if_both_frames_not_none(qtbot, fr
     assert blocker.signal_triggered, "new_side_frame"
     assert blocker.signal_triggered, "new_top_frame"
     assert blocker.signal_triggered, "images_collected"
+
+
+def test_synchronized_mode_grabs_both_cameras_and_emits_frames(qtbot):
+    side_camera_stream, top_camera_stream = Mock(), Mock()
+    side_camera_stream.grab_frame = Mock(return_value=True)
+    side_frames = [Frame(MagicMock(), 1.0), None]
+    # The camera fails on the second frame, long after the first pair has been emitted
+    side_camera_stream.retrieve_frame = Mock(side_effect=lambda: side_frames.pop(0) or time.sleep(0.5))
+    top_camera_stream.grab_frame = Mock(return_value=True)
+    top_camera_stream.retrieve_frame = Mock(return_value=Frame(MagicMock(), 1.0))
+    frame_grabber = FrameGrabber(side_camera_stream, top_camera_stream, synchronized=True)
+
+    with qtbot.waitSignals([frame_grabber.images_collected, frame_grabber.camera_error,
+                            frame_grabber.finished], timeout=1000):
+        frame_grabber.run()
+
+    assert side_camera_stream.get_frame.call_count == 0
+    assert top_camera_stream.grab_frame.call_count >= 1
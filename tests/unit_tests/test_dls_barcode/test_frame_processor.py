@@ -8,15 +8,15 @@ from dls_barcode.scan.scan_result import ScanResult
 @pytest.fixture(scope='module')
 def side_processor():
     side_camera_stream = Mock()
-    side_frame = Mock()
-    side_processor = SideProcessor(side_camera_stream, side_frame)
+    side_processor = SideProcessor(lambda: side_camera_stream)
+    side_processor._side_camera_stream = side_camera_stream
     yield side_processor
 
 @pytest.fixture(scope='module')
 def top_processor():
     top_camera_stream = Mock()
-    top_frame = Mock()
-    top_processor = TopProcessor(top_camera_stream, top_frame)
+    top_processor = TopProcessor(lambda: top_camera_stream)
+    top_processor._top_camera_stream = top_camera_stream
     yield top_processor
 
 def test_error_signal_is_emitted_when_result_has_error(qtbot, side_processor): # this functionality is not used ??
@@ -24,7 +24,7 @@ def test_error_signal_is_emitted_when_result_has_error(qtbot, side_processor): #
     side_result._error = ScanErrorMessage("error")
     side_processor._side_camera_stream.process_frame = Mock(return_value=side_result)
     with qtbot.waitSignal(side_processor.side_scan_error_signal,timeout=100) as blocker:
-        side_processor.run()
+        side_processor.submit((Mock(), Mock()))
 
     assert blocker.args, "error"
     assert blocker.signal_triggered, "side_scan_error_signal"
@@ -35,7 +35,7 @@ def test_side_result_signal_emitted(qtbot, side_processor):
     side_result.has_valid_barcodes = Mock(return_value=True)
     side_processor._side_camera_stream.process_frame = Mock(return_value=side_result)
     with qtbot.waitSignal(side_processor.side_result_signal,timeout=100) as blocker:
-        side_processor.run()
+        side_processor.submit((Mock(), Mock()))
 
     assert blocker.signal_triggered, "side_result_signal"
 
@@ -44,7 +44,7 @@ def test_top_result_signal_emitted_if_result_successful(qtbot, top_processor):
     top_result.success = Mock(return_value = True)
     top_processor._top_camera_stream.process_frame = Mock(return_value=top_result)
     with qtbot.waitSignal(top_processor.top_result_signal,timeout=100) as blocker:
-        top_processor.run()
+        top_processor.submit(Mock())
         
     assert blocker.signal_triggered, "top_result_signal"
 
@@ -53,7 +53,7 @@ def test_top_result_signal_not_emitted_if_result_not_successful(qtbot, top_proce
     top_result.success = Mock(return_value=False)
     top_processor._top_camera_stream.process_frame = Mock(return_value=top_result)
     with qtbot.assertNotEmitted(top_processor.top_result_signal):
-        top_processor.run()
+        top_processor.submit(Mock())
 
 def test_full_and_valid_signal_emitted_if_result_full_valid(qtbot, top_processor):
     top_result = ScanResult(1)
@@ -62,7 +62,7 @@ def test_full_and_valid_signal_emitted_if_result_full_valid(qtbot, top_processor
     top_processor._top_camera_stream.process_frame = Mock(return_value=top_result)
     top_processor._top_camera_stream.process_frame = Mock(return_value=top_result)
     with qtbot.waitSignal(top_processor.full_and_valid_signal, timeout=100) as blocker:
-        top_processor.run()
+        top_processor.submit(Mock())
         
     assert blocker.signal_triggered, "full_and_valid_signal"
     
@@ -71,7 +71,7 @@ def test_full_and_valid_not_emmited_it_result_not_successful(qtbot, top_processo
     top_result.success = Mock(return_value=False)
     top_processor._top_camera_stream.process_frame = Mock(return_value=top_result)
     with qtbot.assertNotEmitted(top_processor.full_and_valid_signal):
-        top_processor.run()
+        top_processor.submit(Mock())
         
 def test_full_and_valid_not_emmited_it_result_successful_but_not_full_valid(qtbot, top_processor):
     top_result = ScanResult(1)
@@ -79,4 +79,61 @@ def test_full_and_valid_not_emmited_it_result_successful_but_not_full_valid(qtbo
     top_result.is_full_valid = Mock(return_value=False)
     top_processor._top_camera_stream.process_frame = Mock(return_value=top_result)
     with qtbot.assertNotEmitted(top_processor.full_and_valid_signal):
-        top_processor.run()
\ No newline at end of file
+        top_processor.submit(Mock())
+
+def test_finished_emitted_after_each_frame(qtbot, top_processor):
+    top_processor._top_camera_stream.process_frame = Mock(return_value=ScanResult(1))
+    with qtbot.waitSignal(top_processor.finished, timeout=100) as blocker:
+        top_processor.submit(Mock())
+
+    assert blocker.signal_triggered, "finished"
+
+def test_frame_is_processed_with_the_current_stream():
+    streams = [Mock(), Mock()]
+    for stream in streams:
+        stream.process_frame = Mock(return_value=ScanResult(1))
+    processor = TopProcessor(lambda: streams[-1])
+
+    processor.submit(Mock())
+    streams.pop()
+    processor.submit(Mock())
+
+    assert streams[0].process_frame.call_count == 1
+
+def test_latest_waiting_frame_replaces_older_one():
+    stream = Mock()
+    stream.process_frame = Mock(return_value=ScanResult(1))
+    processor = TopProcessor(lambda: stream)
+    processor._frame_submitted.disconnect()  # leave the frames waiting in the queue
+    old_frame, new_frame = Mock(), Mock()
+
+    processor.submit(old_frame)
+    processor.submit(new_frame)
+    assert processor.queue_depth() == 1
+    assert processor.dropped_frames() == 1
+
+    processor._process_next()
+    stream.process_frame.assert_called_once_with(new_frame)
+    assert processor.processed_frames() == 1
+    assert not processor.is_busy()
+
+def test_nothing_is_processed_if_no_frame_is_waiting():
+    stream = Mock()
+    processor = SideProcessor(lambda: stream)
+
+    processor._process_next()
+
+    assert stream.process_frame.call_count == 0
+    assert processor.processed_frames() == 0
+
+def test_side_processor_passes_the_top_frame_on_with_finished(qtbot):
+    stream = Mock()
+    stream.process_frame = Mock(return_value=ScanResult(1))
+    processor = SideProcessor(lambda: stream)
+    side_frame, top_frame = Mock(), Mock()
+
+    with qtbot.waitSignal(processor.finished, timeout=100) as blocker:
+        processor.submit((side_frame, top_frame))
+
+    stream.process_frame.assert_called_once_with(side_frame)
+    assert blocker.args == [(side_frame, top_frame)]
@@ -17,6 +17,7 @@ def frame_processor_side_camera_stream():
                                                Mock(), Mock(), 
                                                Mock(), Mock(), Mock())
     yield frame_processor
+    frame_processor.stop()
     
 @pytest.fixture(scope='module')
 def frame_processor_top_camera_stream():
@@ -30,34 +31,59 @@ def frame_processor_top_camera_stream():
                                                Mock(), Mock(), 
                                                Mock(), Mock(), Mock())
     yield frame_processor
+    frame_processor.stop()
 
 #fixture 1
 def test_side_processor_therad_starts_if_top_processor_thread_is_not_running(qtbot, frame_processor_side_camera_stream):
-    frame_processor_side_camera_stream.top_processor_thread.isRunning = Mock(return_value = False)
+    frame_processor_side_camera_stream.top_processor.is_busy = Mock(return_value = False)
     with qtbot.waitSignal(frame_processor_side_camera_stream.side_processor_thread.started, timeout=100) as blocker:
         frame_processor_side_camera_stream.start_processor(Mock(), Mock())
     assert blocker.signal_triggered, "started"
     
 def test_side_processor_therad_doesnt_start_if_top_processor_is_running(qtbot, frame_processor_side_camera_stream):
-    frame_processor_side_camera_stream.top_processor_thread.isRunning = Mock(return_value = True)
+    frame_processor_side_camera_stream.top_processor.is_busy = Mock(return_value = True)
     with qtbot.assertNotEmitted(frame_processor_side_camera_stream.side_processor_thread.started):
         frame_processor_side_camera_stream.start_processor(Mock(), Mock())
+    assert frame_processor_side_camera_stream.frame_counters()["side"]["dropped"] == 1
+
+def test_side_frames_are_processed_by_the_same_worker(qtbot, frame_processor_side_camera_stream):
+    frame_processor_side_camera_stream.top_processor.is_busy = Mock(return_value = False)
+    worker = frame_processor_side_camera_stream.side_processor
+    for _ in range(2):
+        with qtbot.waitSignal(worker.finished, timeout=1000):
+            frame_processor_side_camera_stream.start_processor(Mock(), Mock())
+
+    assert frame_processor_side_camera_stream.side_processor is worker
+    assert frame_processor_side_camera_stream.frame_counters()["side"]["processed"] == 2
+
+def test_top_frame_captured_with_the_side_frame_is_processed(qtbot, frame_processor_side_camera_stream):
+    controller = frame_processor_side_camera_stream
+    controller.top_processor.is_busy = Mock(return_value = False)
+    controller.process_side = Mock()
+    first_top, second_top = Mock(), Mock()
+
+    for top_frame in [first_top, second_top]:
+        with qtbot.waitSignal(controller.side_processor.finished, timeout=1000):
+            controller.start_processor(Mock(), top_frame)
+
+    assert [c.args[0] for c in controller.process_side.call_args_list] == [first_top, second_top]
 
 # fixture 2       
 def test_process_side_triggers_top_processor_thread_if_processing_flag_is_on(qtbot, frame_processor_top_camera_stream):
     frame_processor_top_camera_stream.processing_flag = True
     frame_processor_top_camera_stream.timer.isActive = Mock(return_value = True)
-    with qtbot.waitSignal(frame_processor_top_camera_stream.top_processor_thread.started) as blocker:
+    with qtbot.waitSignal(frame_processor_top_camera_stream.top_processor.finished) as blocker:
         frame_processor_top_camera_stream.process_side(Mock())
     
-    assert blocker.signal_triggered, "started"
+    assert blocker.signal_triggered, "finished"
+    assert frame_processor_top_camera_stream.top_processor_thread.isRunning()
     
 def test_process_side_starts_timer_if_not_active(qtbot, frame_processor_top_camera_stream):
     
     frame_processor_top_camera_stream.processing_flag = True
     frame_processor_top_camera_stream.timer.start = Mock()
     frame_processor_top_camera_stream.timer.isActive = Mock(return_value = False)
-    with qtbot.waitSignal(frame_processor_top_camera_stream.top_processor_thread.started):
+    with qtbot.waitSignal(frame_processor_top_camera_stream.top_processor.finished):
         frame_processor_top_camera_stream.process_side(Mock())
 
     assert frame_processor_top_camera_stream.timer.start.call_count == 1
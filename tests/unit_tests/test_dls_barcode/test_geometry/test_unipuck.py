@@ -34,41 +34,62 @@ class TestUnipuck(unittest.TestCase):
         self.assertTrue(math.ceil(r1/r2) == 100)
 
     def test_containing_slot_returns_the_number_of_slot_to_which_a_point_belongs(self):
-        #this method assumes that the slot bounds (objects of type circle) are always stored
-        # in a particular sequence in slot_bounds array
-        #TODO: posssible improvement: create a slot bound class with slot number parameter
-        uni1 = Unipuck(center=MagicMock(), radius=MagicMock())
-        slot_bound = MagicMock()
-        slot_bound.contains_point.return_value = False
-
-        slot_bound1 = MagicMock()
-        slot_bound1.contains_point.return_value = False
-
-        slot_bound2 = MagicMock()
-        slot_bound2.contains_point.return_value = True
-
-        uni1._slot_bounds = [slot_bound, slot_bound1, slot_bound2]
-        number = uni1.containing_slot(MagicMock())
+        #this method assumes that the slot bounds are always stored in a particular sequence - slot
+        # bound[0] is slot number 1
+        uni1 = Unipuck(center=Point(500, 500), radius=400)
+        slot3 = uni1.slot_bounds(3)
+        number = uni1.containing_slot(slot3.center() + Point(2, -1))
         self.assertTrue(number == 3)
 
     def test_containing_slot_returns_None_if_no_bounds(self):
-        uni1 = Unipuck(center=MagicMock(), radius=MagicMock())
-        uni1._slot_bounds = []
-        number = uni1.containing_slot(MagicMock())
+        uni1 = Unipuck(center=Point(500, 500), radius=0)
+        number = uni1.containing_slot(Point(500, 500))
         self.assertIsNone(number)
 
     def test_containing_slot_returns_None_if_point_does_not_belong_to_any_bound(self):
-        uni1 = Unipuck(center=MagicMock(), radius=MagicMock())
-        slot_bound = MagicMock()
-        slot_bound.contains_point.return_value = False
-
-        slot_bound1 = MagicMock()
-        slot_bound1.contains_point.return_value = False
-
-        uni1._slot_bounds = [slot_bound, slot_bound1]
-        number = uni1.containing_slot(MagicMock())
+        uni1 = Unipuck(center=Point(500, 500), radius=400)
+        number = uni1.containing_slot(Point(500, 500))
+        self.assertIsNone(number)
+        number = uni1.containing_slot(Point(0, 0))
         self.assertIsNone(number)
 
+    def test_containing_slots_matches_the_slot_bounds_for_every_point(self):
+        uni1 = Unipuck(center=Point(320.5, 240.25), radius=213, rotation=0.7)
+        points = [Point(x, y) for x in range(100, 550, 7) for y in range(20, 470, 7)]
+
+        numbers = uni1.containing_slots(points)
+
+        for point, number in zip(points, numbers):
+            expected = None
+            for i in range(1, 17):
+                if uni1.slot_bounds(i).contains_point(point):
+                    expected = i
+                    break
+            self.assertEqual(number, expected)
+        self.assertEqual(len(set(numbers) - {None}), 16)
+
+    def test_containing_slots_returns_empty_list_for_no_points(self):
+        uni1 = Unipuck(center=Point(500, 500), radius=400)
+        self.assertEqual(uni1.containing_slots([]), [])
+
+    def test_slot_layout_matches_slot_bounds(self):
+        uni1 = Unipuck(center=Point(123.7, 456.2), radius=98.6, rotation=2.1)
+        bounds = Unipuck.calculate_slot_bounds(Point(123.7, 456.2), 98.6, 2.1)
+
+        for i, b in enumerate(bounds):
+            self.assertEqual(uni1.slot_center(i + 1).x, b.center().x)
+            self.assertEqual(uni1.slot_center(i + 1).y, b.center().y)
+            self.assertEqual(uni1.slot_bounds(i + 1).radius(), b.radius())
+
+    def test_slot_bounds_follow_change_of_rotation(self):
+        uni1 = Unipuck(center=Point(500, 500), radius=400)
+        before = uni1.slot_center(1)
+        uni1.set_rotation(math.pi)
+        after = uni1.slot_center(1)
+
+        self.assertEqual(after.x, before.x)
+        self.assertNotEqual(after.y, before.y)
+        self.assertEqual(uni1.slot_bounds(1).center().y, after.y)
 
     def test_calculate_slot_bounds_returns_x0_for_slots1and6_if_rotation_and_center_are_0(self):
         #again the assumption that slot bounds have a particular sequence - slot bound[0] is slot number 1
@@ -1,9 +1,15 @@
 import math
+import random
 import unittest
-from mock import MagicMock
+
+import numpy as np
+from mock import MagicMock, patch
 
 from dls_barcode.geometry.exception import GeometryAlignmentError
-from dls_barcode.geometry.unipuck_calculator import UnipuckCalculator, _partition, calculate_centroid, _center_minimiser
+from dls_barcode.geometry.unipuck import Unipuck
+from dls_barcode.geometry.unipuck_calculator import UnipuckCalculator, _partition, calculate_centroid, _center_minimiser, \
+    _orientation_errors, _slot_directions
+from dls_util.shape import Point
 
 
 class TestUnipuckCalculator(unittest.TestCase):
@@ -104,6 +110,31 @@ class TestUnipuckCalculator(unittest.TestCase):
         e = _center_minimiser(center, points)
         self.assertGreater(e, 0)
 
+    # test _find_puck_center
+    def test_find_puck_center_of_slots_with_some_missing(self):
+        center, radius = Point(640, 480), 400
+        slots = Unipuck.calculate_slot_bounds(center, radius, 0.3)
+        # Missing pins from one side of each layer pull the centroid away from the center
+        pin_centers = [b.center() for i, b in enumerate(slots) if i not in (0, 1, 5, 6, 7, 8)]
+
+        found = UnipuckCalculator._find_puck_center(pin_centers)
+
+        self.assertLessEqual(found.distance_to(center), 2)
+
+    def test_find_puck_center_does_not_iterate_when_fit_succeeds(self):
+        pin_centers = [b.center() for b in Unipuck.calculate_slot_bounds(Point(300, 300), 200, 0)]
+        with patch('dls_barcode.geometry.unipuck_calculator._find_center_iteratively') as iterate:
+            UnipuckCalculator._find_puck_center(pin_centers)
+        iterate.assert_not_called()
+
+    def test_find_puck_center_falls_back_to_iterating_when_fit_fails(self):
+        pin_centers = [Point(100, 100)] * 6
+        with patch('dls_barcode.geometry.unipuck_calculator._find_center_iteratively') as iterate:
+            iterate.return_value = [100, 100]
+            found = UnipuckCalculator._find_puck_center(pin_centers)
+        iterate.assert_called_once_with(pin_centers)
+        self.assertEqual(found.tuple(), (100, 100))
+
     # test _calculate_puck_size
     def test_calculate_puck_size_based_on_seven_pin_centers(self):
         puck_center = MagicMock()
@@ -117,50 +148,80 @@ class TestUnipuckCalculator(unittest.TestCase):
 
 
     # test _determine_puck_orientation
-    # a better test coverage could be added
-    def test_determine_puck_orientation_first_angle_checked_when_empty_pin_centers_mock_passed(self):
-        puck = MagicMock()
-        puck.angle.return_value = math.pi/2
-        puck.radius.return_value = 12
-        first_angle_checked = 0
-        pin_centers = MagicMock()
-        pin_centers.__len__.return_value = 16 #has to be a number - division by 0
+    def test_determine_puck_orientation_finds_rotation_of_slot_centers(self):
+        center, radius, angle = Point(500, 400), 300, math.radians(40)
+        pin_centers = [b.center() for b in Unipuck.calculate_slot_bounds(center, radius, angle)][3:14]
 
-        calculator = self._create_unipuck_calculator()
-        orientation = calculator._determine_puck_orientation(puck, pin_centers)
-        self.assertEqual(puck.set_rotation.call_count, 181)
-        self.assertEqual(orientation, first_angle_checked)
+        orientation = UnipuckCalculator._determine_puck_orientation(Unipuck(center, radius), pin_centers)
+
+        self.assertAlmostEqual(orientation, angle)
 
-    # test _shortest_sq_distance
-    def test_shortest_sq_distance_distance_larger_than_slot_radius(self):
-        number_of_puck_slots = 3
-        slot_radius = 3
-        puck = MagicMock()
-        puck.num_slots.return_value = number_of_puck_slots
-        puck.slot_radius.return_value = slot_radius
+    def test_determine_puck_orientation_refines_angle_between_search_steps(self):
+        center, radius, angle = Point(600, 500), 450, math.radians(71)
+        pin_centers = [b.center() for b in Unipuck.calculate_slot_bounds(center, radius, angle)]
 
-        point = MagicMock()
-        point.distance_to_sq.side_effect = [16, 10, 25] #distacne of a point to different slot centers
-        #side_effect can also be any iterable object
+        orientation = UnipuckCalculator._determine_puck_orientation(Unipuck(center, radius), pin_centers)
 
-        sq_dist = UnipuckCalculator._shortest_sq_distance(puck, point)
-        self.assertEqual(sq_dist, 10)
-        self.assertEqual(point.distance_to_sq.call_count, number_of_puck_slots)
+        self.assertAlmostEqual(orientation, angle, delta=math.radians(UnipuckCalculator.ORIENTATION_FINE_STEP))
 
-    def test_shortest_sq_distance_distance_smaller_than_slot_radius(self):
-        number_of_puck_slots = 3
-        slot_radius = 3
-        puck = MagicMock()
-        puck.num_slots.return_value = number_of_puck_slots
-        puck.slot_radius.return_value = slot_radius
+    @patch.object(UnipuckCalculator, 'ORIENTATION_FINE_STEP', 2)
+    def test_determine_puck_orientation_without_refinement_matches_one_slot_at_a_time_search(self):
+        rng = random.Random(7)
+        for _ in range(20):
+            center, radius = Point(rng.randint(300, 900), rng.randint(300, 700)), rng.randint(150, 500)
+            pin_centers = [Point(int(b.center().x + rng.uniform(-6, 6)), int(b.center().y + rng.uniform(-6, 6)))
+                           for b in Unipuck.calculate_slot_bounds(center, radius, rng.uniform(0, 2 * math.pi))]
+            pin_centers = pin_centers[:rng.randint(6, 16)]
+            puck = Unipuck(center, radius)
 
-        point = MagicMock()
-        point.distance_to_sq.side_effect = [4, 6, 10]
+            orientation = UnipuckCalculator._determine_puck_orientation(puck, pin_centers)
 
-        sq_dist = UnipuckCalculator._shortest_sq_distance(puck, point)
-        self.assertEqual(sq_dist, 4)
-        self.assertEqual(point.distance_to_sq.call_count, 1) #stops after the first slot
+            self.assertEqual(orientation, self._reference_orientation(puck, pin_centers))
 
+    def test_determine_puck_orientation_raises_error_when_pins_do_not_fit_template(self):
+        pin_centers = [Point(500 + 10 * i, 400) for i in range(8)]
+        with self.assertRaises(GeometryAlignmentError) as cm:
+            UnipuckCalculator._determine_puck_orientation(Unipuck(Point(500, 400), 300), pin_centers)
+        self.assertEqual("Unable to determine Unipuck orientation", str(cm.exception))
+
+    # test _orientation_errors
+    def test_orientation_errors_are_the_sums_of_squared_distances_to_the_closest_slots(self):
+        center, radius = Point(500, 400), 300
+        puck = Unipuck(center, radius)
+        pin_centers = [Point(510, 380), Point(700, 420), Point(350, 600)]
+        pins = np.array([[p.x, p.y] for p in pin_centers], dtype=np.float64)
+        angles = [0, math.radians(33), math.radians(271)]
+
+        errors = _orientation_errors(puck, pins, angles, _slot_directions(angles))
+
+        for angle, error in zip(angles, errors):
+            puck.set_rotation(angle)
+            self.assertAlmostEqual(error, sum(self._sq_distance_to_closest_slot(puck, p) for p in pin_centers))
+
+    def test_orientation_errors_are_zero_at_the_rotation_of_the_slot_centers(self):
+        center, radius, angle = Point(500, 400), 300, math.radians(40)
+        pins = np.array([[b.center().x, b.center().y]
+                         for b in Unipuck.calculate_slot_bounds(center, radius, angle)], dtype=np.float64)
+
+        errors = _orientation_errors(Unipuck(center, radius), pins, [angle], _slot_directions([angle]))
+
+        self.assertEqual(errors[0], 0)
 
     def _create_unipuck_calculator(self):
         return UnipuckCalculator(self._slot_centers)
+
+    @staticmethod
+    def _reference_orientation(puck, pin_centers):
+        """ The best angle found by rotating the puck through each step and measuring every pin against every slot. """
+        best_sse, best_angle = 10000000, 0
+        for a in range(0, 360, 2):
+            angle = a / (180 / math.pi)
+            puck.set_rotation(angle)
+            sse = sum(TestUnipuckCalculator._sq_distance_to_closest_slot(puck, p) for p in pin_centers)
+            if sse < best_sse:
+                best_sse, best_angle = sse, angle
+        return best_angle
+
+    @staticmethod
+    def _sq_distance_to_closest_slot(puck, point):
+        return min(point.distance_to_sq(puck.slot_center(num + 1)) for num in range(puck.num_slots()))
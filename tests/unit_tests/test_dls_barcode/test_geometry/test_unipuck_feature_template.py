@@ -0,0 +1,47 @@
+import os
+import unittest
+
+import cv2
+import numpy as np
+
+from dls_barcode.geometry.unipuck_feature_template import UnipuckFeatureTemplate
+
+
+class TestUnipuckFeatureTemplate(unittest.TestCase):
+
+    def setUp(self):
+        UnipuckFeatureTemplate._template = None
+
+    def tearDown(self):
+        UnipuckFeatureTemplate._template = None
+
+    def test_path_points_to_the_template_image(self):
+        self.assertTrue(os.path.exists(UnipuckFeatureTemplate.PATH))
+
+    def test_load_returns_the_same_template_every_time(self):
+        first = UnipuckFeatureTemplate.load()
+        second = UnipuckFeatureTemplate.load()
+        self.assertIs(first, second)
+
+    def test_template_contour_is_largest_contour_of_inverted_image(self):
+        image = cv2.imread(UnipuckFeatureTemplate.PATH, 0)
+        contours, _ = cv2.findContours(255 - image, cv2.RETR_LIST, cv2.CHAIN_APPROX_NONE)
+        largest = max(contours, key=cv2.contourArea)
+
+        template = UnipuckFeatureTemplate.load()
+
+        self.assertTrue(np.array_equal(template.contour(), largest))
+
+    def test_from_file_raises_IOError_if_file_is_missing(self):
+        with self.assertRaises(IOError) as context:
+            UnipuckFeatureTemplate.from_file("missing/fit.png")
+        self.assertIn("Unipuck feature template", str(context.exception))
+
+    def test_missing_file_is_not_cached(self):
+        original = UnipuckFeatureTemplate.PATH
+        UnipuckFeatureTemplate.PATH = "missing/fit.png"
+        try:
+            self.assertRaises(IOError, UnipuckFeatureTemplate.load)
+            self.assertIsNone(UnipuckFeatureTemplate._template)
+        finally:
+            UnipuckFeatureTemplate.PATH = original
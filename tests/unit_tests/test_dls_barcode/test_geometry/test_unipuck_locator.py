@@ -0,0 +1,48 @@
+import math
+import os
+import unittest
+
+import numpy as np
+
+from dls_barcode.geometry.unipuck_locator import UnipuckLocator
+from dls_util.image import Image
+
+RESOURCES = os.path.join('tests', 'test-resources', 'blue_stand')
+
+
+def _gray(name):
+    return Image.from_file(os.path.join(RESOURCES, name)).to_grayscale()
+
+
+class TestUnipuckLocator(unittest.TestCase):
+
+    def test_large_images_are_searched_at_reduced_scale_by_default(self):
+        large = Image(np.zeros((1200, 1600), np.uint8))
+        small = Image(np.zeros((480, 640), np.uint8))
+
+        self.assertEqual(UnipuckLocator(large)._scale, UnipuckLocator.REDUCED_SCALE)
+        self.assertEqual(UnipuckLocator(small)._scale, 1.0)
+        self.assertEqual(UnipuckLocator(large, reduce=False)._scale, 1.0)
+        self.assertEqual(UnipuckLocator(small, reduce=True)._scale, UnipuckLocator.REDUCED_SCALE)
+
+    def test_reduced_scale_search_finds_the_same_puck_as_full_resolution(self):
+        for name in ["puck3_04.png", "puck4_01.png", "puck4_05.png"]:
+            gray = _gray(name)
+            full = UnipuckLocator(gray, reduce=False).find_location()
+            reduced = UnipuckLocator(gray, reduce=True).find_location()
+
+            self.assertIsNotNone(full)
+            self.assertIsNotNone(reduced)
+            self.assertLessEqual(full.center().distance_to(reduced.center()), 3)
+            self.assertLessEqual(abs(full.radius() - reduced.radius()), 2)
+            self.assertLess(abs(full.angle() - reduced.angle()), math.radians(0.5))
+
+    def test_reduced_scale_feature_outline_is_in_full_resolution_coordinates(self):
+        gray = _gray("puck4_01.png")
+        full = UnipuckLocator(gray, reduce=False).find_location()
+        reduced = UnipuckLocator(gray, reduce=True).find_location()
+
+        full_feature = full._feature_center
+        reduced_feature = reduced._feature_center
+        self.assertLessEqual(full_feature.distance_to(reduced_feature), 2)
+
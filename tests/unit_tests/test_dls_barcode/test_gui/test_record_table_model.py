@@ -0,0 +1,107 @@
+import pytest
+from mock import MagicMock
+from PyQt5.QtCore import Qt
+
+from dls_barcode.data_store import Store
+from dls_barcode.data_store.record import Record
+from dls_barcode.gui.record_table_model import RecordTableModel
+from dls_util.image import Color
+
+RECORD_STRINGS = [
+    "id0;1494238923.0;test0.png;test_holder.png;None;DLSL-001,DLSL-010,DLSL-011;1569:1106:70-2307:1073:68",
+    "id1;1494238922.0;test1.png;test_holder.png;None;DLSL-002,DLSL-010,-CANT-FIND-;1569:1106:70-2307:1073:68",
+    "id2;1494238921.0;test2.png;test_holder.png;None;DLSL-003,DLSL-010,DLSL-011;1569:1106:70-2307:1073:68",
+]
+
+
+@pytest.fixture
+def store():
+    store_writer = MagicMock()
+    store_writer.get_img_path.return_value = "img.png"
+    store_writer.get_holder_img_path.return_value = "img_holder.png"
+    return Store(store_writer, [Record.from_string(string) for string in RECORD_STRINGS])
+
+
+@pytest.fixture
+def model(store):
+    options = MagicMock()
+    options.col_ok.side_effect = Color.Green
+    options.col_accept.side_effect = Color.Yellow
+    options.col_bad.side_effect = Color.Red
+    return RecordTableModel(store, options)
+
+
+@pytest.fixture
+def plate():
+    plate = MagicMock()
+    plate.type = "None"
+    plate.barcodes.return_value = ["DLSL-020"]
+    geometry = MagicMock()
+    geometry.serialize.return_value = "1569:1106:70"
+    plate.geometry.return_value = geometry
+    return plate
+
+
+def test_model_passes_the_model_tester(qtmodeltester, model):
+    qtmodeltester.check(model)
+
+
+def test_rows_are_the_records_most_recent_first(model):
+    assert model.rowCount() == 3
+    assert model.columnCount() == len(RecordTableModel.COLUMNS)
+    assert model.data(model.index(0, 2)) == "DLSL-001"
+    assert model.data(model.index(2, 2)) == "DLSL-003"
+    assert model.headerData(2, Qt.Horizontal) == "Plate Barcode"
+
+
+def test_rows_are_coloured_by_how_many_barcodes_were_read(model):
+    assert model.data(model.index(0, 0), Qt.BackgroundRole).green() == Color.Green().g
+    assert model.data(model.index(1, 0), Qt.BackgroundRole).red() == Color.Yellow().r
+
+
+def test_store_is_only_read_for_the_rows_that_are_displayed(store, model):
+    store.get_record = MagicMock(wraps=store.get_record)
+    for column in range(model.columnCount()):
+        model.data(model.index(1, column))
+    store.get_record.assert_called_once_with(1)
+
+
+def test_new_record_is_inserted_in_the_first_row(qtbot, model, plate):
+    with qtbot.waitSignal(model.rowsInserted, timeout=100) as blocker:
+        model.merge_record("NEW", plate, MagicMock(), MagicMock())
+
+    assert blocker.args[1:] == [0, 0]
+    assert model.rowCount() == 4
+    assert model.data(model.index(0, 2)) == "NEW"
+    assert model.data(model.index(1, 2)) == "DLSL-001"
+
+
+def test_record_replacing_the_latest_record_changes_the_first_row(qtbot, model, plate):
+    with qtbot.assertNotEmitted(model.rowsInserted), qtbot.waitSignal(model.dataChanged, timeout=100):
+        model.merge_record("DLSL-001", plate, MagicMock(), MagicMock())
+
+    assert model.rowCount() == 3
+    assert model.data(model.index(0, 2)) == "DLSL-001"
+    assert model.data(model.index(0, 3)) == "1"
+
+
+def test_deleted_rows_are_removed(qtbot, store, model):
+    with qtbot.waitSignal(model.rowsRemoved, timeout=100):
+        model.delete_rows([2, 0])
+
+    assert model.rowCount() == 1
+    assert model.data(model.index(0, 2)) == "DLSL-002"
+    assert [r.id for r in store.records] == ["id1"]
+
+
+def test_adjacent_rows_are_deleted_together(store, model):
+    removed = []
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+    store.delete_records = MagicMock(wraps=store.delete_records)
+
+    model.delete_rows([1, 0, 5])
+
+    assert removed == [(0, 1)]
+    store.delete_records.assert_called_once()
+    assert [r.id for r in store.records] == ["id2"]
+    assert model.rowCount() == 1
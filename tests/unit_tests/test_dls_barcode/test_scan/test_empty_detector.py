@@ -0,0 +1,58 @@
+import unittest
+
+from mock import MagicMock
+
+from dls_barcode.geometry.unipuck import Unipuck
+from dls_barcode.scan.with_geometry.empty_detector import EmptySlotDetector
+from dls_util.image import Image, Color
+from dls_util.shape import Point, Circle
+
+
+class TestEmptySlotDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.puck = Unipuck(Point(300, 300), 250)
+        self.barcode = self._barcode(self.puck.slot_center(1), 30)
+
+    def test_no_empty_slots_without_barcodes(self):
+        self.assertEqual(EmptySlotDetector.detect(Image.blank(600, 600, 1), []), [])
+
+    def test_neighbourhoods_are_around_the_slots_without_barcodes(self):
+        neighbourhoods = EmptySlotDetector._slot_neighbourhoods(self.puck, [self.barcode], 30)
+
+        centers = [center.tuple() for center, _ in neighbourhoods]
+        expected = [self.puck.slot_center(n).tuple() for n in range(2, self.puck.num_slots() + 1)]
+        self.assertEqual(centers, expected)
+        self.assertEqual(neighbourhoods[0][1], EmptySlotDetector.NEIGHBOURHOOD_FACTOR * 30)
+
+    def test_no_neighbourhoods_without_a_geometry(self):
+        self.assertIsNone(EmptySlotDetector._slot_neighbourhoods(None, [self.barcode], 30))
+
+    def test_no_neighbourhoods_if_a_barcode_is_outside_the_slots_of_the_geometry(self):
+        barcodes = [self.barcode, self._barcode(Point(590, 590), 30)]
+        self.assertIsNone(EmptySlotDetector._slot_neighbourhoods(self.puck, barcodes, 30))
+
+    def test_holes_are_found_only_near_the_predicted_slots(self):
+        image = Image.blank(600, 600)
+        hole = Circle(self.puck.slot_center(5), 40)
+        image.draw_circle(hole, Color(255, 255, 255), 4)
+        image.draw_circle(Circle(Point(540, 60), 40), Color(255, 255, 255), 4)
+        gray = image.to_grayscale()
+
+        near_slots = EmptySlotDetector.detect(gray, [self.barcode], self.puck)
+        everywhere = EmptySlotDetector.detect(gray, [self.barcode])
+
+        self.assertEqual(len(near_slots), 1)
+        self.assertLess(near_slots[0].center().distance_to(hole.center()), 5)
+        self.assertEqual(len(everywhere), 2)
+
+    @staticmethod
+    def _barcode(center, radius):
+        barcode = MagicMock()
+        barcode.center.return_value = center
+        barcode.radius.return_value = radius
+        return barcode
+
+
+if __name__ == '__main__':
+    unittest.main()
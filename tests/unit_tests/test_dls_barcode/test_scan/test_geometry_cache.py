@@ -0,0 +1,115 @@
+import unittest
+
+import numpy as np
+from mock import MagicMock
+
+from dls_barcode.geometry.unipuck import Unipuck
+from dls_barcode.scan.with_geometry.geometry_cache import GeometryCache
+from dls_util.shape import Point
+
+
+class TestGeometryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.puck = Unipuck(Point(200, 200), 150)
+        self.puck.set_feature_center(Point(200, 60))
+        self.frame = self._frame(np.full((400, 400), 100, dtype=np.uint8))
+        self.barcodes = self._barcodes(self._slot_centers(4))
+
+    def test_cache_is_empty_to_begin_with(self):
+        self.assertIsNone(GeometryCache().geometry())
+
+    def test_stored_geometry_is_returned(self):
+        cache = GeometryCache()
+        cache.store(self.puck, self.barcodes, self.frame)
+        self.assertIs(cache.geometry(), self.puck)
+        self.assertTrue(cache.has_feature())
+
+    def test_geometry_is_not_stored_without_barcodes(self):
+        cache = GeometryCache()
+        cache.store(self.puck, [], self.frame)
+        self.assertIsNone(cache.geometry())
+
+    def test_clear_removes_the_geometry(self):
+        cache = GeometryCache()
+        cache.store(self.puck, self.barcodes, self.frame)
+        cache.clear()
+        self.assertIsNone(cache.geometry())
+        self.assertFalse(cache.barcodes_match(self.barcodes))
+
+    def test_barcodes_in_the_same_place_match(self):
+        cache = GeometryCache()
+        cache.store(self.puck, self.barcodes, self.frame)
+        self.assertTrue(cache.barcodes_match(self.barcodes))
+
+    def test_one_barcode_found_in_a_slightly_different_place_still_matches(self):
+        cache = GeometryCache()
+        cache.store(self.puck, self.barcodes, self.frame)
+        centers = self._slot_centers(4)
+        centers[0] = Point(centers[0].x + 8, centers[0].y)
+        self.assertTrue(cache.barcodes_match(self._barcodes(centers)))
+
+    def test_barcodes_that_have_all_moved_do_not_match(self):
+        cache = GeometryCache()
+        cache.store(self.puck, self.barcodes, self.frame)
+        moved = [Point(c.x + 5, c.y) for c in self._slot_centers(4)]
+        self.assertFalse(cache.barcodes_match(self._barcodes(moved)))
+
+    def test_new_barcode_within_a_slot_matches(self):
+        cache = GeometryCache()
+        cache.store(self.puck, self.barcodes, self.frame)
+        self.assertTrue(cache.barcodes_match(self._barcodes(self._slot_centers(5))))
+
+    def test_new_barcode_outside_the_slots_does_not_match(self):
+        cache = GeometryCache()
+        cache.store(self.puck, self.barcodes, self.frame)
+        centers = self._slot_centers(4) + [Point(390, 390)]
+        self.assertFalse(cache.barcodes_match(self._barcodes(centers)))
+
+    def test_notch_matches_unchanged_frame(self):
+        cache = GeometryCache()
+        cache.store(self.puck, self.barcodes, self.frame)
+        self.assertTrue(cache.notch_matches(self._frame(self.frame.img.copy())))
+
+    def test_notch_does_not_match_when_the_area_around_the_feature_changes(self):
+        cache = GeometryCache()
+        cache.store(self.puck, self.barcodes, self.frame)
+        img = self.frame.img.copy()
+        img[40:80, 180:220] = 255
+        self.assertFalse(cache.notch_matches(self._frame(img)))
+
+    def test_changes_away_from_the_feature_do_not_affect_the_notch(self):
+        cache = GeometryCache()
+        cache.store(self.puck, self.barcodes, self.frame)
+        img = self.frame.img.copy()
+        img[300:, 300:] = 255
+        self.assertTrue(cache.notch_matches(self._frame(img)))
+
+    def test_geometry_without_feature_can_only_be_checked_against_barcodes(self):
+        puck = Unipuck(Point(200, 200), 150)
+        cache = GeometryCache()
+        cache.store(puck, self.barcodes, self.frame)
+        self.assertFalse(cache.has_feature())
+        self.assertTrue(cache.notch_matches(self._frame(np.zeros((400, 400), dtype=np.uint8))))
+
+    def _slot_centers(self, count):
+        return [self.puck.slot_center(n) for n in range(1, count + 1)]
+
+    @staticmethod
+    def _frame(img):
+        frame = MagicMock()
+        frame.img = img
+        return frame
+
+    @staticmethod
+    def _barcodes(centers):
+        barcodes = []
+        for center in centers:
+            barcode = MagicMock()
+            barcode.center.return_value = center
+            barcodes.append(barcode)
+        return barcodes
+
+
+if __name__ == '__main__':
+    unittest.main()
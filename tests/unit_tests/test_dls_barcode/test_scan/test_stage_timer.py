@@ -0,0 +1,102 @@
+import unittest
+
+from mock import patch, MagicMock
+
+from dls_barcode.scan.scan_result import ScanResult
+from dls_barcode.scan.stage_timer import StageTimer
+
+
+class TestStageTimer(unittest.TestCase):
+
+    @patch('dls_barcode.scan.stage_timer.time.perf_counter')
+    def test_stage_records_the_time_spent_within_it(self, perf_counter):
+        perf_counter.side_effect = [1.0, 1.5]
+        timer = StageTimer()
+
+        with timer.stage(StageTimer.LOCATE):
+            pass
+
+        self.assertDictEqual(dict(timer.times()), {StageTimer.LOCATE: 0.5})
+
+    @patch('dls_barcode.scan.stage_timer.time.perf_counter')
+    def test_repeated_stage_times_are_added_up(self, perf_counter):
+        perf_counter.side_effect = [0.0, 1.0, 5.0, 7.0]
+        timer = StageTimer()
+
+        with timer.stage(StageTimer.DECODE):
+            pass
+        with timer.stage(StageTimer.DECODE):
+            pass
+
+        self.assertEqual(timer.times()[StageTimer.DECODE], 3.0)
+
+    @patch('dls_barcode.scan.stage_timer.time.perf_counter')
+    def test_nested_stage_time_is_not_counted_in_outer_stage(self, perf_counter):
+        perf_counter.side_effect = [0.0, 1.0, 4.0, 6.0]
+        timer = StageTimer()
+
+        with timer.stage(StageTimer.MERGE):
+            with timer.stage(StageTimer.DECODE):
+                pass
+
+        times = timer.times()
+        self.assertEqual(times[StageTimer.MERGE], 3.0)
+        self.assertEqual(times[StageTimer.DECODE], 3.0)
+        self.assertEqual(timer.total(), 6.0)
+
+    def test_stage_is_timed_when_exited_by_an_exception(self):
+        timer = StageTimer()
+
+        with self.assertRaises(ValueError):
+            with timer.stage(StageTimer.GEOMETRY):
+                raise ValueError()
+
+        self.assertIn(StageTimer.GEOMETRY, timer.times())
+
+    @patch('dls_barcode.scan.stage_timer.time.perf_counter')
+    def test_disabled_timer_records_nothing(self, perf_counter):
+        timer = StageTimer(enabled=False)
+
+        with timer.stage(StageTimer.LOCATE):
+            pass
+
+        self.assertFalse(timer.times())
+        perf_counter.assert_not_called()
+
+    def test_summary_lists_stages_in_milliseconds(self):
+        timer = StageTimer()
+        timer._add(StageTimer.GRAY, 0.0012)
+        timer._add(StageTimer.LOCATE, 0.1304)
+
+        self.assertEqual(timer.summary(), "gray 1.2 ms; locate 130.4 ms")
+
+
+class TestScanResultStageTimes(unittest.TestCase):
+
+    def test_scan_result_records_stage_times(self):
+        result = ScanResult(1)
+
+        with result.stage(StageTimer.LOCATE):
+            pass
+
+        self.assertListEqual(list(result.stage_times().keys()), [StageTimer.LOCATE])
+
+    def test_print_summary_logs_stage_times(self):
+        result = ScanResult(1)
+        result._log = MagicMock()
+        with result.stage(StageTimer.DECODE):
+            pass
+
+        result.print_summary()
+
+        messages = [call[0][0] for call in result._log.debug.call_args_list]
+        self.assertTrue(any(m.startswith("Stage Times: decode") for m in messages))
+
+    def test_stage_times_are_not_recorded_when_disabled(self):
+        with patch.object(ScanResult, 'RECORD_STAGE_TIMES', False):
+            result = ScanResult(1)
+
+        with result.stage(StageTimer.DECODE):
+            pass
+
+        self.assertFalse(result.stage_times())
@@ -0,0 +1,95 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from dls_util.image.contours_manager import ContoursManager
+
+
+def _image_with_shapes():
+    img = np.zeros((200, 300), np.uint8)
+    cv2.rectangle(img, (10, 10), (49, 49), 255, -1)      # 40 x 40 square
+    cv2.rectangle(img, (70, 10), (129, 29), 255, -1)     # 60 x 20 rectangle
+    cv2.circle(img, (200, 100), 50, 255, -1)             # large circle
+    cv2.rectangle(img, (10, 150), (14, 154), 255, -1)    # small square
+    cv2.ellipse(img, (100, 120), (30, 12), 0, 0, 360, 255, -1)
+    return img
+
+
+class TestContoursManager(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = ContoursManager(_image_with_shapes())
+        self.manager.find_all()
+
+    def test_get_lagerst_returns_the_contour_with_the_largest_area(self):
+        expected = sorted(self.manager.contours, key=cv2.contourArea, reverse=True)[0]
+        self.assertTrue(np.array_equal(self.manager.get_lagerst(), expected))
+
+    def test_get_largest_returns_contours_in_order_of_area(self):
+        expected = sorted(self.manager.contours, key=cv2.contourArea, reverse=True)[:3]
+        largest = self.manager.get_largest(3)
+        self.assertEqual(len(largest), 3)
+        for cnt, exp in zip(largest, expected):
+            self.assertTrue(np.array_equal(cnt, exp))
+
+    def test_get_largest_picks_the_first_of_equal_contours(self):
+        img = np.zeros((100, 100), np.uint8)
+        cv2.rectangle(img, (10, 10), (29, 29), 255, -1)
+        cv2.rectangle(img, (50, 50), (69, 69), 255, -1)
+        manager = ContoursManager(img)
+        manager.find_all()
+
+        expected = sorted(manager.contours, key=cv2.contourArea, reverse=True)[0]
+        self.assertTrue(np.array_equal(manager.get_lagerst(), expected))
+
+    def test_get_lagerst_raises_IndexError_if_there_are_no_contours(self):
+        manager = ContoursManager(np.zeros((10, 10), np.uint8))
+        manager.find_all()
+        self.assertRaises(IndexError, manager.get_lagerst)
+
+    def test_candidates_are_filtered_by_area_and_perimeter(self):
+        areas = [cv2.contourArea(c) for c in self.manager.contours]
+        perimeters = [cv2.arcLength(c, True) for c in self.manager.contours]
+
+        candidates = self.manager.candidates(min_area=100, max_area=2000, min_perimeter=120)
+
+        expected = [i for i in range(len(areas)) if 100 <= areas[i] <= 2000 and perimeters[i] >= 120]
+        self.assertEqual(candidates, expected)
+        self.assertEqual(self.manager.candidates(), list(range(len(areas))))
+
+    def test_match_shapes_agrees_with_cv2_matchShapes(self):
+        pattern = np.array([[[0, 0]], [[0, 80]], [[80, 80]], [[80, 0]]], dtype=np.int32)
+        factors = [cv2.matchShapes(pattern, c, 1, 0.0) for c in self.manager.contours]
+
+        match_factor, match_cnt = self.manager.match_shapes(pattern)
+
+        best = int(np.argmin(factors))
+        self.assertAlmostEqual(match_factor, factors[best], places=9)
+        self.assertTrue(np.array_equal(match_cnt, self.manager.contours[best]))
+
+    def test_match_shapes_only_compares_the_candidates(self):
+        pattern = np.array([[[0, 0]], [[0, 80]], [[80, 80]], [[80, 0]]], dtype=np.int32)
+        candidates = self.manager.candidates(min_area=2000)
+
+        _, match_cnt = self.manager.match_shapes(pattern, candidates)
+
+        self.assertGreaterEqual(cv2.contourArea(match_cnt), 2000)
+
+    def test_match_shapes_returns_no_contour_if_there_are_no_candidates(self):
+        pattern = np.array([[[0, 0]], [[0, 80]], [[80, 80]], [[80, 0]]], dtype=np.int32)
+        match_factor, match_cnt = self.manager.match_shapes(pattern, [])
+        self.assertIsNone(match_cnt)
+        self.assertEqual(match_factor, 1000000)
+
+    def test_find_external_leaves_out_holes(self):
+        img = np.zeros((100, 100), np.uint8)
+        cv2.rectangle(img, (10, 10), (89, 89), 255, -1)
+        cv2.rectangle(img, (30, 30), (69, 69), 0, -1)
+        manager = ContoursManager(img)
+
+        manager.find_all()
+        self.assertEqual(len(manager.contours), 2)
+        manager.find_external()
+        self.assertEqual(len(manager.contours), 1)
+        self.assertEqual(manager.areas()[0], 79 * 79)
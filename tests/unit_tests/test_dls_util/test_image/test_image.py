@@ -243,3 +243,39 @@ class TestImage(unittest.TestCase):
         
         self.assertEqual(img.width, 1)
         
+
+    def test_calculate_brightnesses_matches_calculate_brightness_for_each_point(self):
+        rng = np.random.RandomState(0)
+        image = Image(rng.randint(0, 256, (60, 80)).astype(np.uint8))
+        centers = [Point(10.5, 12), Point(40, 30), Point(65.2, 47.7)]
+        sizes = [5, 8.4, 11]
+
+        brightnesses = image.calculate_brightnesses(centers, sizes, sizes)
+
+        expected = [image.calculate_brightness(c, s, s) for c, s in zip(centers, sizes)]
+        np.testing.assert_allclose(brightnesses, expected)
+
+    def test_calculate_brightnesses_accepts_a_single_size_for_all_points(self):
+        image = Image(np.full((20, 20), 10, np.uint8))
+        brightnesses = image.calculate_brightnesses([Point(5, 5), Point(15, 15)], 4, 4)
+        np.testing.assert_allclose(brightnesses, [10, 10])
+
+    def test_calculate_brightnesses_returns_empty_array_for_no_points(self):
+        image = Image.blank(10, 10, 1)
+        self.assertEqual(len(image.calculate_brightnesses([], 4, 4)), 0)
+
+    def test_region_sums_adds_up_all_channels(self):
+        image = Image.blank(10, 10, 3, 2)
+        sums = image.region_sums(np.array([0]), np.array([0]), np.array([2]), np.array([3]))
+        self.assertEqual(sums[0], 2 * 3 * 3 * 2)
+
+    def test_region_sums_cuts_regions_off_at_the_image_edge(self):
+        image = Image(np.ones((10, 10), np.uint8))
+        sums = image.region_sums(np.array([-5, 8]), np.array([-5, 8]), np.array([2, 20]), np.array([2, 20]))
+        np.testing.assert_array_equal(sums, [4, 4])
+
+    def test_integral_is_recalculated_if_the_image_is_replaced(self):
+        image = Image(np.ones((4, 4), np.uint8))
+        self.assertEqual(image.integral()[-1, -1], 16)
+        image.img = np.full((2, 2), 3, np.uint8)
+        self.assertEqual(image.integral()[-1, -1], 12)
@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+from dls_util.image import Image, ImageCache
+
+
+class TestImageCache(unittest.TestCase):
+
+    def test_cached_image_is_returned(self):
+        cache = ImageCache(1000)
+        image = self._image(100)
+        cache.put("a", image)
+        self.assertIs(cache.get("a"), image)
+
+    def test_missing_image_returns_none(self):
+        self.assertIsNone(ImageCache(1000).get("a"))
+
+    def test_total_bytes_is_the_size_of_the_images(self):
+        cache = ImageCache(1000)
+        cache.put("a", self._image(100))
+        cache.put("b", self._image(300))
+        self.assertEqual(cache.total_bytes(), 400)
+        self.assertEqual(len(cache), 2)
+
+    def test_least_recently_used_image_is_discarded_when_full(self):
+        # Arrange
+        cache = ImageCache(1000)
+        cache.put("a", self._image(400))
+        cache.put("b", self._image(400))
+        cache.get("a")
+
+        # Act
+        cache.put("c", self._image(400))
+
+        # Assert
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(cache.total_bytes(), 800)
+
+    def test_replacing_an_image_updates_the_size(self):
+        cache = ImageCache(1000)
+        cache.put("a", self._image(400))
+        cache.put("a", self._image(100))
+        self.assertEqual(cache.total_bytes(), 100)
+
+    def test_image_larger_than_the_cache_is_not_kept(self):
+        cache = ImageCache(1000)
+        cache.put("a", self._image(100))
+        cache.put("b", self._image(2000))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+
+    def test_discard_and_clear_remove_images(self):
+        cache = ImageCache(1000)
+        cache.put("a", self._image(100))
+        cache.put("b", self._image(100))
+        cache.discard("a")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.total_bytes(), 100)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.total_bytes(), 0)
+
+    @staticmethod
+    def _image(size):
+        return Image(np.zeros((1, size), dtype=np.uint8))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from dls_util.latest_queue import LatestQueue
+
+
+class TestLatestQueue(unittest.TestCase):
+
+    def test_get_returns_none_when_empty(self):
+        self.assertIsNone(LatestQueue().get())
+
+    def test_items_are_returned_oldest_first(self):
+        queue = LatestQueue(max_size=3)
+        for item in [1, 2, 3]:
+            queue.put(item)
+        self.assertEqual([queue.get(), queue.get(), queue.get()], [1, 2, 3])
+
+    def test_newest_item_replaces_oldest_when_full(self):
+        queue = LatestQueue(max_size=1)
+        self.assertFalse(queue.put(1))
+        self.assertTrue(queue.put(2))
+        self.assertEqual(queue.get(), 2)
+        self.assertEqual(queue.dropped(), 1)
+
+    def test_depth_counts_waiting_items(self):
+        queue = LatestQueue(max_size=2)
+        queue.put(1)
+        queue.put(2)
+        queue.put(3)
+        self.assertEqual(queue.depth(), 2)
+        queue.get()
+        self.assertEqual(queue.depth(), 1)
+        self.assertEqual(queue.max_depth(), 2)
+
+    def test_clear_counts_removed_items_as_dropped(self):
+        queue = LatestQueue(max_size=2)
+        queue.put(1)
+        queue.put(2)
+        queue.clear()
+        self.assertEqual(queue.depth(), 0)
+        self.assertEqual(queue.dropped(), 2)
+
+    def test_size_must_be_at_least_one(self):
+        with self.assertRaises(ValueError):
+            LatestQueue(max_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
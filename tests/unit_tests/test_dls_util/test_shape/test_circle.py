@@ -2,9 +2,11 @@ import unittest
 
 import math
 
+import numpy as np
+
 from dls_util.shape import Point
 
-from dls_util.shape import Circle
+from dls_util.shape import Circle, points_in_circles
 
 
 class TestCircle(unittest.TestCase):
@@ -97,6 +99,19 @@ class TestCircle(unittest.TestCase):
         self.assertFalse(circle_a.intersects(circle_b))
         self.assertFalse(circle_b.intersects(circle_a))
 
+    def test_points_in_circles_agrees_with_contains_point(self):
+        circles = [Circle(Point(0, 0), 5), Circle(Point(3, 4), 2.5), Circle(Point(-7, 1), 1)]
+        points = [Point(0, 0), Point(5, 0), Point(4.9, 0), Point(3, 6), Point(-7, 1.5), Point(20, 20)]
+        centers = np.array([(c.x(), c.y()) for c in circles], dtype=float)
+        radii = np.array([c.radius() for c in circles], dtype=float)
+
+        inside = points_in_circles(points, centers, radii)
+
+        self.assertEqual(inside.shape, (6, 3))
+        for i, p in enumerate(points):
+            for j, c in enumerate(circles):
+                self.assertEqual(inside[i, j], c.contains_point(p))
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -121,4 +136,5 @@ if __name__ == '__main__':
 #     self.centre.distance_to_sq.return_value = 200
 #     assert self.circle.intersects(self.circle_new) == True  # 200 < (10+10)**2 = 400  center_sep_sq < radius_sum_sq
 #     self.centre.distance_to_sq.return_value = 400
-#     assert self.circle.intersects(self.circle_new) == False  # 400 !< 400  center_sep_sq !< radius_sum_sq
\ No newline at end of file
+#     assert self.circle.intersects(self.circle_new) == False  # 400 !< 400  center_sep_sq !< radius_sum_sq
+